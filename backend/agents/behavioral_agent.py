@@ -1,16 +1,16 @@
-from langchain_ollama import ChatOllama
+import asyncio
+
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
-import pandas as pd
 
-load_dotenv()
+from feature_store import features_from_state
+from llm import registry
+from llm.gateway import gateway
+from llm.prompts import fields, select, system_prompt
+from metrics import node_timings, stage
 
 
-# Use Ollama (mistral:latest or gemma3:1b)
-model = ChatOllama(
-    model="mistral:latest",  # or "gemma3:1b" if preferred
-    temperature=0
-)
+# Ollama model (mistral:latest or gemma3:1b); the client is built on first use
+MODEL = "mistral:latest"
 
 class BehaviouralSchema(BaseModel):
     behavioral_risk: float = Field(
@@ -25,7 +25,57 @@ class BehaviouralSchema(BaseModel):
         description="Short explanation for assigned risk"
     )
 
-structured_model = model.with_structured_output(BehaviouralSchema)
+CACHE_NAMESPACE = f"behavioral_agent/{MODEL}"
+
+
+def structured_model():
+    return registry.structured_model(MODEL, BehaviouralSchema, temperature=0)
+
+
+SYSTEM_PROMPT = system_prompt(
+    "Task: is the transaction amount unusual for this customer? hist_* summarize "
+    "their past amounts. Fields: behavioral_risk (0-1), behavioral_label "
+    "(Low|Medium|High), behavioral_reason (one sentence)."
+)
+
+
+def behavioral_fields(state: dict) -> dict:
+    """Prompt fields: the transaction amount and the customer's running amount aggregates."""
+    txn = state.get("txn") or state.get("transaction") or {}
+    features = features_from_state(state)
+
+    items = select(txn, ("amount", "merchant"))
+    items["hist_count"] = features.count
+    if features.count:
+        items.update(hist_mean=features.mean, hist_max=features.max, hist_min=features.min)
+    return items
+
+
+def build_behavioral_prompt(state: dict) -> list:
+    """Build the behavioral prompt messages (no LLM call)."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=fields(behavioral_fields(state)))]
+
+
+def _behavioral_partial(response: BehaviouralSchema, timings: dict = None) -> dict:
+    partial = {
+        "behavioral_risk": response.behavioral_risk,
+        "behavioral_label": response.behavioral_label,
+        "behavioral_reason": response.behavioral_reason,
+        "nodes": [
+            {
+                "id": "behavioral_agent",
+                "name": "Behavioral Agent",
+                "risk": response.behavioral_risk,
+                "label": response.behavioral_label,
+                "reason": response.behavioral_reason,
+            }
+        ],
+    }
+    if timings is not None:
+        partial["nodes"][0]["timings_ms"] = timings
+    return partial
 
 
 def behavioral_agent(state: dict) -> dict:
@@ -38,7 +88,7 @@ def behavioral_agent(state: dict) -> dict:
         "transaction_history": list
     }
 
-    Returns ONLY:
+    Returns ONLY (state is read, never mutated):
     {
         "behavioral_risk": float,
         "behavioral_label": str,
@@ -46,62 +96,26 @@ def behavioral_agent(state: dict) -> dict:
         "nodes": list
     }
     """
+    timings = node_timings(state)
+    with stage("behavioral_agent.prompt", timings):
+        prompt = build_behavioral_prompt(state)
+    with stage("behavioral_agent.llm", timings):
+        response = gateway.invoke(structured_model(), prompt, CACHE_NAMESPACE, BehaviouralSchema)
+    return _behavioral_partial(response, timings)
 
-    state.setdefault("nodes", [])
-    txn = state.get("txn") or state.get("transaction") or {}
-    history_source = (
-        state.get("customer_txns")
-        if state.get("customer_txns") is not None
-        else state.get("transaction_history", [])
-    )
-
-    if isinstance(history_source, pd.DataFrame):
-        history_df = history_source.copy()
-    else:
-        history_df = pd.DataFrame(history_source)
-
-    if "amount" not in history_df.columns:
-        history_df["amount"] = pd.Series(dtype=float)
-
-    if history_df.empty:
-        history_summary = "No previous transaction history available."
-    else:
-        history_summary = f"""
-        Total Transactions: {len(history_df)}
-        Average Amount: {history_df['amount'].mean():.2f}
-        Maximum Amount: {history_df['amount'].max():.2f}
-        Minimum Amount: {history_df['amount'].min():.2f}
-        """
-
-    prompt = f"""
-    You are a senior financial fraud analyst.
-
-    Current Transaction:
-    {txn}
 
-    Customer Behavioral History Summary:
-    {history_summary}
-
-    Determine whether this transaction is behaviorally suspicious.
-
-    Provide:
-    - Risk score between 0 and 1
-    - Behavioral label (Low, Medium, High)
-    - Short explanation
+async def abehavioral_agent(state: dict) -> dict:
     """
-
-    response = structured_model.invoke(prompt)
-
-    state["behavioral_risk"] = response.behavioral_risk
-    state["behavioral_label"] = response.behavioral_label
-    state["behavioral_reason"] = response.behavioral_reason
-    state["nodes"].append(
-        {
-            "id": "behavioral_agent",
-            "name": "Behavioral Agent",
-            "risk": response.behavioral_risk,
-            "label": response.behavioral_label,
-            "reason": response.behavioral_reason,
-        }
-    )
-    return state
+    Async variant of behavioral_agent: the LLM call is awaited, and the
+    history summary is only built in a worker thread when it has to be
+    aggregated from a raw history frame.
+    """
+    timings = node_timings(state)
+    with stage("behavioral_agent.prompt", timings):
+        if state.get("features") is not None:
+            prompt = build_behavioral_prompt(state)
+        else:
+            prompt = await asyncio.to_thread(build_behavioral_prompt, state)
+    with stage("behavioral_agent.llm", timings):
+        response = await gateway.ainvoke(structured_model(), prompt, CACHE_NAMESPACE, BehaviouralSchema)
+    return _behavioral_partial(response, timings)
@@ -1,112 +1,518 @@
-from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage
-import json
-import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Literal
+import asyncio
+import contextvars
+import os
+
+from pydantic import BaseModel, Field
+
+from llm import registry, scheduler
+from llm.gateway import gateway
+from llm.scheduler import EARLY_BLOCK_RISK, LLMRequest, deadline_after, priority_class, scheduler_stats
+from llm.prompts import fields, system_prompt, value
+from metrics import stage
 
 # Orchestrated agents
-from agents.behavioral_agent import behavioral_agent
-from agents.temporal_agent import temporal_agent
-from agents.geo_agent import geo_agent
-from agents.device_agent import device_agent
-
-# Initialize LLM
-llm = ChatOllama(
-    model="mistral",  # or your preferred LLM
-    temperature=0
+from agents.behavioral_agent import behavioral_agent, abehavioral_agent, behavioral_fields
+from agents.temporal_agent import temporal_agent, atemporal_agent, temporal_fields
+from agents.geo_agent import geo_agent, ageo_agent, geo_fields
+from agents.device_agent import device_agent, adevice_agent
+from agents.fast_path import FAST_PATH_ENABLED, deterministic_signals, fast_path_decision, fast_path_stats
+
+# Decision LLM (or your preferred model); the client is built on first use
+MODEL = "mistral"
+CACHE_NAMESPACE = f"decision_agent/{MODEL}"
+
+
+class DecisionSchema(BaseModel):
+    # Enums constrain decoding (Ollama JSON-schema output), so the reply
+    # always parses and never needs extracting from free text
+    decision: Literal["LOW_RISK", "MID_RISK", "HIGH_RISK"]
+    action: Literal["ALLOW", "REVIEW", "BLOCK"]
+    reasoning: str
+
+
+def structured_model():
+    return registry.structured_model(MODEL, DecisionSchema, temperature=0)
+
+
+# Signal prefixes on the state, in prompt order
+SIGNAL_AGENTS = ("behavioral", "temporal", "geo", "device")
+
+# Upstream agents, in the order their partial results are merged
+UPSTREAM_AGENTS = (behavioral_agent, temporal_agent, geo_agent, device_agent)
+ASYNC_UPSTREAM_AGENTS = (abehavioral_agent, atemporal_agent, ageo_agent, adevice_agent)
+
+# Shared fan-out pool; sized for several in-flight transactions at once
+_agent_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FINSHIELD_AGENT_WORKERS", "16")),
+    thread_name_prefix="finshield-agent",
 )
 
 
-def decision_agent_llm(state: dict) -> dict:
+def merge_partial(state: dict, partial: dict) -> dict:
     """
-    LLM Decision Agent (Orchestrator)
-    ------------------
-    Orchestrates upstream agents, then returns final decision + action.
+    Fan-in: fold one agent's partial result into state.
+    Scalar keys are assigned, nodes are appended.
+    """
+    for key, item in partial.items():
+        if key == "nodes":
+            state["nodes"].extend(item)
+        else:
+            state[key] = item
+    return state
+
+
+def _merge_with_fallbacks(state: dict, results: list, signals: list = None) -> dict:
+    """
+    Merge agent results in UPSTREAM_AGENTS order. An agent whose LLM call
+    failed or timed out contributes its deterministic signal instead (same
+    order as deterministic_signals), so one slow agent never fails the
+    transaction.
+    """
+    for position, result in enumerate(results):
+        if isinstance(result, BaseException):
+            if signals is None:
+                signals = deterministic_signals(state)
+            name = signals[position]["nodes"][0]["name"]
+            if isinstance(result, (asyncio.CancelledError, _Skipped)):
+                message = f"⏭️ {name} LLM call dropped after early BLOCK, deterministic signal used"
+            else:
+                message = f"⚠️ {name} LLM failed, deterministic signal used: {result!r}"
+            state.setdefault("trace", []).append(message)
+            result = signals[position]
+        merge_partial(state, result)
+    return state
+
+
+class _Skipped(Exception):
+    """Result of an agent call abandoned after an early BLOCK."""
+
+
+def _blocks(partial) -> bool:
+    # An agent result that makes BLOCK certain (FINSHIELD_EARLY_BLOCK_RISK)
+    return bool(EARLY_BLOCK_RISK) and isinstance(partial, dict) and partial["nodes"][0]["risk"] >= EARLY_BLOCK_RISK
+
+
+def run_upstream_agents(state: dict, signals: list = None) -> dict:
+    """
+    Fan-out: run all upstream agents concurrently against a read-only state,
+    then merge their partials in UPSTREAM_AGENTS order so the resulting
+    state and nodes list are deterministic regardless of completion order.
+    `signals` (deterministic_signals, if already computed) back failed agents.
+    Once one agent's result makes BLOCK certain, the others are no longer
+    waited for and get their signals. Only agents that have not started
+    yet are cancelled: a thread already in its LLM call runs to completion
+    (holding its gateway slot) and its result is discarded. Withdrawing
+    in-flight calls, like priority queueing, is async-path only
+    (arun_upstream_agents).
+    """
+    # Each agent runs in a copy of this context: the scheduler request
+    # (priority, deadline) follows its gateway calls into the pool
+    futures = [_agent_pool.submit(contextvars.copy_context().run, agent, state) for agent in UPSTREAM_AGENTS]
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        if pending and any(future.exception() is None and _blocks(future.result()) for future in done):
+            for future in pending:
+                future.cancel()
+            scheduler_stats.record("cancelled_calls", len(pending))
+            break
+
+    results = []
+    for future in futures:
+        if future in pending:
+            results.append(_Skipped())
+            continue
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return _merge_with_fallbacks(state, results, signals)
+
+
+async def arun_upstream_agents(state: dict, signals: list = None) -> dict:
+    """
+    Async fan-out/fan-in: same contract as run_upstream_agents, with agent
+    tasks instead of a thread pool. After an early BLOCK the remaining
+    agent tasks are cancelled, which also withdraws their queued LLM calls.
+    """
+    tasks = [asyncio.ensure_future(agent(state)) for agent in ASYNC_UPSTREAM_AGENTS]
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if pending and any(not task.cancelled() and task.exception() is None and _blocks(task.result()) for task in done):
+                for task in pending:
+                    task.cancel()
+                scheduler_stats.record("cancelled_calls", len(pending))
+                await asyncio.wait(pending)
+                break
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    results = [
+        asyncio.CancelledError() if task.cancelled() else (task.exception() or task.result())
+        for task in tasks
+    ]
+    return _merge_with_fallbacks(state, results, signals)
+
+
+def bind_llm_request(state: dict, signals: list = None):
     """
+    Make the transaction's scheduler request current for its LLM calls:
+    priority class from the amount and the deterministic pre-score (mean
+    signal risk), deadline from the state (set when scoring started) or
+    FINSHIELD_LLM_DEADLINE_MS from now. Returns the token for unbind().
+    """
+    txn = state.get("txn") or state.get("transaction") or {}
+    score = None
+    if signals:
+        score = sum(partial["nodes"][0]["risk"] for partial in signals) / len(signals)
+    deadline = state["deadline"] if "deadline" in state else deadline_after()
+    return scheduler.bind(LLMRequest(priority_class(txn.get("amount"), score), deadline))
+
+
+def early_block_decision(state: dict):
+    """
+    BLOCK without the decision call when a merged agent result is at or
+    above FINSHIELD_EARLY_BLOCK_RISK, else None.
+    """
+    if not EARLY_BLOCK_RISK:
+        return None
+    for node in state["nodes"]:
+        if node.get("risk") is not None and node["risk"] >= EARLY_BLOCK_RISK:
+            scheduler_stats.record("early_blocks")
+            return {
+                "decision": "HIGH_RISK",
+                "action": "BLOCK",
+                "reasoning": f"Early exit: {node['name']} risk {node['risk']:.2f}, decision call skipped.",
+            }
+    return None
+
+
+def llm_failure_fallback(state: dict, error: Exception, message: str = "LLM failed, fallback used") -> dict:
+    """fallback_decision for a failed decision call; counts deadline expiries."""
+    remaining = scheduler.current().remaining()
+    if isinstance(error, TimeoutError) and remaining is not None and remaining <= 0:
+        scheduler_stats.record("deadline_fallbacks")
+        message = "LLM deadline passed, fallback used"
+    state["trace"].append(f"⚠️ {message}: {str(error)}")
+    state["fallback"] = True
+    return fallback_decision(state)
+
 
+SYSTEM_PROMPT = system_prompt(
+    "Task: final fraud decision from the specialist agents' signals (one line "
+    "per agent: risk 0-1, label, reason). Fields: decision (LOW_RISK|MID_RISK|"
+    "HIGH_RISK), action (ALLOW|REVIEW|BLOCK), reasoning (one sentence)."
+)
+
+
+def build_decision_messages(state: dict) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    lines = [
+        f"{agent}: risk={value(state.get(f'{agent}_risk', 0.5))} label={state.get(f'{agent}_label', '-')} "
+        f"reason={state.get(f'{agent}_reason', '-')}"
+        for agent in SIGNAL_AGENTS
+    ]
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content="\n".join(lines))]
+
+
+def fallback_decision(state: dict) -> dict:
+    # Minimal fallback if LLM fails (no hard-coded weighting)
+    labels = [
+        state.get("behavioral_label"),
+        state.get("temporal_label"),
+        state.get("geo_label"),
+        state.get("device_label"),
+    ]
+    if "High" in labels:
+        return {"decision": "HIGH_RISK", "action": "BLOCK", "reasoning": "Fallback: at least one agent flagged High risk."}
+    elif "Medium" in labels:
+        return {"decision": "MID_RISK", "action": "REVIEW", "reasoning": "Fallback: at least one agent flagged Medium risk."}
+    else:
+        return {"decision": "LOW_RISK", "action": "ALLOW", "reasoning": "Fallback: no agent flagged elevated risk."}
+
+
+def _start_decision(state: dict) -> dict:
     # Ensure trace exists
     state.setdefault("trace", [])
     state["trace"].append("🤖 LLM Decision Agent started")
     state.setdefault("nodes", [])
+    return state
 
-    # Orchestrate the other agents first
-    state = behavioral_agent(state)
-    state = temporal_agent(state)
-    state = geo_agent(state)
-    state = device_agent(state)
-
-    messages = [
-        SystemMessage(
-            content="""
-You are a banking fraud decision engine.
-
-You will be given fraud signals from specialized agents (behavioral, temporal, geo, device).
-Use them to decide overall risk and action.
-
-Return ONLY valid JSON (no markdown, no extra text).
-
-Schema:
-{
-  "decision": "LOW_RISK" | "MID_RISK" | "HIGH_RISK",
-  "action": "ALLOW" | "REVIEW" | "BLOCK",
-  "reasoning": "short explanation"
-}
-""".strip()
-        ),
-        HumanMessage(
-            content=f"""
-Signals:
-- Behavioral: risk={state.get("behavioral_risk", 0.5)}, label={state.get("behavioral_label", "N/A")}, reason={state.get("behavioral_reason", "N/A")}
-- Temporal: risk={state.get("temporal_risk", 0.5)}, label={state.get("temporal_label", "N/A")}, reason={state.get("temporal_reason", "N/A")}
-- Geo: risk={state.get("geo_risk", 0.5)}, label={state.get("geo_label", "N/A")}, reason={state.get("geo_reason", "N/A")}
-- Device: risk={state.get("device_risk", 0.5)}, label={state.get("device_label", "N/A")}, reason={state.get("device_reason", "N/A")}
-
-Provide the final decision and action.
-""".strip()
-        ),
-    ]
 
-    # Invoke LLM
-    try:
-        response = llm.invoke(messages)
-        raw_text = response.content
-
-        # Extract JSON safely even if LLM adds extra text
-        json_match = re.search(r"\{.*\}", raw_text, re.S)
-        if not json_match:
-            raise ValueError(f"LLM did not return JSON: {raw_text}")
-
-        result = json.loads(json_match.group())
-
-    except Exception as e:
-        # Minimal fallback if LLM fails (no hard-coded weighting)
-        labels = [
-            state.get("behavioral_label"),
-            state.get("temporal_label"),
-            state.get("geo_label"),
-            state.get("device_label"),
-        ]
-        if "High" in labels:
-            result = {"decision": "HIGH_RISK", "action": "BLOCK", "reasoning": "Fallback: at least one agent flagged High risk."}
-        elif "Medium" in labels:
-            result = {"decision": "MID_RISK", "action": "REVIEW", "reasoning": "Fallback: at least one agent flagged Medium risk."}
-        else:
-            result = {"decision": "LOW_RISK", "action": "ALLOW", "reasoning": "Fallback: no agent flagged elevated risk."}
-        state["trace"].append(f"⚠️ LLM failed, fallback used: {str(e)}")
+def _try_fast_path(state: dict, signals: list):
+    """
+    Tiered mode: decide confidently-low / confidently-high transactions from
+    the deterministic signals and skip the LLM agents. Returns the finished
+    state, or None when the transaction must be escalated.
+    """
+    result = fast_path_decision(signals)
+    fast_path_stats.record(result)
+    if result is None:
+        return None
 
+    for partial in signals:
+        merge_partial(state, partial)
+    state["trace"].append("⚡ Fast path decision, LLM agents skipped")
+    return _record_decision(state, result)
+
+
+def _record_decision(state: dict, result: dict) -> dict:
     # Update trace for observability
     state["trace"].append(f"Decision={result['decision']}, Action={result['action']}")
 
     state["decision"] = result["decision"]
     state["action"] = result["action"]
     state["llm_reasoning"] = result["reasoning"]
-    state["nodes"].append(
-        {
-            "id": "llm_agent",
-            "name": "LLM Decision Agent",
-            "decision": result["decision"],
-            "action": result["action"],
-            "reasoning": result["reasoning"],
-        }
-    )
-
-    return state
\ No newline at end of file
+    node = {
+        "id": "llm_agent",
+        "name": "LLM Decision Agent",
+        "decision": result["decision"],
+        "action": result["action"],
+        "reasoning": result["reasoning"],
+    }
+    if state.get("timings") is not None:
+        # Pipeline-level stages; the caller adds "total" when it finishes
+        node["timings_ms"] = state["timings"]
+    state["nodes"].append(node)
+
+    return state
+
+
+def decision_agent_llm(state: dict) -> dict:
+    """
+    LLM Decision Agent (Orchestrator)
+    ------------------
+    Orchestrates upstream agents, then returns final decision + action.
+    """
+    state = _start_decision(state)
+
+    timings = state.get("timings")
+    signals = None
+    if FAST_PATH_ENABLED:
+        with stage("decision_agent.fast_path", timings):
+            signals = deterministic_signals(state)
+        decided = _try_fast_path(state, signals)
+        if decided is not None:
+            return decided
+
+    token = bind_llm_request(state, signals)
+    try:
+        # Orchestrate the other agents first (concurrently, merged in fixed order)
+        with stage("decision_agent.upstream", timings):
+            state = run_upstream_agents(state, signals)
+
+        result = early_block_decision(state)
+        if result is None:
+            # Invoke LLM
+            try:
+                with stage("decision_agent.prompt", timings):
+                    messages = build_decision_messages(state)
+                with stage("decision_agent.llm", timings):
+                    response = gateway.invoke(structured_model(), messages, CACHE_NAMESPACE, DecisionSchema)
+                with stage("decision_agent.parse", timings):
+                    result = response.model_dump()
+            except Exception as e:
+                result = llm_failure_fallback(state, e)
+    finally:
+        scheduler.unbind(token)
+
+    return _record_decision(state, result)
+
+
+async def adecision_agent_llm(state: dict) -> dict:
+    """
+    Async LLM Decision Agent (Orchestrator)
+    ------------------
+    Same flow as decision_agent_llm, but upstream agents and the final
+    decision call are awaited so the event loop is never blocked.
+    """
+    state = _start_decision(state)
+
+    timings = state.get("timings")
+    signals = None
+    if FAST_PATH_ENABLED:
+        with stage("decision_agent.fast_path", timings):
+            signals = await asyncio.to_thread(deterministic_signals, state)
+        decided = _try_fast_path(state, signals)
+        if decided is not None:
+            return decided
+
+    token = bind_llm_request(state, signals)
+    try:
+        with stage("decision_agent.upstream", timings):
+            state = await arun_upstream_agents(state, signals)
+
+        result = early_block_decision(state)
+        if result is None:
+            try:
+                with stage("decision_agent.prompt", timings):
+                    messages = build_decision_messages(state)
+                with stage("decision_agent.llm", timings):
+                    response = await gateway.ainvoke(structured_model(), messages, CACHE_NAMESPACE, DecisionSchema)
+                with stage("decision_agent.parse", timings):
+                    result = response.model_dump()
+            except Exception as e:
+                result = llm_failure_fallback(state, e)
+    finally:
+        scheduler.unbind(token)
+
+    return _record_decision(state, result)
+
+
+# ---------- Fused mode: one LLM call per transaction ----------
+
+FUSED_CACHE_NAMESPACE = f"fused_agent/{MODEL}"
+
+Risk = Field(ge=0, le=1)
+Label = Literal["Low", "Medium", "High"]
+
+
+class FusedSchema(BaseModel):
+    """Every LLM agent's assessment plus the decision, in one reply."""
+
+    behavioral_risk: float = Risk
+    behavioral_label: Label
+    behavioral_reason: str
+    temporal_risk: float = Risk
+    temporal_label: Label
+    temporal_reason: str
+    geo_risk: float = Risk
+    geo_label: Label
+    geo_reason: str
+    decision: Literal["LOW_RISK", "MID_RISK", "HIGH_RISK"]
+    action: Literal["ALLOW", "REVIEW", "BLOCK"]
+    reasoning: str
+
+
+def fused_model():
+    return registry.structured_model(MODEL, FusedSchema, temperature=0)
+
+
+# (state prefix, node name, prompt fields) of the agents the fused call replaces
+FUSED_AGENTS = (
+    ("behavioral", "Behavioral Agent", behavioral_fields),
+    ("temporal", "Temporal Agent", temporal_fields),
+    ("geo", "Geo Agent", geo_fields),
+)
+
+FUSED_SYSTEM_PROMPT = system_prompt(
+    "Task: assess one transaction as three specialists, then decide. [behavioral]: "
+    "is the amount unusual vs hist_*? [temporal]: is the time unusual vs "
+    "typical_hours, or part of a burst (txn_*)? [geo]: interpret the geo tool "
+    "score. [device] is already scored. Fields: <agent>_risk (0-1), <agent>_label "
+    "(Low|Medium|High), <agent>_reason (one sentence) for behavioral, temporal, "
+    "geo; then decision (LOW_RISK|MID_RISK|HIGH_RISK), action (ALLOW|REVIEW|BLOCK), "
+    "reasoning (one sentence)."
+)
+
+
+def build_fused_messages(state: dict, device: dict) -> list:
+    """
+    One prompt with every agent's fields, as [agent] sections, plus the
+    deterministic device result (no LLM call).
+    """
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    sections = [f"[{prefix}]\n{fields(build(state))}" for prefix, _, build in FUSED_AGENTS]
+    sections.append(f"[device]\nrisk={value(device['device_risk'])} reason={device['device_reason']}")
+    return [SystemMessage(content=FUSED_SYSTEM_PROMPT), HumanMessage(content="\n".join(sections))]
+
+
+def _fused_partials(response: FusedSchema) -> list:
+    # Same partials (and node shape) as the individual agents return
+    partials = []
+    for prefix, name, _ in FUSED_AGENTS:
+        risk, label, reason = (getattr(response, f"{prefix}_{field}") for field in ("risk", "label", "reason"))
+        partials.append({
+            f"{prefix}_risk": risk,
+            f"{prefix}_label": label,
+            f"{prefix}_reason": reason,
+            "nodes": [{"id": f"{prefix}_agent", "name": name, "risk": risk, "label": label, "reason": reason}],
+        })
+    return partials
+
+
+def _finish_fused(state: dict, device: dict, response, error, signals) -> dict:
+    # Called with the transaction's scheduler request still bound
+    if error is None:
+        for partial in _fused_partials(response):
+            merge_partial(state, partial)
+        merge_partial(state, device)
+        result = {"decision": response.decision, "action": response.action, "reasoning": response.reasoning}
+    else:
+        # Same degradation as the multi-call pipeline: deterministic
+        # signals for the agents, label-based fallback for the decision
+        for partial in signals if signals is not None else deterministic_signals(state):
+            merge_partial(state, partial)
+        result = llm_failure_fallback(state, error, "Fused LLM call failed, deterministic signals and fallback used")
+    return _record_decision(state, result)
+
+
+def fused_decision_agent(state: dict) -> dict:
+    """
+    Fused orchestrator: same fast path, response state and nodes as
+    decision_agent_llm, but one structured LLM call returns the
+    behavioral, temporal and geo assessments and the decision together.
+    """
+    state = _start_decision(state)
+
+    timings = state.get("timings")
+    signals = None
+    if FAST_PATH_ENABLED:
+        with stage("decision_agent.fast_path", timings):
+            signals = deterministic_signals(state)
+        decided = _try_fast_path(state, signals)
+        if decided is not None:
+            return decided
+
+    device = device_agent(state)
+    response = error = None
+    token = bind_llm_request(state, signals)
+    try:
+        try:
+            with stage("fused_agent.prompt", timings):
+                messages = build_fused_messages(state, device)
+            with stage("fused_agent.llm", timings):
+                response = gateway.invoke(fused_model(), messages, FUSED_CACHE_NAMESPACE, FusedSchema)
+        except Exception as e:
+            error = e
+        return _finish_fused(state, device, response, error, signals)
+    finally:
+        scheduler.unbind(token)
+
+
+async def afused_decision_agent(state: dict) -> dict:
+    """Async fused orchestrator: fused_decision_agent with the LLM call awaited."""
+    state = _start_decision(state)
+
+    timings = state.get("timings")
+    signals = None
+    if FAST_PATH_ENABLED:
+        with stage("decision_agent.fast_path", timings):
+            signals = await asyncio.to_thread(deterministic_signals, state)
+        decided = _try_fast_path(state, signals)
+        if decided is not None:
+            return decided
+
+    # Precomputed device_tool makes the device agent a lookup
+    device = device_agent(state) if "device_tool" in state else await adevice_agent(state)
+    response = error = None
+    token = bind_llm_request(state, signals)
+    try:
+        try:
+            with stage("fused_agent.prompt", timings):
+                messages = build_fused_messages(state, device)
+            with stage("fused_agent.llm", timings):
+                response = await gateway.ainvoke(fused_model(), messages, FUSED_CACHE_NAMESPACE, FusedSchema)
+        except Exception as e:
+            error = e
+        return _finish_fused(state, device, response, error, signals)
+    finally:
+        scheduler.unbind(token)
@@ -1,30 +1,48 @@
+import asyncio
 
+from agents.fast_path import risk_label
+from metrics import node_timings, stage
 from tools.device_tool import device_risk_score
 
 def device_agent(state):
-    state.setdefault("nodes", [])
-
+    """
+    Parallel-safe deterministic Device Agent.
+    Reads state and returns only its partial result (risk, label, reason, nodes).
+    """
     txn = state["txn"]  # use the unified key
-    customer_txns = state.get("customer_txns")
-    risk, reason = device_risk_score(txn, customer_txns) if customer_txns is not None else (0.4, "No device history available")
-
-    if risk < 0.33:
-        label = "Low"
-    elif risk < 0.66:
-        label = "Medium"
+    # Shared read-only context when fraud_graph built the state
+    customer_txns = state.get("context")
+    if customer_txns is None:
+        customer_txns = state.get("customer_txns")
+    timings = node_timings(state)
+    if "device_tool" in state:
+        # Precomputed in bulk (batch scoring)
+        risk, reason = state["device_tool"]
     else:
-        label = "High"
+        with stage("device_agent.tool", timings):
+            risk, reason = device_risk_score(txn, customer_txns) if customer_txns is not None else (0.4, "No device history available")
+
+    label = risk_label(risk)
 
-    state["device_risk"] = risk
-    state["device_label"] = label
-    state["device_reason"] = reason
+    partial = {
+        "device_risk": risk,
+        "device_label": label,
+        "device_reason": reason,
+        "nodes": [{
+            "id": "device_agent",
+            "name": "Device Agent",
+            "risk": risk,
+            "label": label,
+            "reason": reason
+        }]
+    }
+    if timings is not None:
+        partial["nodes"][0]["timings_ms"] = timings
+    return partial
 
-    state["nodes"].append({
-        "id": "device_agent",
-        "name": "Device Agent",
-        "risk": risk,
-        "label": label,
-        "reason": reason
-    })
 
-    return state
+async def adevice_agent(state):
+    """
+    Async variant of device_agent: the pandas device lookup runs in a worker thread.
+    """
+    return await asyncio.to_thread(device_agent, state)
@@ -0,0 +1,168 @@
+import os
+import threading
+
+import pandas as pd
+
+from feature_store import features_from_state
+from metrics import stage
+from tools.device_tool import device_risk_score
+from tools.geo_tool import geo_risk_score
+
+
+# Fast path: decide clear-cut transactions from deterministic signals only.
+# Confidently low  -> every signal risk <= FINSHIELD_FAST_PATH_LOW
+# Confidently high -> mean signal risk >= FINSHIELD_FAST_PATH_HIGH
+# Everything in between is escalated to the LLM agents. Opt-in
+# (FINSHIELD_FAST_PATH=1); off, every transaction gets the LLM decision.
+FAST_PATH_ENABLED = os.getenv("FINSHIELD_FAST_PATH", "0") not in ("", "0")
+FAST_PATH_LOW = float(os.getenv("FINSHIELD_FAST_PATH_LOW", "0.1"))
+FAST_PATH_HIGH = float(os.getenv("FINSHIELD_FAST_PATH_HIGH", "0.75"))
+
+
+def risk_label(risk: float) -> str:
+    if risk < 0.33:
+        return "Low"
+    elif risk < 0.66:
+        return "Medium"
+    else:
+        return "High"
+
+
+def _partial(agent_id: str, name: str, prefix: str, risk: float, reason: str) -> dict:
+    label = risk_label(risk)
+    return {
+        f"{prefix}_risk": risk,
+        f"{prefix}_label": label,
+        f"{prefix}_reason": reason,
+        "nodes": [{"id": agent_id, "name": name, "risk": risk, "label": label, "reason": reason}],
+    }
+
+
+def _history(state: dict):
+    # Shared CustomerContext when fraud_graph built the state
+    if state.get("context") is not None:
+        return state["context"]
+    history = state.get("customer_txns")
+    if isinstance(history, pd.DataFrame):
+        return history
+    return pd.DataFrame(state.get("transaction_history", []))
+
+
+def amount_signal(txn: dict, features):
+    amount = txn.get("amount")
+    if amount is None or not features.count:
+        return 0.5, "No previous transaction history available."
+
+    low, high = features.min, features.max
+    if low <= amount <= high:
+        return 0.1, f"Amount {amount:.2f} within historical range {low:.2f}-{high:.2f}."
+    if amount < low or amount <= 1.5 * high:
+        return 0.4, f"Amount {amount:.2f} slightly outside historical range {low:.2f}-{high:.2f}."
+    if amount <= 3 * high:
+        return 0.7, f"Amount {amount:.2f} well above historical maximum {high:.2f}."
+    return 0.9, f"Amount {amount:.2f} far above historical maximum {high:.2f}."
+
+
+def hour_signal(txn: dict, features):
+    timestamp = txn.get("timestamp")
+    if not timestamp or not features.hour_total:
+        return 0.5, "No historical timestamp data available."
+
+    try:
+        hour = pd.Timestamp(timestamp).hour
+    except (TypeError, ValueError):
+        # Neutral, as for a missing timestamp: never a fast-path ALLOW
+        return 0.5, "Transaction timestamp could not be parsed."
+    # Circular distance (in hours) to the closest hour the customer was active
+    gap = min(min(abs(hour - h), 24 - abs(hour - h)) for h in features.active_hours)
+    if gap <= 1:
+        return 0.1, f"Hour {hour} matches the customer's typical active hours."
+    if gap <= 3:
+        return 0.4, f"Hour {hour} is {gap}h from the customer's typical active hours."
+    return 0.7, f"Hour {hour} is {gap}h from any hour the customer was active."
+
+
+def temporal_signal(txn: dict, features, velocity=None):
+    """The hour-of-day signal, raised by a transaction burst when there is one."""
+    signal = hour_signal(txn, features)
+    burst = velocity.burst_risk() if velocity is not None else None
+    if burst is not None and burst[0] > signal[0]:
+        return burst
+    return signal
+
+
+def deterministic_signals(state: dict) -> list:
+    """
+    Cheap per-agent signals from the tools and running features, as agent-style
+    partials in UPSTREAM_AGENTS order (behavioral, temporal, geo, device).
+    Reuses device_tool / geo_tool when the deterministic stage already ran.
+    """
+    txn = state.get("txn") or state.get("transaction") or {}
+    features = features_from_state(state)
+
+    geo = state.get("geo_tool") or geo_risk_score(txn, _history(state))
+    device = state.get("device_tool")
+    if not device:
+        history = _history(state)
+        with stage("device_tool"):
+            device = device_risk_score(txn, history) if not history.empty else (0.4, "No device history available")
+
+    return [
+        _partial("behavioral_agent", "Behavioral Agent", "behavioral", *amount_signal(txn, features)),
+        _partial("temporal_agent", "Temporal Agent", "temporal", *temporal_signal(txn, features, state.get("velocity"))),
+        _partial("geo_agent", "Geo Agent", "geo", *geo),
+        _partial("device_agent", "Device Agent", "device", *device),
+    ]
+
+
+def fast_path_decision(signals: list, low: float = None, high: float = None):
+    """
+    Decision for clear-cut cases, or None when the LLM agents must decide.
+    """
+    low = FAST_PATH_LOW if low is None else low
+    high = FAST_PATH_HIGH if high is None else high
+
+    risks = [partial["nodes"][0]["risk"] for partial in signals]
+    score = sum(risks) / len(risks)
+
+    if max(risks) <= low:
+        return {
+            "decision": "LOW_RISK",
+            "action": "ALLOW",
+            "reasoning": f"Fast path: all deterministic signals within normal ranges (max risk {max(risks):.2f}).",
+        }
+    if score >= high:
+        return {
+            "decision": "HIGH_RISK",
+            "action": "BLOCK",
+            "reasoning": f"Fast path: deterministic signals jointly high (mean risk {score:.2f}).",
+        }
+    return None
+
+
+class FastPathStats:
+    """Counts how much traffic the fast path decides without the LLM."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"evaluated": 0, "allowed": 0, "blocked": 0, "escalated": 0}
+
+    def record(self, result):
+        with self._lock:
+            self._counts["evaluated"] += 1
+            if result is None:
+                self._counts["escalated"] += 1
+            elif result["action"] == "ALLOW":
+                self._counts["allowed"] += 1
+            else:
+                self._counts["blocked"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self._counts)
+        decided = stats["allowed"] + stats["blocked"]
+        stats["short_circuit_fraction"] = decided / stats["evaluated"] if stats["evaluated"] else 0.0
+        return stats
+
+
+fast_path_stats = FastPathStats()
@@ -1,16 +1,17 @@
-from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage
+import asyncio
+
+import pandas as pd
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
+
+from llm import registry
+from llm.gateway import gateway
+from llm.prompts import fields, select, system_prompt
+from metrics import node_timings, stage
 from tools.geo_tool import geo_risk_score
-import pandas as pd
 
-load_dotenv()
 
-model = ChatOllama(
-    model="mistral:latest",  # or "gemma3:1b" if preferred
-    temperature=0
-)
+# Ollama model (mistral:latest or gemma3:1b); the client is built on first use
+MODEL = "mistral:latest"
 
 
 class GeoSchema(BaseModel):
@@ -18,69 +19,95 @@ class GeoSchema(BaseModel):
     geo_label: str
     geo_reason: str
 
-structured_model = model.with_structured_output(GeoSchema)
+CACHE_NAMESPACE = f"geo_agent/{MODEL}"
 
 
-def geo_agent(state: dict) -> dict:
-    """
-    LLM-Orchestrated Geo Agent with Tool Roundtrip
-    """
+def structured_model():
+    return registry.structured_model(MODEL, GeoSchema, temperature=0)
+
+
+SYSTEM_PROMPT = system_prompt(
+    "Task: interpret the geo tool's distance-based anomaly score (tool_risk, "
+    "tool_reason) as a geo fraud assessment. Fields: geo_risk (0-1), geo_label "
+    "(Low|Medium|High), geo_reason (one sentence)."
+)
 
-    state.setdefault("nodes", [])
+
+def geo_fields(state: dict) -> dict:
+    """Prompt fields: the location and the geo tool's score (computed from history if not precomputed)."""
     txn = state.get("txn") or state.get("transaction") or {}
-    history_source = (
-        state.get("customer_txns")
-        if state.get("customer_txns") is not None
-        else state.get("transaction_history", [])
-    )
-
-    if isinstance(history_source, pd.DataFrame):
-        history_df = history_source.copy()
+    if "geo_tool" in state:
+        # Precomputed by the deterministic stage
+        tool_risk, tool_reason = state["geo_tool"]
+    elif state.get("context") is not None:
+        # Shared read-only context: coordinate columns, no frame copy
+        tool_risk, tool_reason = geo_risk_score(txn, state["context"])
     else:
-        history_df = pd.DataFrame(history_source)
-
-    tool_risk, tool_reason = geo_risk_score(txn, history_df)
-
-    messages = [
-        SystemMessage(
-            content="""
-You are a senior fraud analyst.
-
-You have received a geographical anomaly score from a geo-analysis tool.
-Interpret it and produce final geo fraud assessment.
-
-Return:
-- geo_risk (0 to 1)
-- geo_label (Low | Medium | High)
-- geo_reason (short explanation)
-"""
-        ),
-        HumanMessage(
-            content=f"""
-Transaction:
-{txn}
-
-Tool Output:
-Risk Score: {tool_risk}
-Reason: {tool_reason}
-
-Provide final geo fraud assessment.
-"""
+        history_source = (
+            state.get("customer_txns")
+            if state.get("customer_txns") is not None
+            else state.get("transaction_history", [])
         )
-    ]
-
-    response = structured_model.invoke(messages)
-
-    state["geo_risk"] = response.geo_risk
-    state["geo_label"] = response.geo_label
-    state["geo_reason"] = response.geo_reason
-    state["nodes"].append(
-        {
-            "id": "geo_agent",
-            "name": "Geo Agent",
-            "risk": response.geo_risk,
-            "label": response.geo_label,
-            "reason": response.geo_reason,
-        }
-    )
-    return state
+        history_df = history_source if isinstance(history_source, pd.DataFrame) else pd.DataFrame(history_source)
+        tool_risk, tool_reason = geo_risk_score(txn, history_df)
+
+    items = select(txn, ("location",))
+    items.update(tool_risk=float(tool_risk), tool_reason=tool_reason)
+    return items
+
+
+def build_geo_messages(state: dict) -> list:
+    """Build the geo prompt messages from the transaction and customer history (no LLM call)."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=fields(geo_fields(state)))]
+
+
+def _geo_partial(response: GeoSchema, timings: dict = None) -> dict:
+    partial = {
+        "geo_risk": response.geo_risk,
+        "geo_label": response.geo_label,
+        "geo_reason": response.geo_reason,
+        "nodes": [
+            {
+                "id": "geo_agent",
+                "name": "Geo Agent",
+                "risk": response.geo_risk,
+                "label": response.geo_label,
+                "reason": response.geo_reason,
+            }
+        ],
+    }
+    if timings is not None:
+        partial["nodes"][0]["timings_ms"] = timings
+    return partial
+
+
+def geo_agent(state: dict) -> dict:
+    """
+    LLM-Orchestrated Geo Agent with Tool Roundtrip.
+    Reads state and returns only its partial result (risk, label, reason, nodes).
+    """
+    timings = node_timings(state)
+    with stage("geo_agent.prompt", timings):
+        messages = build_geo_messages(state)
+    with stage("geo_agent.llm", timings):
+        response = gateway.invoke(structured_model(), messages, CACHE_NAMESPACE, GeoSchema)
+    return _geo_partial(response, timings)
+
+
+async def ageo_agent(state: dict) -> dict:
+    """
+    Async variant of geo_agent: the LLM call is awaited, and prompt
+    building only moves to a worker thread when the geo tool has to score
+    the history (not precomputed by the deterministic stage).
+    """
+    timings = node_timings(state)
+    with stage("geo_agent.prompt", timings):
+        if "geo_tool" in state:
+            messages = build_geo_messages(state)
+        else:
+            messages = await asyncio.to_thread(build_geo_messages, state)
+    with stage("geo_agent.llm", timings):
+        response = await gateway.ainvoke(structured_model(), messages, CACHE_NAMESPACE, GeoSchema)
+    return _geo_partial(response, timings)
@@ -1,15 +1,16 @@
-from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage
+import asyncio
+
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
-import pandas as pd
 
-load_dotenv()
+from feature_store import features_from_state
+from llm import registry
+from llm.gateway import gateway
+from llm.prompts import fields, select, system_prompt
+from metrics import node_timings, stage
 
-model = ChatOllama(
-    model="mistral:latest",  # or "gemma3:1b" if preferred
-    temperature=0
-)
+
+# Ollama model (mistral:latest or gemma3:1b); the client is built on first use
+MODEL = "mistral:latest"
 
 class TemporalSchema(BaseModel):
     temporal_risk: float = Field(
@@ -24,83 +25,88 @@ class TemporalSchema(BaseModel):
         description="Short explanation"
     )
 
-structured_model = model.with_structured_output(TemporalSchema)
+CACHE_NAMESPACE = f"temporal_agent/{MODEL}"
 
 
-def temporal_agent(state: dict) -> dict:
+def structured_model():
+    return registry.structured_model(MODEL, TemporalSchema, temperature=0)
+
+
+SYSTEM_PROMPT = system_prompt(
+    "Task: is the transaction time suspicious for this customer? typical_hours "
+    "are their most frequent hours, txn_* their transactions in the preceding "
+    "window (bursts are suspicious). Fields: temporal_risk (0-1), temporal_label "
+    "(Low|Medium|High), temporal_reason (one sentence)."
+)
+
 
-    state.setdefault("nodes", [])
+def temporal_fields(state: dict) -> dict:
+    """Prompt fields: the timestamp, the customer's hour-of-day histogram and windowed velocity."""
     txn = state.get("txn") or state.get("transaction") or {}
-    history_source = (
-        state.get("customer_txns")
-        if state.get("customer_txns") is not None
-        else state.get("transaction_history", [])
-    )
+    features = features_from_state(state)
+
+    items = select(txn, ("timestamp",))
+    items["hist_count"] = features.hour_total
+    if features.hour_total:
+        items.update(typical_hours=features.typical_hours, mean_hour=features.average_hour)
+    velocity = state.get("velocity")
+    if velocity is not None:
+        items.update(velocity.fields())
+    return items
+
+
+def build_temporal_messages(state: dict) -> list:
+    """Build the temporal prompt messages (no LLM call)."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=fields(temporal_fields(state)))]
+
+
+def _temporal_partial(response: TemporalSchema, timings: dict = None) -> dict:
+    partial = {
+        "temporal_risk": response.temporal_risk,
+        "temporal_label": response.temporal_label,
+        "temporal_reason": response.temporal_reason,
+        "nodes": [
+            {
+                "id": "temporal_agent",
+                "name": "Temporal Agent",
+                "risk": response.temporal_risk,
+                "label": response.temporal_label,
+                "reason": response.temporal_reason,
+            }
+        ],
+    }
+    if timings is not None:
+        partial["nodes"][0]["timings_ms"] = timings
+    return partial
 
-    txn_timestamp = txn.get("timestamp")
-
-    if isinstance(history_source, pd.DataFrame):
-        history_df = history_source.copy()
-    else:
-        history_df = pd.DataFrame(history_source)
-
-    if not history_df.empty and "timestamp" in history_df.columns:
-        history_df["timestamp"] = pd.to_datetime(history_df["timestamp"])
-        history_df["hour"] = history_df["timestamp"].dt.hour
-
-        typical_hours = history_df["hour"].mode().tolist()
-        avg_hour = history_df["hour"].mean()
-
-        history_summary = f"""
-        Typical Active Hours: {typical_hours}
-        Average Active Hour: {round(avg_hour,2)}
-        Total Historical Transactions: {len(history_df)}
-        """
-    else:
-        history_summary = "No historical timestamp data available."
-
-    messages = [
-        SystemMessage(
-            content="""
-You are a senior fraud risk analyst specializing in temporal fraud detection.
-
-Evaluate:
-- Is the transaction occurring at an unusual hour?
-- Is timing inconsistent with historical behavior?
-
-Respond strictly in JSON format:
-{
-    "temporal_risk": float between 0 and 1,
-    "temporal_label": "Low" | "Medium" | "High",
-    "temporal_reason": "short explanation"
-}
-"""
-        ),
-        HumanMessage(
-            content=f"""
-Current Transaction Timestamp:
-{txn_timestamp}
-
-Customer Temporal Summary:
-{history_summary}
-
-Analyze whether this transaction is temporally suspicious.
-"""
-        )
-    ]
-
-    response = structured_model.invoke(messages)
-
-    state["temporal_risk"] = response.temporal_risk
-    state["temporal_label"] = response.temporal_label
-    state["temporal_reason"] = response.temporal_reason
-    state["nodes"].append(
-        {
-            "id": "temporal_agent",
-            "name": "Temporal Agent",
-            "risk": response.temporal_risk,
-            "label": response.temporal_label,
-            "reason": response.temporal_reason,
-        }
-    )
-    return state
+
+def temporal_agent(state: dict) -> dict:
+    """
+    Parallel-safe LLM-Based Temporal Fraud Analysis Agent.
+    Reads state and returns only its partial result (risk, label, reason, nodes).
+    """
+    timings = node_timings(state)
+    with stage("temporal_agent.prompt", timings):
+        messages = build_temporal_messages(state)
+    with stage("temporal_agent.llm", timings):
+        response = gateway.invoke(structured_model(), messages, CACHE_NAMESPACE, TemporalSchema)
+    return _temporal_partial(response, timings)
+
+
+async def atemporal_agent(state: dict) -> dict:
+    """
+    Async variant of temporal_agent: the LLM call is awaited, and prompt
+    building only moves to a worker thread when the hour histogram has to be
+    aggregated from a raw history frame.
+    """
+    timings = node_timings(state)
+    with stage("temporal_agent.prompt", timings):
+        if state.get("features") is not None:
+            messages = build_temporal_messages(state)
+        else:
+            messages = await asyncio.to_thread(build_temporal_messages, state)
+    with stage("temporal_agent.llm", timings):
+        response = await gateway.ainvoke(structured_model(), messages, CACHE_NAMESPACE, TemporalSchema)
+    return _temporal_partial(response, timings)
@@ -1,10 +1,21 @@
+import asyncio
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from fraud_graph import evaluate
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, field_validator
+
+import metrics
+import simulation
+from llm.registry import load_env
+
+load_env()
 
 class TransactionRequest(BaseModel):
     transactionId: str
@@ -14,6 +25,17 @@ class TransactionRequest(BaseModel):
     location: str
     deviceId: str
     timestamp: str  # ISO 8601 format: "2026-01-15T23:45:00"
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    @field_validator("timestamp")
+    @classmethod
+    def _iso_timestamp(cls, timestamp: str) -> str:
+        try:
+            datetime.fromisoformat(timestamp)
+        except ValueError:
+            raise ValueError("timestamp must be ISO 8601, e.g. 2026-01-15T23:45:00") from None
+        return timestamp
 
 
 class SimulationRequest(BaseModel):
@@ -24,7 +46,50 @@ class SimulationRequest(BaseModel):
     timestamp: Optional[str] = None
 
 
-app = FastAPI()
+class SimulationBatchRequest(BaseModel):
+    # Columns of equal length, one entry per simulated transaction
+    amount: List[float]
+    location: List[str]
+    device: List[str]
+    timestamp: Optional[List[Optional[str]]] = None
+    transactionId: Optional[List[str]] = None
+
+
+# The scoring pipeline (fraud_graph: history store, pandas, agents) is
+# imported off the event loop after startup instead of at import, so
+# /api/transaction and /health are served immediately by a fresh worker.
+PRELOAD_PIPELINE = os.getenv("FINSHIELD_PRELOAD_PIPELINE", "1") != "0"
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def _load_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            import fraud_graph
+
+            _pipeline = fraud_graph
+    return _pipeline
+
+
+async def pipeline():
+    """The fraud_graph module, loaded in a worker thread on first use."""
+    if _pipeline is not None:
+        return _pipeline
+    return await asyncio.to_thread(_load_pipeline)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    preload = asyncio.create_task(pipeline()) if PRELOAD_PIPELINE else None
+    yield
+    if preload is not None and not preload.done():
+        preload.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS setup
 origins = [
@@ -41,47 +106,240 @@ app.add_middleware(
     allow_headers=["*"],  # allow all headers
 )
 
+@app.get("/health")
+async def health():
+    return {"status": "ok", "pipeline": "ready" if _pipeline is not None else "loading"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Stage latency histograms plus LLM gateway, response cache, fast path and
+    scoring pool counters, in Prometheus text format. Never waits for the
+    pipeline to load.
+    """
+    from llm.cache import llm_cache
+    from llm.gateway import gateway
+    from llm.scheduler import scheduler_stats
+
+    gauges = (
+        "in_flight", "queued", "max_concurrency", "timeout_s", "short_circuit_fraction", "workers", "forward_pending",
+        "hit_rate", "memory_entries", "sqlite_entries",
+    )
+    cache = llm_cache.stats()
+    entries = cache.pop("entries")
+    sources = {
+        "llm": gateway.stats(),
+        "llm_cache": {**cache, **{f"{tier}_entries": count for tier, count in entries.items()}},
+        "llm_scheduler": scheduler_stats.snapshot(),
+    }
+    if _pipeline is not None:
+        import scoring_pool
+        from agents.fast_path import fast_path_stats
+
+        sources["fast_path"] = fast_path_stats.snapshot()
+        if scoring_pool.active() is not None:
+            sources["scoring_pool"] = scoring_pool.active().stats()
+    counters = {
+        f"finshield_{source}_{name}" + ("" if name in gauges else "_total"): value
+        for source, stats in sources.items()
+        for name, value in stats.items()
+    }
+    return PlainTextResponse(metrics.render(counters), media_type="text/plain; version=0.0.4")
+
+
+# fraud_graph.ORCHESTRATORS; ?mode= picks one per request (A/B tests)
+EvaluationMode = Literal["agents", "fused"]
+
+
 @app.post("/fraud/check")
-async def check_fraud(txn: TransactionRequest):
-    result = evaluate(txn.dict())
+async def check_fraud(
+    txn: TransactionRequest,
+    timings: Optional[bool] = None,
+    mode: Optional[EvaluationMode] = None,
+    deadline_ms: Optional[float] = Query(None, ge=0),
+):
+    graph = await pipeline()
+    result = await graph.aevaluate(txn.model_dump(), timings=timings, mode=mode, deadline_ms=deadline_ms)
     return result
 
 
-def build_simulation_response(txn: SimulationRequest):
-    amount_risk = 32 if txn.amount >= 45000 else 22 if txn.amount >= 25000 else 12
-    device_risk = 30 if "new" in txn.device.lower() else 14
-    location_risk = 20 if txn.location.lower() in {"mumbai", "delhi", "dubai", "singapore"} else 8
-
-    risk_score = min(97, amount_risk + device_risk + location_risk)
-
-    if risk_score >= 75:
-        status = "FLAGGED"
-        verdict = "Fraud Detected"
-        explanation = "Large-value transfer from a new device with elevated geographic risk markers."
-    elif risk_score >= 45:
-        status = "REVIEW"
-        verdict = "Manual Review Recommended"
-        explanation = "Multiple signals deviated from the expected customer profile and require review."
+BATCH_CONCURRENCY = int(os.getenv("FINSHIELD_BATCH_CONCURRENCY", "16"))
+
+
+MALFORMED_LINE_ECHO = 200  # characters of a malformed line echoed back
+
+
+class MalformedLine(ValueError):
+    """
+    An NDJSON body line that is not valid JSON; rejected by validation.
+    Its error record echoes `line`, the decoded and truncated raw line.
+    """
+
+    def __init__(self, message: str, line: bytes):
+        super().__init__(message)
+        self.line = line[:MALFORMED_LINE_ECHO].decode("utf-8", errors="replace")
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:  # JSONDecodeError, or undecodable bytes
+        return MalformedLine(f"Invalid JSON line: {e}", line)
+
+
+def _json_default(value):
+    # Error records carry the rejected item as "transaction"
+    if isinstance(value, MalformedLine):
+        return value.line
+    return str(value)
+
+
+async def _ndjson_lines(request: Request):
+    """
+    Parse an NDJSON request body incrementally, one transaction per line.
+    A malformed line becomes a MalformedLine item, so it is reported like
+    an invalid transaction instead of aborting the stream.
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+async def _json_array(request: Request) -> list:
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of transactions")
+    return body
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams results while the request body may still be being read.
+    Starlette's default disconnect listener would compete with the NDJSON
+    body reader for receive() messages, so only the send side is driven;
+    a client disconnect surfaces as a send error instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+def _validate_transaction(raw) -> dict:
+    if isinstance(raw, MalformedLine):
+        raise raw
+    if not isinstance(raw, dict):
+        raise ValueError("Expected a JSON object per transaction")
+    return TransactionRequest(**raw).model_dump()
+
+
+@app.post("/fraud/check/batch")
+async def check_fraud_batch(
+    request: Request,
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=256),
+    timings: Optional[bool] = None,
+    mode: Optional[EvaluationMode] = None,
+    deadline_ms: Optional[float] = Query(None, ge=0),
+):
+    """
+    Score many transactions in one request. Accepts a JSON array or an
+    NDJSON body (Content-Type: application/x-ndjson) and streams back one
+    NDJSON result per transaction as it completes; each result carries the
+    input "index" since completion order differs from input order.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        txns = _ndjson_lines(request)
     else:
-        status = "CLEAR"
-        verdict = "Transaction Cleared"
-        explanation = "Agent checks stayed within safe thresholds across device, amount, and location."
-
-    return {
-        "riskScore": risk_score,
-        "status": status,
-        "reasoning": [
-            "Cross-checking behavioral pattern",
-            "Comparing device fingerprint",
-            "Checking geo-velocity anomaly",
-        ],
-        "verdict": verdict,
-        "confidence": min(96, risk_score + 5),
-        "explanation": explanation,
-        "processedAt": txn.timestamp or datetime.utcnow().isoformat(),
-    }
+        txns = await _json_array(request)
+
+    graph = await pipeline()
+
+    async def results():
+        async for result in graph.abatch_evaluate(txns, concurrency=concurrency, validate=_validate_transaction, timings=timings, mode=mode, deadline_ms=deadline_ms):
+            yield json.dumps(result, default=_json_default) + "\n"
+
+    return NDJSONStreamingResponse(results())
+
+
+INGEST_CHUNK = 256
+
+
+@app.post("/history/append")
+async def append_history(request: Request):
+    """
+    Ingest transactions into the live history without scoring them, so
+    later checks see them in the customer's history and features. Accepts
+    a JSON array or an NDJSON body; transactions whose id is already in the
+    history are counted as duplicates, invalid ones as errors.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        raws = _ndjson_lines(request)
+    else:
+        raws = _aiter_list(await _json_array(request))
+
+    graph = await pipeline()
+    counts = {"received": 0, "appended": 0, "duplicates": 0, "errors": 0}
+    chunk = []
+
+    async def flush():
+        appended = await asyncio.to_thread(graph.ingest_many, chunk)
+        counts["appended"] += appended
+        counts["duplicates"] += len(chunk) - appended
+        chunk.clear()
+
+    async for raw in raws:
+        counts["received"] += 1
+        try:
+            chunk.append(_validate_transaction(raw))
+        except Exception:
+            counts["errors"] += 1
+            continue
+        if len(chunk) >= INGEST_CHUNK:
+            await flush()
+    if chunk:
+        await flush()
+    return counts
+
+
+async def _aiter_list(items):
+    for item in items:
+        yield item
+
+
+def build_simulation_response(txn: SimulationRequest):
+    return simulation.simulate(txn.amount, txn.location, txn.device, txn.timestamp)
 
 
 @app.post("/api/transaction")
 async def simulate_transaction(txn: SimulationRequest):
     return build_simulation_response(txn)
+
+
+@app.post("/api/transaction/batch")
+async def simulate_transactions(batch: SimulationBatchRequest):
+    """
+    Bulk /api/transaction for UI stress tests and dashboard seeding: takes
+    columns (amount, location, device, optional timestamp/transactionId),
+    scores them in one vectorized pass and streams back one NDJSON response
+    per row, in input order, tagged with its "index".
+    """
+    import simulation_batch
+
+    columns = [batch.amount, batch.location, batch.device, batch.timestamp, batch.transactionId]
+    if len({len(column) for column in columns if column is not None}) > 1:
+        raise HTTPException(status_code=422, detail="Columns must have the same length")
+    return StreamingResponse(
+        simulation_batch.ndjson_chunks(batch.amount, batch.location, batch.device, batch.timestamp, batch.transactionId),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,110 @@
+# benchmarks/customer_context.py
+"""
+Per-evaluation history handling for one heavy customer: the legacy path
+(filtered DataFrame slice, copied and re-parsed by each agent) vs. the
+shared read-only CustomerContext built once by fraud_graph.
+
+Reports median latency and tracemalloc peak (bytes allocated while
+building what the agents read) per evaluation.
+
+Usage (from backend/):
+    python -m benchmarks.customer_context --sizes 1000 100000 1000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from customer_context import CustomerContext, history_columns
+from tools.device_tool import device_risk_score
+from tools.geo_tool import geo_risk_score
+
+
+def _history(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    timestamps = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 365 * 86400, rows), unit="s")
+    history = pd.DataFrame(
+        {
+            "transactionId": [f"T{i}" for i in range(rows)],
+            "customerId": "HEAVY",
+            "amount": rng.lognormal(4, 1, rows).round(2),
+            "timestamp": timestamps,
+            "latitude": 19.0 + rng.normal(0, 0.5, rows),
+            "longitude": 72.8 + rng.normal(0, 0.5, rows),
+            "deviceId": rng.choice(["Android", "iPhone", "Web"], rows),
+        }
+    )
+    history["hour"] = history["timestamp"].dt.hour
+    return history
+
+
+def _legacy(history, txn):
+    # Slice + exclusion, then each agent copies the frame and re-derives
+    # what it needs (amount stats, re-parsed timestamps, coordinates, devices)
+    customer_txns = history[history["transactionId"] != txn["transactionId"]]
+
+    behavioral = customer_txns.copy()
+    behavioral["amount"].describe()
+
+    temporal = customer_txns.copy()
+    temporal["timestamp"] = pd.to_datetime(temporal["timestamp"])
+    temporal["timestamp"].dt.hour.mode()
+
+    geo = geo_risk_score(txn, customer_txns.copy())
+    device = device_risk_score(txn, customer_txns)
+    return geo, device
+
+
+def _shared(columns, txn):
+    context = CustomerContext.from_columns("HEAVY", columns, 0, len(columns["amounts"]), txn["transactionId"])
+    geo = geo_risk_score(txn, context)
+    device = device_risk_score(txn, context)
+    return geo, device
+
+
+def _measure(fn, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, np.median(timings) * 1e3, peak
+
+
+def run(rows: int, repeats: int):
+    history = _history(rows)
+    columns = history_columns(history)
+    # A new transaction (not in the history): the common, no-exclusion case
+    txn = {"transactionId": "NEW", "customerId": "HEAVY", "deviceId": "Android", "latitude": 19.1, "longitude": 72.9}
+
+    legacy_result, legacy_ms, legacy_peak = _measure(lambda: _legacy(history, txn), repeats)
+    shared_result, shared_ms, shared_peak = _measure(lambda: _shared(columns, txn), repeats)
+    assert legacy_result == shared_result, (legacy_result, shared_result)
+
+    print(
+        f"{rows:>10,} rows | legacy {legacy_ms:9.2f} ms, peak {legacy_peak / 2**20:8.2f} MiB | "
+        f"context {shared_ms:8.2f} ms, peak {shared_peak / 2**20:8.2f} MiB | "
+        f"speedup {legacy_ms / shared_ms:6.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        run(rows, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
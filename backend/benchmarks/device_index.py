@@ -0,0 +1,112 @@
+# benchmarks/device_index.py
+"""
+Device tool: per-request `deviceId.unique().tolist()` + list membership
+(the original device_risk_score on a customer frame) vs. the interned
+device index (O(1) hash lookups), for one customer with N transactions in
+a 1M-row history. Also reports the index's one-time global pass,
+incremental add throughput, the bulk variant per transaction, and checks
+both agree on every risk tier.
+
+Usage (from backend/):
+    python -m benchmarks.device_index --sizes 100 10000 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.device_index import DeviceIndex
+
+
+def _median_ms(fn, queries):
+    timings = []
+    for query in queries:
+        t0 = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1e3
+
+
+def _frame_risk(txn: dict, frame: pd.DataFrame):
+    # The original device_risk_score on a DataFrame history
+    known_devices = frame["deviceId"].unique().tolist()
+    if txn["deviceId"] not in known_devices:
+        return 0.6, "Transaction from new device for this customer"
+    return 0.1, "Transaction from known device"
+
+
+def _history(rng, rows: int, heavy_rows: int):
+    # One heavy customer ("CUST") plus customers of ~100 rows; each customer
+    # uses a few of its own devices and occasionally a shared pool device
+    others = rows - heavy_rows
+    customers = np.concatenate((np.full(heavy_rows, "CUST"), np.char.add("C", (np.arange(others) // 100).astype(str))))
+    own = np.char.add(np.char.add("DEV-", customers), np.char.add("-", rng.integers(0, 4, rows).astype(str)))
+    shared = np.char.add("POOL-", rng.integers(0, 1000, rows).astype(str))
+    devices = np.where(rng.random(rows) < 0.05, shared, own)
+    timestamps = np.datetime64("2025-01-01", "ns") + rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]")
+
+    order = np.argsort(customers, kind="stable")
+    customers, devices, timestamps = customers[order], devices[order], timestamps[order]
+    boundaries = np.flatnonzero(customers[1:] != customers[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [rows]))
+    ranges = {customers[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+    return {"device_ids": devices, "timestamps": timestamps}, ranges
+
+
+def run(heavy_rows: int, total_rows: int, queries: int):
+    rng = np.random.default_rng(0)
+    columns, ranges = _history(rng, total_rows, heavy_rows)
+    start, stop = ranges["CUST"]
+    frame = pd.DataFrame({"deviceId": columns["device_ids"][start:stop]})
+
+    index = DeviceIndex()
+    t0 = time.perf_counter()
+    index.attach(columns, ranges)
+    global_ms = (time.perf_counter() - t0) * 1e3
+    t0 = time.perf_counter()
+    index.lookup("CUST", None)
+    customer_ms = (time.perf_counter() - t0) * 1e3
+
+    candidates = np.concatenate((np.unique(frame["deviceId"]), [f"NEW-{i}" for i in range(4)], ["POOL-1", "POOL-2"]))
+    txns = [{"customerId": "CUST", "deviceId": str(candidates[rng.integers(len(candidates))])} for _ in range(queries)]
+
+    frame_ms = _median_ms(lambda txn: _frame_risk(txn, frame), txns[:100])
+    index_ms = _median_ms(index.risk_score, txns)
+    t0 = time.perf_counter()
+    bulk = index.risk_scores(txns)
+    bulk_us = (time.perf_counter() - t0) / len(txns) * 1e6
+    mismatches = sum(_frame_risk(txn, frame)[0] != result[0] for txn, result in zip(txns, bulk))
+
+    added = [
+        {"customerId": "CUST", "deviceId": f"ADD-{i % 50}", "timestamp": "2026-01-01T10:00:00"}
+        for i in range(5_000)
+    ]
+    t0 = time.perf_counter()
+    for txn in added:
+        index.add(txn)
+    add_us = (time.perf_counter() - t0) / len(added) * 1e6
+    shared = index.lookup("CUST", "POOL-1").customers
+
+    print(
+        f"{heavy_rows:>9,} rows | global pass {global_ms:7.1f} ms | customer map {customer_ms:7.2f} ms | "
+        f"frame {frame_ms:8.3f} ms | index {index_ms * 1e3:6.1f} us | speedup {frame_ms / index_ms:8.1f}x | "
+        f"bulk {bulk_us:5.1f} us/txn | add {add_us:5.1f} us | POOL-1 customers {shared} | mismatches {mismatches}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="total history rows")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    for heavy_rows in args.sizes:
+        run(heavy_rows, args.rows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/fused_ab.py
+"""
+A/B of the two orchestrators on the same transactions: the multi-call
+pipeline (?mode=agents: one LLM call per behavioral/temporal/geo agent,
+then the decision) vs. the fused mode (?mode=fused: one combined call).
+Transactions are history rows, so scoring them never ingests and both
+modes see the same history. Reports, per mode, latency p50/p95 and LLM
+calls per transaction, and how often the two modes agree on the action
+and on each agent's label for the escalated transactions (fast-path
+decisions are identical by construction).
+
+The stub provider (default) answers from the same rules in both modes, so
+its agreement is an upper bound; --llm ollama measures the real model.
+
+Usage (from backend/):
+    python -m benchmarks.fused_ab --csv synthetic_transactions.csv --transactions 2000 --latency-ms 200
+    python -m benchmarks.fused_ab --transactions 200 --llm ollama --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+
+MODES = ("agents", "fused")
+AGENT_NODES = ("behavioral_agent", "temporal_agent", "geo_agent")
+
+
+async def _run(fraud_graph, txns: list, mode: str, concurrency: int):
+    from llm.gateway import gateway
+
+    limit = asyncio.Semaphore(concurrency)
+    latencies = [None] * len(txns)
+    results = [None] * len(txns)
+
+    async def one(position, txn):
+        async with limit:
+            t0 = time.perf_counter()
+            results[position] = await fraud_graph.aevaluate(txn, timings=True, mode=mode)
+            latencies[position] = time.perf_counter() - t0
+
+    calls = gateway.stats().get("calls", 0)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(position, txn) for position, txn in enumerate(txns)))
+    wall = time.perf_counter() - t0
+    return results, np.array(latencies) * 1e3, gateway.stats().get("calls", 0) - calls, wall
+
+
+def _escalated(result: dict) -> bool:
+    # Stage timings are keyed without the agent prefix
+    return "llm" in (result["nodes"][-1].get("timings_ms") or {})
+
+
+def _labels(result: dict) -> dict:
+    return {node["id"]: node.get("label") for node in result["nodes"]}
+
+
+async def run(count: int, concurrency: int):
+    import fraud_graph
+    from benchmarks.replay import _csv_chunks, transactions
+    from history_store import default_csv_path
+
+    txns = list(transactions(_csv_chunks(default_csv_path(), count)))
+    runs = {}
+    for mode in MODES:
+        runs[mode] = await _run(fraud_graph, txns, mode, concurrency)
+
+    print(f"{len(txns)} transactions, concurrency {concurrency}")
+    print(f"{'mode':>7} | {'escalated':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p50 esc.':>8} | {'LLM calls':>9} | {'calls/esc.':>10} | {'txn/s':>7}")
+    for mode, (results, latencies, calls, wall) in runs.items():
+        escalated = np.array([_escalated(result) for result in results])
+        escalated_p50 = np.percentile(latencies[escalated], 50) if escalated.any() else float("nan")
+        print(
+            f"{mode:>7} | {escalated.sum():9d} | {np.percentile(latencies, 50):8.1f} | "
+            f"{np.percentile(latencies, 95):8.1f} | {escalated_p50:8.1f} | {calls:9d} | "
+            f"{calls / max(escalated.sum(), 1):10.2f} | {len(txns) / wall:7.1f}"
+        )
+
+    pairs = [
+        (agents, fused)
+        for agents, fused in zip(runs["agents"][0], runs["fused"][0])
+        if _escalated(agents) and _escalated(fused)
+    ]
+    if not pairs:
+        print("No transaction escalated in both modes")
+        return
+    actions = np.mean([agents["nodes"][-1]["action"] == fused["nodes"][-1]["action"] for agents, fused in pairs])
+    print(f"agreement over {len(pairs)} escalated transactions: action {actions:.1%}", end="")
+    for node in AGENT_NODES:
+        agree = np.mean([_labels(agents)[node] == _labels(fused)[node] for agents, fused in pairs])
+        print(f" | {node.removesuffix('_agent')} label {agree:.1%}", end="")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="history CSV to score and replay (default: the configured one)")
+    parser.add_argument("--transactions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm", choices=("stub", "ollama"), default="stub")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub LLM latency per call")
+    args = parser.parse_args()
+
+    if args.csv:
+        os.environ["FINSHIELD_HISTORY_CSV"] = args.csv
+        # Keep the default store (built from the usual CSV) intact
+        os.environ.setdefault("FINSHIELD_HISTORY_STORE", "history_store_replay")
+    # Measured with the fast path on (opt-in in deployments)
+    os.environ.setdefault("FINSHIELD_FAST_PATH", "1")
+    if args.llm == "stub":
+        # Must be set before the pipeline is imported
+        os.environ["FINSHIELD_LLM_PROVIDER"] = "stub"
+        os.environ["FINSHIELD_STUB_LATENCY_MS"] = str(args.latency_ms)
+    asyncio.run(run(args.transactions, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/geo_distance.py
+"""
+Geo tool micro-benchmarks: the previous iterrows + scalar haversine loop
+vs. the vectorized kernel, plus the batch variant, at 100 / 10k / 1M
+history points.
+
+Usage (from backend/):
+    python -m benchmarks.geo_distance --sizes 100 10000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tools.geo_tool import geo_risk_score, geo_risk_scores, haversine_distance, min_distance_km
+
+
+def _iterrows_min_distance(lat, lon, history_df):
+    distances = []
+    for _, row in history_df.iterrows():
+        if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
+            distances.append(haversine_distance(lat, lon, row["latitude"], row["longitude"]))
+    return min(distances)
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def run(points: int, batch: int):
+    rng = np.random.default_rng(0)
+    history_df = pd.DataFrame(
+        {
+            "latitude": rng.uniform(-60, 60, points),
+            "longitude": rng.uniform(-180, 180, points),
+        }
+    )
+    history_df.loc[history_df.sample(frac=0.01, random_state=0).index, "latitude"] = np.nan
+    txn = {"latitude": 19.0760, "longitude": 72.8777}
+
+    vectorized = min_distance_km(txn["latitude"], txn["longitude"], history_df["latitude"], history_df["longitude"])
+    # The scalar loop is O(n) Python; cap its repeats on large inputs
+    loop_ms = _best_of(lambda: _iterrows_min_distance(txn["latitude"], txn["longitude"], history_df), 1 if points > 10_000 else 3)
+    assert abs(_iterrows_min_distance(txn["latitude"], txn["longitude"], history_df.head(1000)) -
+               min_distance_km(txn["latitude"], txn["longitude"], history_df["latitude"].head(1000), history_df["longitude"].head(1000))) < 1e-6
+    vector_ms = _best_of(lambda: geo_risk_score(txn, history_df), 5)
+
+    txns = [txn] * batch
+    histories = [history_df] * batch
+    batch_ms = _best_of(lambda: geo_risk_scores(txns, histories), 3) if points * batch <= 20_000_000 else float("nan")
+    single_ms = _best_of(lambda: [geo_risk_score(t, h) for t, h in zip(txns, histories)], 3) if points * batch <= 20_000_000 else float("nan")
+
+    print(
+        f"{points:>9,} points | iterrows {loop_ms:10.2f} ms | vectorized {vector_ms:8.3f} ms | "
+        f"batch x{batch}: per-txn {single_ms:8.2f} ms vs bulk {batch_ms:8.2f} ms | min {vectorized:.2f} km"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    for points in args.sizes:
+        run(points, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/geo_index.py
+"""
+Geo tool: brute-force vectorized scan vs. per-customer spatial index
+(KD-tree on 3D unit vectors), for one customer with N history points.
+Also checks that both return identical risk tiers, including after
+incremental adds.
+
+Usage (from backend/):
+    python -m benchmarks.geo_index --sizes 1000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from customer_context import history_columns
+from tools.geo_index import GeoIndexRegistry
+from tools.geo_tool import geo_risk_score
+
+
+def _median_ms(fn, queries):
+    timings = []
+    for query in queries:
+        t0 = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1e3
+
+
+def _history(rng, points, prefix="T"):
+    return pd.DataFrame(
+        {
+            "transactionId": [f"{prefix}{i}" for i in range(points)],
+            "customerId": "CUST",
+            "latitude": 19.07 + rng.normal(0, 2, points),
+            "longitude": 72.87 + rng.normal(0, 2, points),
+        }
+    )
+
+
+def run(points: int, queries: int):
+    rng = np.random.default_rng(0)
+    history = _history(rng, points)
+
+    registry = GeoIndexRegistry()
+    t0 = time.perf_counter()
+    registry.attach(history_columns(history), {"CUST": (0, points)})
+    registry.get("CUST")
+    build_ms = (time.perf_counter() - t0) * 1e3
+
+    txns = [
+        {
+            "customerId": "CUST",
+            "transactionId": f"Q{i}",
+            "latitude": 19.07 + rng.normal(0, 4),
+            "longitude": 72.87 + rng.normal(0, 4),
+        }
+        for i in range(queries)
+    ]
+
+    brute_ms = _median_ms(lambda txn: geo_risk_score(txn, history), txns[:50])
+    index_ms = _median_ms(registry.risk_score, txns)
+    mismatches = sum(geo_risk_score(txn, history) != registry.risk_score(txn) for txn in txns[:200])
+
+    # Incremental adds: tiers must still match a brute-force scan over everything
+    added = _history(rng, max(1, points // 20), prefix="A")
+    t0 = time.perf_counter()
+    for row in added.itertuples():
+        registry.add("CUST", row.latitude, row.longitude, row.transactionId)
+    add_us = (time.perf_counter() - t0) / len(added) * 1e6
+    combined = pd.concat([history, added], ignore_index=True)
+    mismatches += sum(geo_risk_score(txn, combined) != registry.risk_score(txn) for txn in txns[:200])
+
+    print(
+        f"{points:>9,} points | build {build_ms:8.1f} ms | brute {brute_ms:8.3f} ms | "
+        f"index {index_ms:7.3f} ms | speedup {brute_ms / index_ms:7.1f}x | "
+        f"add {add_us:6.1f} us | tier mismatches {mismatches}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    for points in args.sizes:
+        run(points, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/history_ingest.py
+"""
+Streaming ingestion into the in-memory history: HistoryStore.append (the
+AppendLog with periodic compaction) vs. the naive approach of pd.concat-ing
+each new transaction onto the history frame.
+
+Transactions are appended one at a time for random customers; every
+--lookup-every appends a customer context is looked up, as scoring would
+while ingesting. Reports appends/s and the p50/p99 lookup latency.
+
+Usage (from backend/):
+    python -m benchmarks.history_ingest --rows 1000000 --appends 200000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_transactions
+from history_store import HistoryStore, normalize_history
+
+
+def _new_transactions(history: pd.DataFrame, appends: int) -> list:
+    rng = np.random.default_rng(1)
+    customers = history["customerId"].unique()
+    return [
+        {
+            "transactionId": f"NEW{i}",
+            "customerId": customers[rng.integers(len(customers))],
+            "amount": float(rng.lognormal(7, 1)),
+            "deviceId": "Android",
+            "timestamp": f"2026-05-{1 + i % 28:02d}T{i % 24:02d}:00:00",
+            "latitude": 19.0,
+            "longitude": 72.8,
+        }
+        for i in range(appends)
+    ]
+
+
+def _store_ingest(store: HistoryStore, txns: list, lookup_every: int):
+    lookups = []
+    t0 = time.perf_counter()
+    for i, txn in enumerate(txns):
+        store.append(txn, check_loaded=False)
+        if i % lookup_every == 0:
+            start = time.perf_counter()
+            store.context(txn["customerId"])
+            lookups.append(time.perf_counter() - start)
+    return time.perf_counter() - t0, lookups
+
+
+def _naive_ingest(history: pd.DataFrame, txns: list, lookup_every: int):
+    lookups = []
+    t0 = time.perf_counter()
+    for i, txn in enumerate(txns):
+        history = pd.concat([history, normalize_history(pd.DataFrame([txn]))], ignore_index=True)
+        if i % lookup_every == 0:
+            start = time.perf_counter()
+            history[history["customerId"] == txn["customerId"]]
+            lookups.append(time.perf_counter() - start)
+    return time.perf_counter() - t0, lookups
+
+
+def _report(name: str, appends: int, elapsed: float, lookups: list):
+    p50, p99 = np.percentile(lookups, [50, 99]) * 1e3
+    print(f"{name:>6} | {appends:>8,} appends | {appends / elapsed:>10,.0f} appends/s | lookup p50 {p50:7.3f} ms p99 {p99:7.3f} ms")
+
+
+def run(rows: int, appends: int, naive_appends: int, lookup_every: int):
+    history = normalize_history(generate_transactions(rows))
+    txns = _new_transactions(history, appends)
+    print(f"{rows:,} loaded rows")
+
+    store = HistoryStore.from_frame(history)
+    elapsed, lookups = _store_ingest(store, txns, lookup_every)
+    _report("store", appends, elapsed, lookups)
+    print(f"         {store.log.compactions} compactions, {len(store.log):,} rows in the append log")
+
+    if naive_appends:
+        elapsed, lookups = _naive_ingest(history, txns[:naive_appends], lookup_every)
+        _report("concat", naive_appends, elapsed, lookups)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--appends", type=int, default=200_000)
+    parser.add_argument("--naive-appends", type=int, default=500, help="0 skips the pd.concat baseline")
+    parser.add_argument("--lookup-every", type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.rows, args.appends, args.naive_appends, args.lookup_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/history_lookup.py
+"""
+Per-customer history lookup latency: full-DataFrame boolean scan
+vs. the customer-keyed slice index (history_store.build_customer_index).
+
+Usage (from backend/):
+    python -m benchmarks.history_lookup --sizes 10000 1000000 10000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_transactions
+from history_store import build_customer_index
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.rename(
+        columns={
+            "transaction_id": "transactionId",
+            "customer_id": "customerId",
+            "device": "deviceId",
+        }
+    )
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+def _scan_lookup(history, customer_id, txn_id):
+    customer_txns = history[history["customerId"] == customer_id]
+    return customer_txns[customer_txns["transactionId"] != txn_id]
+
+
+def _index_lookup(history, index, customer_id, txn_id):
+    start, stop = index[customer_id]
+    customer_txns = history.iloc[start:stop]
+    return customer_txns[customer_txns["transactionId"] != txn_id]
+
+
+def _time_per_call(fn, queries, budget_s=2.0):
+    timings = []
+    deadline = time.perf_counter() + budget_s
+    for customer_id, txn_id in queries:
+        t0 = time.perf_counter()
+        fn(customer_id, txn_id)
+        timings.append(time.perf_counter() - t0)
+        if time.perf_counter() > deadline and len(timings) >= 3:
+            break
+    return np.median(timings) * 1e3, len(timings)
+
+
+def run(rows: int, queries: int):
+    history = _normalize(generate_transactions(rows))
+
+    t0 = time.perf_counter()
+    indexed, index = build_customer_index(history)
+    build_s = time.perf_counter() - t0
+
+    rng = np.random.default_rng(0)
+    sample = history.iloc[rng.integers(0, len(history), queries)]
+    pairs = list(zip(sample["customerId"], sample["transactionId"]))
+
+    scan_ms, scan_n = _time_per_call(lambda c, t: _scan_lookup(history, c, t), pairs)
+    index_ms, index_n = _time_per_call(lambda c, t: _index_lookup(indexed, index, c, t), pairs)
+
+    print(
+        f"{rows:>11,} rows | index build {build_s:7.2f}s | "
+        f"scan {scan_ms:9.3f} ms (n={scan_n}) | "
+        f"index {index_ms:7.3f} ms (n={index_n}) | "
+        f"speedup {scan_ms / index_ms:8.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        run(rows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/history_memory.py
+"""
+Resident memory of one worker holding the history, per million rows.
+
+A fresh worker process loads the store and then, in stages,
+  - load:    maps the store
+  - indexes: attaches the indexes (as fraud_graph does); the device
+             index's global pass interns every row
+  - warm:    reads every stored column once (as a long-running worker)
+  - filter:  one equality filter per identifier column over all rows
+and reports RSS (resident pages, mapped ones included) after each stage,
+and the peak, in MiB per million rows. Also prints the stored bytes per
+column and the equality-filter times (codes for interned columns, bytes
+for transaction ids).
+
+Usage (from backend/):
+    python -m benchmarks.history_memory --csv /tmp/syn1m.csv --store /tmp/hs1m
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+
+STAGES = ("load", "indexes", "warm", "filter")
+FILTER_COLUMNS = ("customerId", "deviceId", "merchant", "transactionId")
+
+
+def _rss_mib() -> float:
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _stored(array) -> list:
+    # The arrays a column is stored as (codes and dictionary when interned)
+    from history_store import BytesColumn, InternedColumn
+
+    if isinstance(array, InternedColumn):
+        return [array.codes, array.dictionary]
+    if isinstance(array, BytesColumn):
+        return [array.data]
+    return [array]
+
+
+def _child(csv_path: str, store_dir: str):
+    import numpy as np
+
+    from feature_store import feature_store
+    from history_store import load_history_store
+    from tools.device_index import device_indexes
+    from tools.geo_index import geo_indexes
+    from tools.velocity_index import velocity_indexes
+
+    base = _rss_mib()
+    rss = {}
+
+    store = load_history_store(csv_path, store_dir)
+    rss["load"] = _rss_mib()
+
+    for registry in (geo_indexes, feature_store, velocity_indexes, device_indexes):
+        registry.attach(store.context_columns, store.customer_index)
+    rss["indexes"] = _rss_mib()
+
+    for array in store.columns.values():
+        stored = _stored(array)[0]
+        np.count_nonzero(stored == stored[0])
+    rss["warm"] = _rss_mib()
+
+    filters = {}
+    for column in FILTER_COLUMNS:
+        if column not in store.columns:
+            continue
+        array = store.columns[column]
+        value = array[len(array) // 2]
+        t0 = time.perf_counter()
+        if hasattr(array, "codes"):
+            rows = np.count_nonzero(array.codes == store.code(column, value))
+        else:
+            stored = _stored(array)[0]
+            rows = np.count_nonzero(stored == (value.encode() if stored.dtype.kind == "S" else value))
+        filters[column] = (time.perf_counter() - t0, rows)
+    rss["filter"] = _rss_mib()
+
+    per_million = 1e6 / len(store)
+    print(f"{len(store):,} rows, {len(store.customers):,} customers")
+    print(f"{'column':>14} | {'dtype':>14} | {'MiB':>7}")
+    for column, array in store.columns.items():
+        parts = _stored(array)
+        dtypes = "+".join(str(part.dtype) for part in parts)
+        print(f"{column:>14} | {dtypes:>14} | {sum(part.nbytes for part in parts) / 2**20:7.1f}")
+    print("RSS above the imports, MiB per 1M rows:")
+    for stage in STAGES:
+        print(f"  {stage:>8}  {(rss[stage] - base) * per_million:8.1f}")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {'peak':>8}  {(peak - base) * per_million:8.1f}")
+    print("equality filter over all rows:")
+    for column, (seconds, rows) in filters.items():
+        print(f"  {column:>14}  {seconds * 1e3:8.2f} ms  ({rows:,} rows)")
+
+
+def run(csv_path: str, store_dir: str):
+    from history_store import load_history_store
+
+    # Convert (if needed) up front, so the measured worker only maps
+    load_history_store(csv_path, store_dir)
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.history_memory", "--child", "--csv", csv_path, "--store", store_dir],
+        check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", required=True, help="history CSV (converted into --store when stale)")
+    parser.add_argument("--store", default="history_store_memory")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.csv, args.store)
+    else:
+        run(args.csv, args.store)
+
+
+if __name__ == "__main__":
+    main()
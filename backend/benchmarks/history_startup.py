@@ -0,0 +1,131 @@
+# benchmarks/history_startup.py
+"""
+Worker cold start and memory: parsing the CSV in every worker (read_csv,
+renames, to_datetime, sort, typed columns) vs. memory-mapping the
+columnar history store.
+
+For each worker count, that many worker processes load the history at the
+same time and touch every column once (as a warm worker would); the parent
+then reads each worker's RSS and PSS (proportional set size, shared pages
+divided between the processes that map them) from /proc (Linux only).
+
+Usage (from backend/):
+    python -m benchmarks.history_startup --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def _child(mode: str, csv_path: str, store_dir: str):
+    t0 = time.perf_counter()
+    import pandas as pd
+
+    from customer_context import history_columns
+    from feature_store import FeatureStore
+    from history_store import build_customer_index, load_history_store, normalize_history
+
+    if mode == "csv":
+        history = normalize_history(pd.read_csv(csv_path))
+        history, customer_index = build_customer_index(history)
+        columns = history_columns(history)
+        FeatureStore().attach(columns, customer_index)
+    else:
+        store = load_history_store(csv_path, store_dir)
+        columns = store.context_columns
+        FeatureStore().attach(columns, store.customer_index)
+    startup = time.perf_counter() - t0
+
+    # Warm worker: every column has been read at least once
+    for array in columns.values():
+        if array.dtype.kind in "fM":
+            np.count_nonzero(array == array)
+        else:
+            len(set(array[:: max(1, len(array) // 1000)].tolist()))
+
+    print(f"{startup:.4f}", flush=True)
+    sys.stdin.readline()
+
+
+def _memory_kb(pid: int) -> dict:
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _run_workers(mode: str, workers: int, csv_path: Path, store_dir: Path):
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.history_startup", "--child", mode, "--csv", str(csv_path), "--store", str(store_dir)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    startups = [float(proc.stdout.readline()) for proc in procs]
+    memory = [_memory_kb(proc.pid) for proc in procs]
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+
+    rss = sum(m.get("Rss", 0) for m in memory) / 1024
+    pss = sum(m.get("Pss", 0) for m in memory) / 1024
+    print(
+        f"{mode:>5} | {workers:>2} workers | startup median {np.median(startups):7.3f}s, max {max(startups):7.3f}s | "
+        f"total RSS {rss:8.1f} MiB | total PSS {pss:8.1f} MiB"
+    )
+
+
+def run(rows: int, worker_counts: list):
+    from benchmarks.synthetic import generate_transactions
+    from history_store import convert_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "history.csv"
+        store_dir = Path(tmp) / "history_store"
+        generate_transactions(rows).to_csv(csv_path, index=False)
+
+        t0 = time.perf_counter()
+        convert_csv(csv_path, store_dir)
+        size = sum(f.stat().st_size for f in store_dir.iterdir()) / 2**20
+        print(
+            f"{rows:,} rows: CSV {csv_path.stat().st_size / 2**20:.1f} MiB, "
+            f"one-time conversion {time.perf_counter() - t0:.2f}s -> store {size:.1f} MiB"
+        )
+
+        for workers in worker_counts:
+            for mode in ("csv", "store"):
+                _run_workers(mode, workers, csv_path, store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--child", choices=["csv", "store"], help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.csv, args.store)
+    else:
+        run(args.rows, args.workers)
+
+
+if __name__ == "__main__":
+    main()
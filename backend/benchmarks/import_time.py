@@ -0,0 +1,88 @@
+# benchmarks/import_time.py
+"""
+Import-time profile with a budget, based on `python -X importtime`.
+
+Each target module is imported in a fresh interpreter (best of --runs);
+the script prints its cumulative import time, the slowest top-level
+dependencies, and fails (exit 1) when a target exceeds its budget or
+imports a module it must not load eagerly.
+
+Usage (from backend/):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --target app --budget-ms 500 --top 15
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+
+# target -> (budget in ms, modules that must not be imported eagerly)
+BUDGETS = {
+    "app": (600, ("fraud_graph", "numpy", "pandas", "langchain_core", "langchain_ollama")),
+    "fraud_graph": (1000, ("langchain_ollama",)),
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile(target: str) -> list:
+    """(self_us, cumulative_us, depth, module) for every import of `target`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, module))
+    return rows
+
+
+def check(target: str, budget_ms: float, forbidden: tuple, runs: int, top: int) -> bool:
+    profiles = [profile(target) for _ in range(runs)]
+    totals = [next(row[1] for row in rows if row[3] == target) for rows in profiles]
+    best = min(range(runs), key=lambda i: totals[i])
+    rows, total_ms = profiles[best], totals[best] / 1000
+
+    loaded = {row[3] for row in rows}
+    eager = [module for module in forbidden if module in loaded]
+    ok = total_ms <= budget_ms and not eager
+
+    print(f"{target}: {total_ms:8.1f} ms (budget {budget_ms:.0f} ms, best of {runs}) -> {'OK' if ok else 'OVER'}")
+    # Direct dependencies of the target, by cumulative time
+    direct = sorted((row for row in rows if row[2] == 1), key=lambda row: row[1], reverse=True)
+    for _, cumulative_us, _, module in direct[:top]:
+        print(f"    {cumulative_us / 1000:8.1f} ms  {module}")
+    if eager:
+        print(f"    eagerly imported: {', '.join(eager)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", help="module to profile (default: every module in BUDGETS)")
+    parser.add_argument("--budget-ms", type=float, help="override the budget of every target")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = []
+    for target in args.target or list(BUDGETS):
+        budget_ms, forbidden = BUDGETS.get(target, (float("inf"), ()))
+        if args.budget_ms is not None:
+            budget_ms = args.budget_ms
+        results.append(check(target, budget_ms, forbidden, args.runs, args.top))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/llm_gateway.py
+"""
+LLM gateway under a traffic spike, against the local stub LLM server
+(fast path and response cache disabled so every evaluation reaches the LLM).
+
+Scenarios, all on one event loop:
+  no coalescing  - burst of concurrent evaluations over a few distinct
+                   transactions, every prompt sent upstream
+  gateway        - same burst with single-flight coalescing
+  slow LLM       - stub slower than FINSHIELD_LLM_TIMEOUT: calls time out
+                   and agents/decision fall back to the deterministic labels
+
+Reports upstream requests, TCP connections opened, and latency percentiles.
+
+Usage (from backend/):
+    python -m benchmarks.llm_gateway --requests 64 --distinct 8 --latency-ms 200
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+from benchmarks.stub_ollama import build_stub_app, serve_in_thread
+
+
+SAMPLE_TXN = {
+    "customerId": "CUST01",
+    "amount": 5000.0,
+    "merchant": "Amazon",
+    "location": "Mumbai",
+    "deviceId": "Android",
+    "timestamp": "2026-03-04T10:15:00",
+}
+
+
+async def burst(fraud_graph, stub, total: int, distinct: int, tag: str):
+    stub.state.requests = 0
+    stub.state.connections = set()
+    latencies = []
+
+    async def one(i):
+        txn = {**SAMPLE_TXN, "transactionId": f"{tag}-{i % distinct}", "amount": 5000.0 + i % distinct}
+        t0 = time.perf_counter()
+        result = await fraud_graph.aevaluate(txn)
+        latencies.append(time.perf_counter() - t0)
+        return result
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - t0
+
+    fallbacks = sum("Fallback" in result["nodes"][-1]["reasoning"] for result in results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    return wall, p50, p95, p99, stub.state.requests, len(stub.state.connections), fallbacks
+
+
+async def run(total: int, distinct: int, latency_ms: float, port: int):
+    import fraud_graph
+    from llm.gateway import gateway
+
+    stub = build_stub_app(latency_ms)
+    serve_in_thread(stub, port)
+
+    scenarios = [
+        ("no coalescing", dict(coalesce=False), latency_ms),
+        ("gateway", dict(coalesce=True), latency_ms),
+        ("slow LLM", dict(coalesce=True, timeout=latency_ms / 1000), latency_ms * 10),
+    ]
+    print(f"{total} concurrent evaluations over {distinct} distinct transactions, stub {latency_ms:.0f} ms, "
+          f"max concurrency {gateway.max_concurrency}")
+    for name, settings, stub_latency in scenarios:
+        for attribute, value in settings.items():
+            setattr(gateway, attribute, value)
+        stub.state.latency_ms = stub_latency
+        wall, p50, p95, p99, requests, connections, fallbacks = await burst(fraud_graph, stub, total, distinct, name)
+        print(
+            f"{name:>14} | wall {wall:6.2f}s | p50 {p50:7.0f} ms p95 {p95:7.0f} ms p99 {p99:7.0f} ms | "
+            f"upstream requests {requests:4d} | connections {connections:3d} | fallback decisions {fallbacks:3d}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--distinct", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--port", type=int, default=11501)
+    args = parser.parse_args()
+
+    # Must be set before the pipeline is imported
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{args.port}"
+    os.environ["FINSHIELD_FAST_PATH"] = "0"
+    os.environ["FINSHIELD_LLM_CACHE"] = "0"
+
+    asyncio.run(run(args.requests, args.distinct, args.latency_ms, args.port))
+
+
+if __name__ == "__main__":
+    main()
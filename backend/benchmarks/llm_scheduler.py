@@ -0,0 +1,145 @@
+# benchmarks/llm_scheduler.py
+"""
+LLM scheduling under overload: many escalated transactions in flight
+against a small gateway (--slots) and a stub LLM with fixed latency.
+Compares, on the same history rows,
+  - fifo:     queued calls served in arrival order
+  - priority: served by priority class (amount / deterministic pre-score)
+  - early:    priority + early BLOCK (remaining agent calls and the
+              decision call dropped once an agent reports risk >= 0.9)
+  - deadline: early + a per-transaction deadline (--deadline-ms), past
+              which the deterministic fallbacks answer
+and reports, per priority class, the mean gateway queue wait and the
+end-to-end latency p50/p95 of escalated transactions, plus LLM calls,
+early exits, deadline fallbacks and agreement of the action with fifo.
+
+Usage (from backend/):
+    python -m benchmarks.llm_scheduler --csv synthetic_transactions.csv --transactions 3000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import numpy as np
+
+
+VARIANTS = ("fifo", "priority", "early", "deadline")
+
+
+def _classes(fraud_graph, txns: list) -> list:
+    # The class the orchestrator assigns, or None for fast-path decisions
+    from agents.fast_path import deterministic_signals, fast_path_decision
+    from llm.scheduler import priority_class
+
+    classes = []
+    for txn in txns:
+        signals = deterministic_signals(fraud_graph._initial_state(txn))
+        if fast_path_decision(signals) is not None:
+            classes.append(None)
+            continue
+        score = sum(partial["nodes"][0]["risk"] for partial in signals) / len(signals)
+        classes.append(priority_class(txn.get("amount"), score))
+    return classes
+
+
+async def _run(fraud_graph, txns: list, concurrency: int, deadline_ms: float):
+    limit = asyncio.Semaphore(concurrency)
+    latencies = [None] * len(txns)
+    actions = [None] * len(txns)
+
+    async def one(position, txn):
+        async with limit:
+            t0 = time.perf_counter()
+            result = await fraud_graph.aevaluate(txn, deadline_ms=deadline_ms)
+            latencies[position] = (time.perf_counter() - t0) * 1e3
+            actions[position] = result["nodes"][-1]["action"]
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(position, txn) for position, txn in enumerate(txns)))
+    return np.array(latencies), actions, time.perf_counter() - t0
+
+
+async def run(count: int, concurrency: int, deadline_ms: float):
+    import fraud_graph
+    import metrics
+    from agents import decision_agent_llm
+    from benchmarks.replay import _csv_chunks, transactions
+    from history_store import default_csv_path
+    from llm import scheduler
+    from llm.gateway import gateway
+    from llm.scheduler import PRIORITY_CLASSES, scheduler_stats
+
+    txns = list(transactions(_csv_chunks(default_csv_path(), count)))
+    classes = np.array(_classes(fraud_graph, txns), dtype=object)
+    early_block_risk = decision_agent_llm.EARLY_BLOCK_RISK or 0.9
+    print(
+        f"{len(txns)} transactions ({sum(c is not None for c in classes)} escalated), "
+        f"concurrency {concurrency}, {gateway.max_concurrency} LLM slots"
+    )
+    print(
+        f"{'variant':>8} | {'class':>6} | {'txns':>5} | {'queue wait':>10} | {'p50 ms':>8} | {'p95 ms':>8} | "
+        f"{'LLM calls':>9} | {'early':>5} | {'cancelled':>9} | {'deadline':>8} | {'agree':>6} | {'wall s':>6}"
+    )
+
+    baseline = None
+    for variant in VARIANTS:
+        # Settings are read per call, so each variant just sets them
+        scheduler.PRIORITY_ENABLED = variant != "fifo"
+        decision_agent_llm.EARLY_BLOCK_RISK = early_block_risk if variant in ("early", "deadline") else 0
+        metrics.llm_queue_wait.reset()
+        calls = gateway.stats()["calls"]
+        before = scheduler_stats.snapshot()
+
+        latencies, actions, wall = await _run(fraud_graph, txns, concurrency, deadline_ms if variant == "deadline" else 0)
+        stats = {name: value - before[name] for name, value in scheduler_stats.snapshot().items()}
+        waits = metrics.llm_queue_wait.snapshot()
+        baseline = baseline or actions
+        agree = np.mean([a == b for a, b in zip(actions, baseline)])
+
+        for position, priority in enumerate(PRIORITY_CLASSES):
+            selected = latencies[classes == priority]
+            counts, total = waits.get(priority, ([0], 0.0))
+            wait_ms = total / sum(counts) * 1e3 if sum(counts) else float("nan")
+            p50, p95 = np.percentile(selected, [50, 95]) if len(selected) else (float("nan"),) * 2
+            tail = (
+                f" | {gateway.stats()['calls'] - calls:9d} | {stats['early_blocks']:5d} | {stats['cancelled_calls']:9d} | "
+                f"{stats['deadline_fallbacks']:8d} | {agree:6.1%} | {wall:6.2f}"
+                if position == 0 else ""
+            )
+            print(
+                f"{variant if position == 0 else '':>8} | {priority:>6} | {len(selected):5d} | {wait_ms:8.1f}ms | "
+                f"{p50:8.1f} | {p95:8.1f}{tail}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="history CSV to score and replay (default: the configured one)")
+    parser.add_argument("--transactions", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=256, help="transactions in flight")
+    parser.add_argument("--slots", type=int, default=4, help="gateway LLM concurrency")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub LLM latency per call")
+    parser.add_argument("--deadline-ms", type=float, default=2000.0)
+    args = parser.parse_args()
+
+    # Must be set before the pipeline is imported
+    if args.csv:
+        os.environ["FINSHIELD_HISTORY_CSV"] = args.csv
+        # Keep the default store (built from the usual CSV) intact
+        os.environ.setdefault("FINSHIELD_HISTORY_STORE", "history_store_replay")
+    # Measured with the fast path on (opt-in in deployments)
+    os.environ.setdefault("FINSHIELD_FAST_PATH", "1")
+    os.environ["FINSHIELD_LLM_PROVIDER"] = "stub"
+    os.environ["FINSHIELD_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ.setdefault("FINSHIELD_STUB_JITTER_MS", str(args.latency_ms / 2))
+    os.environ["FINSHIELD_LLM_MAX_CONCURRENCY"] = str(args.slots)
+    # Every variant must make its own calls
+    os.environ["FINSHIELD_LLM_CACHE"] = "0"
+    os.environ["FINSHIELD_LLM_TIMEOUT"] = "600"
+    asyncio.run(run(args.transactions, args.concurrency, args.deadline_ms))
+
+
+if __name__ == "__main__":
+    main()
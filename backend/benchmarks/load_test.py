@@ -0,0 +1,122 @@
+# benchmarks/load_test.py
+"""
+/fraud/check throughput vs. concurrency on a single uvicorn worker,
+against a local stub LLM server.
+
+"before" mounts the original blocking handler: inside an async route,
+the four agents run one after another and then the decision call, on
+the event loop thread (no fan-out, early exit or fast path). "after" is
+the real app with the async pipeline. The LLM response cache is off, so
+every request reaches the stub.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1 4 16 64 --requests 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.stub_ollama import build_stub_app, serve_in_thread
+
+
+SAMPLE_TXN = {
+    "transactionId": "LOAD-TEST",
+    "customerId": "CUST01",
+    "amount": 5000.0,
+    "merchant": "Amazon",
+    "location": "Mumbai",
+    "deviceId": "Android",
+    "timestamp": "2026-03-04T10:15:00",
+}
+
+
+def sequential_evaluate(txn: dict) -> dict:
+    """The pipeline before fan-out: each agent in turn, then the decision."""
+    from agents import decision_agent_llm as decision
+    from fraud_graph import _initial_state
+
+    state = decision._start_decision(_initial_state(txn, None))
+    results = []
+    for agent in decision.UPSTREAM_AGENTS:
+        try:
+            results.append(agent(state))
+        except Exception as e:
+            results.append(e)
+    state = decision._merge_with_fallbacks(state, results)
+    try:
+        messages = decision.build_decision_messages(state)
+        response = decision.gateway.invoke(decision.structured_model(), messages, decision.CACHE_NAMESPACE, decision.DecisionSchema)
+        result = response.model_dump()
+    except Exception:
+        result = decision.fallback_decision(state)
+    state = decision._record_decision(state, result)
+    return {"transaction": txn, "nodes": state["nodes"]}
+
+
+def build_blocking_app():
+    from fastapi import FastAPI
+    from app import TransactionRequest
+
+    blocking = FastAPI()
+
+    @blocking.post("/fraud/check")
+    async def check_fraud(txn: TransactionRequest):
+        return sequential_evaluate(txn.model_dump())
+
+    return blocking
+
+
+async def drive(url: str, concurrency: int, total: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(timeout=120) as client:
+
+        async def one(i):
+            async with semaphore:
+                t0 = time.perf_counter()
+                response = await client.post(url, json={**SAMPLE_TXN, "transactionId": f"LOAD-{i}"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - t0
+
+    return total / elapsed, statistics.median(latencies) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--stub-port", type=int, default=11500)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    serve_in_thread(build_stub_app(args.latency_ms), args.stub_port)
+    # Must be set before the agents construct their Ollama clients
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{args.stub_port}"
+    os.environ["FINSHIELD_LLM_CACHE"] = "0"
+
+    from app import app
+
+    targets = {
+        "before (sequential)": (build_blocking_app(), args.port),
+        "after (async)": (app, args.port + 1),
+    }
+    for label, (target_app, port) in targets.items():
+        serve_in_thread(target_app, port)
+        for concurrency in args.concurrency:
+            rps, p50 = asyncio.run(drive(f"http://127.0.0.1:{port}/fraud/check", concurrency, args.requests))
+            print(f"{label:<19} | concurrency {concurrency:>3} | {rps:7.2f} req/s | p50 {p50:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
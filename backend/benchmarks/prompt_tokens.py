@@ -0,0 +1,95 @@
+# benchmarks/prompt_tokens.py
+"""
+Prompt size per agent LLM call: characters and estimated tokens (~4
+characters per token) of the prompts the agents actually build, over
+transactions sampled from the history, plus the share of each prompt
+that is a static system prefix (reusable from Ollama's prefix cache).
+Prefill latency grows with prompt tokens, so this tracks the input side
+of LLM latency without a model.
+
+Usage (from backend/):
+    python -m benchmarks.prompt_tokens --transactions 500
+"""
+
+import argparse
+
+import numpy as np
+
+from llm.prompts import estimate_tokens, prompt_text
+
+
+def _transactions(fraud_graph, count: int) -> list:
+    customers = fraud_graph.history_store.customers
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "transactionId": f"PROMPT-{i}",
+            "customerId": str(customers[rng.integers(len(customers))]),
+            "amount": float(rng.lognormal(7, 1)),
+            "merchant": "Amazon",
+            "location": "Mumbai",
+            "deviceId": "Android",
+            "timestamp": f"2026-03-04T{rng.integers(24):02d}:15:00",
+            "latitude": 19.07 + float(rng.normal(0, 2)),
+            "longitude": 72.87 + float(rng.normal(0, 2)),
+        }
+        for i in range(count)
+    ]
+
+
+def _static_chars(prompt) -> int:
+    # Leading system messages are static per agent
+    if isinstance(prompt, (list, tuple)):
+        static = 0
+        for message in prompt:
+            if getattr(message, "type", None) != "system":
+                break
+            static += len(message.content)
+        return static
+    return 0
+
+
+def run(count: int):
+    import fraud_graph
+    from agents.behavioral_agent import build_behavioral_prompt
+    from agents.decision_agent_llm import build_decision_messages
+    from agents.fast_path import deterministic_signals
+    from agents.geo_agent import build_geo_messages
+    from agents.temporal_agent import build_temporal_messages
+
+    builders = {
+        "behavioral_agent": build_behavioral_prompt,
+        "temporal_agent": build_temporal_messages,
+        "geo_agent": build_geo_messages,
+        "decision_agent": build_decision_messages,
+    }
+    sizes = {agent: [] for agent in builders}
+    for txn in _transactions(fraud_graph, count):
+        state = fraud_graph._initial_state(txn)
+        # The decision prompt is built from the upstream results; the
+        # deterministic signals stand in for the LLM agents here
+        for partial in deterministic_signals(state):
+            state.update({key: v for key, v in partial.items() if key != "nodes"})
+        for agent, build in builders.items():
+            prompt = build(state)
+            sizes[agent].append((len(prompt_text(prompt)), estimate_tokens(prompt), _static_chars(prompt)))
+
+    print(f"{count} transactions (mean per call)")
+    print(f"{'agent':>18} | {'chars':>7} | {'~tokens':>8} | {'static prefix':>13}")
+    total = 0
+    for agent, rows in sizes.items():
+        chars, tokens, static = (np.mean(column) for column in zip(*rows))
+        total += tokens
+        print(f"{agent:>18} | {chars:7.0f} | {tokens:8.1f} | {static / chars:12.0%}")
+    print(f"{'escalated txn':>18} | {'':>7} | {total:8.1f} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=500)
+    args = parser.parse_args()
+    run(args.transactions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+# benchmarks/replay.py
+"""
+Offline replay harness: streams a history CSV (or synthetic transactions
+with the same schema) through the scoring pipeline against a stub LLM, and
+reports
+  - throughput (transactions/s)
+  - p50/p95/p99 per pipeline stage (from per-node timings)
+  - peak RSS
+  - prompt tokens per LLM call, per agent
+  - gateway queue wait per priority class, early exits and deadline fallbacks
+  - the decision distribution (fast path, LLM, fallback, errors)
+Results are written as JSON (--output) and can be compared with an earlier
+run (--compare) to catch throughput or decision regressions across commits.
+
+--llm stub (default) uses the in-process deterministic provider (answers
+derived from the tool scores, so decisions are meaningful); stub-server
+goes through the Ollama HTTP client to benchmarks/stub_ollama.py; ollama
+uses the configured Ollama.
+
+Replaying a CSV uses that CSV as the history too (every transaction is a
+replay of its own history row) unless --history-csv says otherwise.
+
+--workers N runs the deterministic stage in N scoring pool processes
+(FINSHIELD_SCORING_WORKERS); peak RSS then covers the main process only.
+Synthetic rows are scored against the configured history; build a matching
+one with `python -m benchmarks.synthetic` and pass it as --history-csv.
+
+--eval-mode fused scores with one combined LLM call per escalated
+transaction (FINSHIELD_EVALUATION_MODE); --compare against an agents run
+gives the throughput/latency side of the A/B (benchmarks/fused_ab.py
+measures agreement).
+
+Usage (from backend/):
+    python -m benchmarks.replay --csv synthetic_transactions.csv --limit 100000 --output replay.json
+    python -m benchmarks.replay --synthetic 1000000 --concurrency 64 --mode batch
+    python -m benchmarks.replay --synthetic 200000 --mode batch --workers 4
+    python -m benchmarks.replay --synthetic 100000 --eval-mode fused --compare replay.json
+    python -m benchmarks.replay --csv transactions.csv --compare replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+
+CHUNK_ROWS = 50_000
+# Decision-node timings that are pipeline stages rather than decision-agent steps
+PIPELINE_STAGES = ("history", "features", "velocity", "device_tool", "geo_tool", "total")
+
+
+# ---------- Input ----------
+
+def _csv_chunks(path, limit: int = None):
+    remaining = limit
+    for chunk in pd.read_csv(path, chunksize=CHUNK_ROWS):
+        if remaining is not None:
+            chunk = chunk.iloc[:remaining]
+            remaining -= len(chunk)
+        yield chunk
+        if remaining is not None and remaining <= 0:
+            return
+
+
+def _synthetic_chunks(rows: int, seed: int):
+    from benchmarks.synthetic import generate_transactions
+
+    customers = max(1, rows // 50)
+    for number, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        yield generate_transactions(min(CHUNK_ROWS, rows - start), customers, seed + number, start)
+
+
+def transactions(chunks):
+    """/fraud/check payloads from raw CSV-schema frames."""
+    for chunk in chunks:
+        frame = pd.DataFrame(
+            {
+                "transactionId": chunk["transaction_id"].astype(str),
+                "customerId": chunk["customer_id"].astype(str),
+                "amount": chunk["amount"].astype(float),
+                "merchant": chunk.get("merchant", ""),
+                "location": chunk.get("ip_country", ""),
+                "deviceId": chunk.get("device", ""),
+                "timestamp": chunk["timestamp"].astype(str),
+                "latitude": chunk.get("latitude"),
+                "longitude": chunk.get("longitude"),
+            }
+        )
+        for record in frame.to_dict("records"):
+            for key in ("latitude", "longitude"):
+                if record[key] is not None and pd.isna(record[key]):
+                    record[key] = None
+            yield record
+
+
+# ---------- Recording ----------
+
+class StageSamples:
+    """Per-stage latency samples (ms), reservoir-sampled past `capacity`."""
+
+    def __init__(self, capacity: int = 100_000, seed: int = 0):
+        self.capacity = capacity
+        self._random = random.Random(seed)
+        self._samples = {}
+        self._counts = Counter()
+
+    def add(self, stage: str, value: float):
+        self._counts[stage] += 1
+        samples = self._samples.setdefault(stage, [])
+        if len(samples) < self.capacity:
+            samples.append(value)
+        else:
+            slot = self._random.randrange(self._counts[stage])
+            if slot < self.capacity:
+                samples[slot] = value
+
+    def add_nodes(self, nodes: list):
+        for node in nodes:
+            for key, value in node.get("timings_ms", {}).items():
+                if node["id"] == "llm_agent":
+                    stage = key if key in PIPELINE_STAGES else f"decision_agent.{key}"
+                else:
+                    stage = f"{node['id']}.{key}"
+                self.add(stage, value)
+
+    def summary(self) -> dict:
+        summary = {}
+        for stage, samples in sorted(self._samples.items()):
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            summary[stage] = {
+                "count": self._counts[stage],
+                "mean_ms": round(float(np.mean(samples)), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+            }
+        return summary
+
+
+class Decisions:
+    def __init__(self):
+        self.actions = Counter()
+        self.decisions = Counter()
+        self.sources = Counter()
+
+    def add(self, result: dict):
+        if "error" in result:
+            self.sources["error"] += 1
+            return
+        node = result["nodes"][-1]
+        self.actions[node["action"]] += 1
+        self.decisions[node["decision"]] += 1
+        reasoning = node["reasoning"]
+        if reasoning.startswith("Fast path"):
+            source = "fast_path"
+        elif reasoning.startswith("Fallback"):
+            source = "fallback"
+        elif reasoning.startswith("Early exit"):
+            source = "early_block"
+        else:
+            source = "llm"
+        self.sources[source] += 1
+
+    def summary(self) -> dict:
+        return {"action": dict(self.actions), "decision": dict(self.decisions), "source": dict(self.sources)}
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mib() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+# ---------- Replay ----------
+
+async def _replay_single(fraud_graph, txns, concurrency: int, record):
+    # aevaluate() per transaction, at most `concurrency` in flight
+    pending = set()
+
+    async def one(txn):
+        try:
+            return await fraud_graph.aevaluate(txn, timings=True)
+        except Exception as e:
+            return {"transaction": txn, "error": str(e)}
+
+    for txn in txns:
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                record(task.result())
+        pending.add(asyncio.create_task(one(txn)))
+    for result in await asyncio.gather(*pending):
+        record(result)
+
+
+async def _replay_batch(fraud_graph, txns, concurrency: int, record):
+    async for result in fraud_graph.abatch_evaluate(txns, concurrency=concurrency, timings=True):
+        record(result)
+
+
+async def replay(txns, mode: str, concurrency: int, progress_every: int) -> dict:
+    import fraud_graph
+    import scoring_pool
+    from agents.fast_path import fast_path_stats
+    from llm.gateway import gateway
+    from llm.scheduler import scheduler_stats
+    from metrics import llm_prompt_tokens, llm_queue_wait
+
+    rss_loaded = _rss_mib()
+    samples = StageSamples()
+    decisions = Decisions()
+    count = 0
+    t0 = time.perf_counter()
+
+    def record(result):
+        nonlocal count
+        count += 1
+        decisions.add(result)
+        if "nodes" in result:
+            samples.add_nodes(result["nodes"])
+        if progress_every and count % progress_every == 0:
+            elapsed = time.perf_counter() - t0
+            print(f"  {count:>10,} transactions | {count / elapsed:8.1f}/s | RSS {_rss_mib():7.1f} MiB", file=sys.stderr)
+
+    runner = _replay_batch if mode == "batch" else _replay_single
+    await runner(fraud_graph, txns, concurrency, record)
+    wall = time.perf_counter() - t0
+    pool = scoring_pool.active()
+    pool_stats = pool.stats() if pool is not None else None
+    scoring_pool.stop()
+
+    return {
+        "transactions": count,
+        "wall_s": round(wall, 3),
+        "throughput_tps": round(count / wall, 2) if wall else None,
+        "stages": samples.summary(),
+        "memory": {
+            "rss_after_load_mib": round(rss_loaded, 1),
+            "rss_end_mib": round(_rss_mib(), 1),
+            "peak_rss_mib": round(_peak_rss_mib(), 1),
+        },
+        "decisions": decisions.summary(),
+        "llm_gateway": gateway.stats(),
+        "llm_prompt_tokens": {
+            agent: {"calls": sum(counts), "mean": round(total / sum(counts), 1)}
+            for agent, (counts, total) in sorted(llm_prompt_tokens.snapshot().items())
+        },
+        "llm_queue_wait": {
+            priority: {"calls": sum(counts), "mean_ms": round(total / sum(counts) * 1e3, 3)}
+            for priority, (counts, total) in sorted(llm_queue_wait.snapshot().items())
+        },
+        "llm_scheduler": scheduler_stats.snapshot(),
+        "fast_path": fast_path_stats.snapshot(),
+        "scoring_pool": pool_stats,
+    }
+
+
+# ---------- Reporting ----------
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: dict):
+    print(
+        f"{results['transactions']:,} transactions in {results['wall_s']:.1f}s "
+        f"-> {results['throughput_tps']:,.1f}/s | peak RSS {results['memory']['peak_rss_mib']:.0f} MiB"
+    )
+    print(f"{'stage':>26} | {'count':>9} | {'p50 ms':>9} | {'p95 ms':>9} | {'p99 ms':>9}")
+    for stage, row in results["stages"].items():
+        print(f"{stage:>26} | {row['count']:>9,} | {row['p50_ms']:>9.3f} | {row['p95_ms']:>9.3f} | {row['p99_ms']:>9.3f}")
+    for agent, tokens in results["llm_prompt_tokens"].items():
+        print(f"{agent:>26} | {tokens['calls']:>9,} LLM calls | {tokens['mean']:7.1f} prompt tokens/call")
+    for priority, wait in results["llm_queue_wait"].items():
+        print(f"{'queue wait ' + priority:>26} | {wait['calls']:>9,} LLM calls | {wait['mean_ms']:9.3f} ms mean")
+    for name, distribution in results["decisions"].items():
+        print(f"{name:>10}: " + ", ".join(f"{key} {value:,}" for key, value in sorted(distribution.items())))
+
+
+def print_comparison(results: dict, baseline: dict):
+    def change(new, old):
+        return f"{(new / old - 1) * 100:+7.1f}%" if old else "    n/a"
+
+    print(f"vs. {baseline['run'].get('commit')} ({baseline['run'].get('started_at')}):")
+    print(f"  throughput {results['throughput_tps']:,.1f}/s ({change(results['throughput_tps'], baseline['throughput_tps'])})")
+    print(f"  peak RSS   {results['memory']['peak_rss_mib']:.0f} MiB ({change(results['memory']['peak_rss_mib'], baseline['memory']['peak_rss_mib'])})")
+    for stage, row in results["stages"].items():
+        old = baseline["stages"].get(stage)
+        if old:
+            print(f"  {stage:>24} p99 {row['p99_ms']:9.3f} ms ({change(row['p99_ms'], old['p99_ms'])})")
+    # Same input should give the same decisions; a shift of a percentage
+    # point or more in any share is a quality change worth looking at
+    for name in ("action", "source"):
+        new, old = _shares(results["decisions"][name]), _shares(baseline["decisions"][name])
+        if any(abs(new.get(key, 0) - old.get(key, 0)) >= 0.01 for key in new.keys() | old.keys()):
+            print(f"  {name} distribution changed: {old} -> {new}")
+
+
+def _shares(counts: dict) -> dict:
+    total = sum(counts.values())
+    return {key: round(value / total, 3) for key, value in sorted(counts.items())} if total else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--csv", help="history-schema CSV to replay (default: the configured history CSV)")
+    source.add_argument("--synthetic", type=int, metavar="ROWS", help="replay ROWS generated transactions instead")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--history-csv", help="history to score against (default: --csv, else the configured one)")
+    parser.add_argument("--limit", type=int, help="replay at most this many rows")
+    parser.add_argument("--mode", choices=("single", "batch"), default="single",
+                        help="aevaluate() per transaction, or the chunked abatch_evaluate() path")
+    parser.add_argument("--eval-mode", choices=("agents", "fused"), default="agents",
+                        help="one LLM call per agent plus the decision, or one combined call")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="scoring pool processes for the deterministic stage (0: in-process)")
+    parser.add_argument("--llm", choices=("stub", "stub-server", "ollama"), default="stub")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub LLM latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub LLM error rate (--llm stub)")
+    parser.add_argument("--stub-port", type=int, default=11502)
+    parser.add_argument("--progress-every", type=int, default=10_000)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier --output JSON to compare against")
+    args = parser.parse_args()
+
+    # Must be set before the pipeline is imported
+    # Measured with the fast path on (opt-in in deployments)
+    os.environ.setdefault("FINSHIELD_FAST_PATH", "1")
+    os.environ["FINSHIELD_SCORING_WORKERS"] = str(args.workers)
+    os.environ["FINSHIELD_EVALUATION_MODE"] = args.eval_mode
+    history_csv = args.history_csv or args.csv
+    if history_csv:
+        os.environ["FINSHIELD_HISTORY_CSV"] = history_csv
+        # Keep the default store (built from the usual CSV) intact
+        os.environ.setdefault("FINSHIELD_HISTORY_STORE", "history_store_replay")
+    if args.llm == "stub":
+        os.environ["FINSHIELD_LLM_PROVIDER"] = "stub"
+        os.environ["FINSHIELD_STUB_LATENCY_MS"] = str(args.latency_ms)
+        os.environ["FINSHIELD_STUB_ERROR_RATE"] = str(args.error_rate)
+    elif args.llm == "stub-server":
+        from benchmarks.stub_ollama import build_stub_app, serve_in_thread
+
+        serve_in_thread(build_stub_app(args.latency_ms), args.stub_port)
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{args.stub_port}"
+
+    if args.synthetic:
+        rows = args.synthetic if args.limit is None else min(args.synthetic, args.limit)
+        chunks = _synthetic_chunks(rows, args.seed)
+    else:
+        from history_store import default_csv_path
+
+        chunks = _csv_chunks(args.csv or default_csv_path(), args.limit)
+
+    started_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    results = asyncio.run(replay(transactions(chunks), args.mode, args.concurrency, args.progress_every))
+    results = {
+        "run": {
+            "commit": _git_commit(),
+            "started_at": started_at,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+            "env": {key: value for key, value in sorted(os.environ.items()) if key.startswith("FINSHIELD_")},
+        },
+        **results,
+    }
+
+    print_report(results)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/simulation.py
+"""
+Simulation scoring throughput: the per-request path of /api/transaction
+(simulate() + JSON encoding per row) vs. the bulk path of
+/api/transaction/batch (vectorized scores, NDJSON assembled from per-score
+text), plus the array-only simulate_columns() rate. Checks every bulk line
+against simulate() on a sample. --http also posts one batch through the
+app (request parsing and streaming included).
+
+Usage (from backend/):
+    python -m benchmarks.simulation --rows 1000000
+    python -m benchmarks.simulation --rows 200000 --http
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import simulation
+import simulation_batch
+
+
+LOCATIONS = ["Mumbai", "Delhi", "Dubai", "Singapore", "London", "New York", "Lagos", "Paris"]
+DEVICES = ["iPhone 15", "Pixel 8", "New Android", "new-laptop", "MacBook", "Windows PC"]
+
+
+def _columns(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    amounts = np.round(rng.lognormal(9.5, 1.2, rows), 2).tolist()
+    locations = [LOCATIONS[i] for i in rng.integers(len(LOCATIONS), size=rows)]
+    devices = [DEVICES[i] for i in rng.integers(len(DEVICES), size=rows)]
+    return amounts, locations, devices
+
+
+def _rate(rows: int, seconds: float) -> str:
+    return f"{rows / seconds / 1e6:6.2f} M rows/s"
+
+
+def run(rows: int, http: bool):
+    amounts, locations, devices = _columns(rows)
+
+    sample = min(rows, 100_000)
+    t0 = time.perf_counter()
+    for amount, location, device in zip(amounts[:sample], locations[:sample], devices[:sample]):
+        json.dumps(simulation.simulate(amount, location, device))
+    scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    simulation_batch.simulate_columns(amounts, locations, devices)
+    columns = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    size = sum(len(chunk) for chunk in simulation_batch.ndjson_chunks(amounts, locations, devices))
+    ndjson = time.perf_counter() - t0
+
+    checked = min(rows, 10_000)
+    lines = next(simulation_batch.ndjson_chunks(amounts[:checked], locations[:checked], devices[:checked])).splitlines()
+    mismatches = 0
+    for line, amount, location, device in zip(lines, amounts, locations, devices):
+        row = json.loads(line)
+        expected = simulation.simulate(amount, location, device, row["processedAt"])
+        mismatches += {key: value for key, value in row.items() if key != "index"} != expected
+
+    print(f"{rows:,} rows")
+    print(f"  per-row simulate + json.dumps  {_rate(sample, scalar)}  ({sample:,} rows)")
+    print(f"  simulate_columns (arrays)      {_rate(rows, columns)}")
+    print(f"  bulk NDJSON                    {_rate(rows, ndjson)}  ({size / 2**20:,.0f} MiB, "
+          f"{scalar / sample / (ndjson / rows):.1f}x per-row)")
+    print(f"  mismatches vs simulate(): {mismatches} of {len(lines):,}")
+
+    if http:
+        from fastapi.testclient import TestClient
+
+        import app
+
+        body = {"amount": amounts, "location": locations, "device": devices}
+        with TestClient(app.app) as client:
+            t0 = time.perf_counter()
+            response = client.post("/api/transaction/batch", json=body)
+            returned = response.text.count("\n")
+            elapsed = time.perf_counter() - t0
+        print(f"  HTTP /api/transaction/batch    {_rate(returned, elapsed)}  (request encode/parse included)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--http", action="store_true", help="also time one request through the app")
+    args = parser.parse_args()
+    run(args.rows, args.http)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/stub_ollama.py
+"""
+Minimal Ollama-compatible stub server for load tests.
+
+Answers POST /api/chat with a single streamed NDJSON chunk whose content is
+a JSON object that satisfies every agent schema (behavioral, temporal, geo)
+and the decision agent, after a configurable delay.
+
+Usage (from backend/):
+    python -m benchmarks.stub_ollama --port 11500 --latency-ms 200
+    OLLAMA_HOST=http://127.0.0.1:11500 uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+
+STUB_CONTENT = {
+    "behavioral_risk": 0.2,
+    "behavioral_label": "Low",
+    "behavioral_reason": "Amount within historical range.",
+    "temporal_risk": 0.2,
+    "temporal_label": "Low",
+    "temporal_reason": "Transaction at a typical hour.",
+    "geo_risk": 0.2,
+    "geo_label": "Low",
+    "geo_reason": "Transaction near usual locations.",
+    "decision": "LOW_RISK",
+    "action": "ALLOW",
+    "reasoning": "Stub response.",
+}
+
+
+def build_stub_app(latency_ms: float = 200.0) -> FastAPI:
+    """
+    stub.state.latency_ms can be changed while serving; stub.state.requests
+    counts /api/chat calls and stub.state.connections the client sockets seen.
+    """
+    stub = FastAPI()
+    stub.state.latency_ms = latency_ms
+    stub.state.requests = 0
+    stub.state.connections = set()
+
+    @stub.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        stub.state.requests += 1
+        stub.state.connections.add((request.client.host, request.client.port) if request.client else None)
+        await asyncio.sleep(stub.state.latency_ms / 1000)
+        chunk = {
+            "model": body.get("model", "stub"),
+            "created_at": "2026-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": json.dumps(STUB_CONTENT)},
+            "done": True,
+            "done_reason": "stop",
+            # Reported like Ollama does (~4 characters per token here)
+            "prompt_eval_count": sum(len(message.get("content", "")) for message in body.get("messages", [])) // 4,
+            "eval_count": len(json.dumps(STUB_CONTENT)) // 4,
+        }
+        return Response(json.dumps(chunk) + "\n", media_type="application/x-ndjson")
+
+    return stub
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    """Run an ASGI app under uvicorn in a daemon thread; returns once it is accepting."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama-compatible stub LLM server.")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    uvicorn.run(build_stub_app(args.latency_ms), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/synthetic.py
+"""
+Synthetic transaction generator with the same schema as
+transactions.csv / synthetic_transactions.csv.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic --rows 1000000 --out synthetic_transactions.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+MERCHANTS = np.array(["Amazon", "Flipkart", "Apple", "Swiggy", "Zomato", "Uber", "Myntra", "BigBasket"])
+DEVICES = np.array(["Android", "iPhone", "Windows", "MacBook", "iPad", "Linux"])
+CITIES = [
+    # (latitude, longitude, ip_country)
+    (19.0760, 72.8777, "Mumbai_IN"),
+    (28.6139, 77.2090, "Delhi_IN"),
+    (12.9716, 77.5946, "Bangalore_IN"),
+    (25.2048, 55.2708, "Dubai_AE"),
+    (1.3521, 103.8198, "Singapore_SG"),
+    (40.7128, -74.0060, "USA"),
+]
+
+
+def generate_transactions(rows: int, customers: int = None, seed: int = 7, start: int = 0) -> pd.DataFrame:
+    """
+    Generate `rows` transactions spread over `customers` customers
+    (default: one customer per 50 rows). Columns use the raw CSV names.
+    Transaction ids are numbered from `start`, so chunks generated with
+    distinct seeds and consecutive starts never collide.
+    """
+    rng = np.random.default_rng(seed)
+    customers = customers or max(1, rows // 50)
+
+    customer_codes = rng.integers(0, customers, rows)
+    home_city = customer_codes % len(CITIES)
+    travelling = rng.random(rows) < 0.05
+    city = np.where(travelling, rng.integers(0, len(CITIES), rows), home_city)
+
+    city_lat = np.array([c[0] for c in CITIES])
+    city_lon = np.array([c[1] for c in CITIES])
+    city_country = np.array([c[2] for c in CITIES])
+
+    start = np.datetime64("2026-01-01T00:00:00")
+    offsets = rng.integers(0, 90 * 24 * 3600, rows).astype("timedelta64[s]")
+
+    return pd.DataFrame(
+        {
+            "transaction_id": np.char.add("TXN", np.arange(start, start + rows).astype(str)),
+            "customer_id": np.char.add("CUST", customer_codes.astype(str)),
+            "amount": rng.lognormal(7.5, 1.2, rows).round().astype(int),
+            "timestamp": (start + offsets).astype(str),
+            "latitude": (city_lat[city] + rng.normal(0, 0.02, rows)).round(4),
+            "longitude": (city_lon[city] + rng.normal(0, 0.02, rows)).round(4),
+            "merchant": MERCHANTS[rng.integers(0, len(MERCHANTS), rows)],
+            "device": DEVICES[(customer_codes + (rng.random(rows) < 0.1)) % len(DEVICES)],
+            "ip_country": city_country[city],
+        }
+    ).astype(
+        {
+            "transaction_id": object,
+            "customer_id": object,
+            "merchant": object,
+            "device": object,
+            "ip_country": object,
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic transactions.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--customers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="synthetic_transactions.csv")
+    args = parser.parse_args()
+
+    df = generate_transactions(args.rows, args.customers, args.seed)
+    df.to_csv(args.out, index=False)
+    print(f"Wrote {len(df):,} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/velocity.py
+"""
+Velocity features: boolean-mask scan of the customer's history per query
+vs. the per-customer time-sorted index (binary searches over timestamps
+and amount prefix sums), for one customer with N transactions. Each query
+computes the 10m / 1h / 24h counts and amount sums and the hop from the
+last located transaction. Also checks both agree, including after
+incremental adds.
+
+Usage (from backend/):
+    python -m benchmarks.velocity --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from tools.geo_tool import haversine_distance
+from tools.velocity_index import VELOCITY_WINDOWS, CustomerVelocityIndex, Velocity
+
+
+SPAN_NS = 365 * 86400 * 1_000_000_000
+START_NS = np.datetime64("2025-01-01T00:00:00", "ns").astype(np.int64)
+
+
+def _median_ms(fn, queries):
+    timings = []
+    for query in queries:
+        t0 = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - t0)
+    return np.median(timings) * 1e3
+
+
+def _history(rng, rows):
+    times = START_NS + rng.integers(0, SPAN_NS, rows)
+    amounts = rng.lognormal(7, 1, rows)
+    lats = 19.07 + rng.normal(0, 2, rows)
+    lons = 72.87 + rng.normal(0, 2, rows)
+    # A third of the history has no coordinates
+    unlocated = rng.random(rows) < 1 / 3
+    lats[unlocated] = np.nan
+    lons[unlocated] = np.nan
+    return times, amounts, lats, lons
+
+
+def scan_velocity(history, time_ns, lat, lon) -> Velocity:
+    """Reference implementation: one boolean mask per window over the full history."""
+    times, amounts, lats, lons = history
+    counts, sums = {}, {}
+    for label, seconds in VELOCITY_WINDOWS:
+        mask = (times >= time_ns - seconds * 1_000_000_000) & (times < time_ns)
+        counts[label], sums[label] = int(mask.sum()), float(np.nansum(amounts[mask]))
+
+    last_km = last_minutes = None
+    earlier = (times < time_ns) & ~np.isnan(lats)
+    if earlier.any():
+        candidates = np.flatnonzero(earlier)
+        last = candidates[np.argmax(times[candidates])]
+        last_km = haversine_distance(lats[last], lons[last], lat, lon)
+        last_minutes = (time_ns - times[last]) / 60e9
+    return Velocity(counts, sums, last_km, last_minutes)
+
+
+def _agrees(left: Velocity, right: Velocity) -> bool:
+    return (
+        left.counts == right.counts
+        and all(np.isclose(left.sums[label], right.sums[label]) for label, _ in VELOCITY_WINDOWS)
+        and np.isclose(left.last_km or 0.0, right.last_km or 0.0)
+    )
+
+
+def run(rows: int, queries: int):
+    rng = np.random.default_rng(0)
+    history = _history(rng, rows)
+
+    t0 = time.perf_counter()
+    index = CustomerVelocityIndex(history[0].view("datetime64[ns]"), *history[1:])
+    build_ms = (time.perf_counter() - t0) * 1e3
+
+    points = [
+        (int(START_NS + rng.integers(0, SPAN_NS)), 19.07 + rng.normal(0, 4), 72.87 + rng.normal(0, 4))
+        for _ in range(queries)
+    ]
+    scan_ms = _median_ms(lambda point: scan_velocity(history, *point), points[:50])
+    index_ms = _median_ms(lambda point: index.velocity(*point), points)
+    mismatches = sum(not _agrees(scan_velocity(history, *point), index.velocity(*point)) for point in points[:100])
+
+    # Incremental adds (pending buffers and merges): must still agree with a scan
+    added = _history(rng, max(1, rows // 20))
+    t0 = time.perf_counter()
+    for time_ns, amount, lat, lon in zip(*added):
+        located = not np.isnan(lat)
+        index.add(int(time_ns), amount, lat if located else None, lon if located else None)
+    add_us = (time.perf_counter() - t0) / len(added[0]) * 1e6
+    combined = tuple(np.concatenate(pair) for pair in zip(history, added))
+    mismatches += sum(not _agrees(scan_velocity(combined, *point), index.velocity(*point)) for point in points[:100])
+
+    print(
+        f"{rows:>9,} rows | build {build_ms:8.1f} ms | scan {scan_ms:8.3f} ms | "
+        f"index {index_ms:7.3f} ms | speedup {scan_ms / index_ms:7.1f}x | "
+        f"add {add_us:6.1f} us | mismatches {mismatches}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    for rows in args.sizes:
+        run(rows, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# customer_context.py
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+# Column name in the history frame -> CustomerContext field
+CONTEXT_COLUMNS = {
+    "transactionId": "transaction_ids",
+    "amount": "amounts",
+    "timestamp": "timestamps",
+    "hour": "hours",
+    "latitude": "latitudes",
+    "longitude": "longitudes",
+    "deviceId": "device_ids",
+}
+
+
+def history_columns(history: pd.DataFrame) -> dict:
+    """
+    Typed, read-only NumPy columns of the (customer-sorted) history, built
+    once at load. Slicing them yields views, so per-customer contexts cost
+    no copies. Missing columns become all-NaN / all-None arrays.
+    """
+    length = len(history)
+    columns = {}
+    for column, field in CONTEXT_COLUMNS.items():
+        if column not in history.columns:
+            array = np.full(length, None, dtype=object) if field in ("transaction_ids", "device_ids") else np.full(length, np.nan)
+        elif field in ("transaction_ids", "device_ids"):
+            array = history[column].to_numpy(dtype=object)
+        elif field == "timestamps":
+            array = history[column].to_numpy(dtype="datetime64[ns]")
+        else:
+            array = history[column].to_numpy(dtype=float)
+        array.flags.writeable = False
+        columns[field] = array
+    return columns
+
+
+@dataclass(frozen=True)
+class CustomerContext:
+    """
+    One customer's history for a single evaluation: typed NumPy columns
+    (read-only views into the shared history columns when nothing is
+    excluded), built once and shared by every agent and tool.
+    """
+
+    customer_id: object
+    transaction_ids: np.ndarray
+    amounts: np.ndarray
+    timestamps: np.ndarray
+    hours: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    device_ids: np.ndarray
+    # Rows dropped by exclude_txn_id (non-zero: the transaction is a replay)
+    excluded: int = 0
+    # Device ids of those rows ("" / None when unknown)
+    excluded_devices: tuple = ()
+
+    def __len__(self):
+        return len(self.transaction_ids)
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @classmethod
+    def from_columns(cls, customer_id, columns: dict, start: int, stop: int, exclude_txn_id=None) -> "CustomerContext":
+        """
+        Context over rows [start, stop) of the shared columns. Only a
+        transaction that is itself part of the slice (a replay) forces a
+        filtered copy; otherwise numeric fields are zero-copy views (text
+        fields interned by the history store are decoded per slice).
+        """
+        fields = {field: columns[field][start:stop] for field in CONTEXT_COLUMNS.values()}
+        excluded, excluded_devices = 0, ()
+        if exclude_txn_id is not None:
+            keep = fields["transaction_ids"] != exclude_txn_id
+            if not keep.all():
+                excluded = int(len(keep) - keep.sum())
+                excluded_devices = tuple(fields["device_ids"][~keep].tolist())
+                fields = {field: array[keep] for field, array in fields.items()}
+        return cls(customer_id=customer_id, excluded=excluded, excluded_devices=excluded_devices, **fields)
+
+    @classmethod
+    def from_frame(cls, customer_id, history: pd.DataFrame) -> "CustomerContext":
+        """Context for an arbitrary history frame (hand-built states, tools)."""
+        history = history if isinstance(history, pd.DataFrame) else pd.DataFrame(history)
+        if "timestamp" in history.columns and "hour" not in history.columns:
+            history = history.assign(timestamp=pd.to_datetime(history["timestamp"]))
+            history = history.assign(hour=history["timestamp"].dt.hour)
+        return cls(customer_id=customer_id, **history_columns(history))
+
+    @classmethod
+    def empty_for(cls, customer_id) -> "CustomerContext":
+        return cls.from_frame(customer_id, pd.DataFrame())
@@ -0,0 +1,239 @@
+# feature_store.py
+
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from customer_context import CustomerContext
+
+
+class CustomerFeatures:
+    """
+    Running aggregates for one customer, updated in O(1) per transaction:
+    amount count / Welford mean & variance / min / max, hour-of-day
+    histogram, device set and location centroid.
+    """
+
+    __slots__ = (
+        "count", "mean", "m2", "min", "max",
+        "hour_counts", "hour_total",
+        "devices", "lat_sum", "lon_sum", "located",
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.hour_counts = [0] * 24
+        self.hour_total = 0
+        self.devices = set()
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.located = 0
+
+    def copy(self) -> "CustomerFeatures":
+        """Independent snapshot (the hour histogram and device set are copied too)."""
+        snapshot = CustomerFeatures.__new__(CustomerFeatures)
+        for name in self.__slots__:
+            setattr(snapshot, name, getattr(self, name))
+        snapshot.hour_counts = list(self.hour_counts)
+        snapshot.devices = set(self.devices)
+        return snapshot
+
+    # ---------- Updates ----------
+
+    def update(self, amount=None, hour=None, device=None, lat=None, lon=None):
+        if amount is not None and not _is_nan(amount):
+            amount = float(amount)
+            self.count += 1
+            delta = amount - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (amount - self.mean)
+            self.min = min(self.min, amount)
+            self.max = max(self.max, amount)
+
+        if hour is not None:
+            self.hour_counts[int(hour)] += 1
+            self.hour_total += 1
+
+        if device is not None:
+            self.devices.add(device)
+
+        if lat is not None and lon is not None and not _is_nan(lat) and not _is_nan(lon):
+            self.lat_sum += float(lat)
+            self.lon_sum += float(lon)
+            self.located += 1
+
+    @classmethod
+    def from_context(cls, context: CustomerContext) -> "CustomerFeatures":
+        """Aggregates for one customer context (vectorized over its columns)."""
+        features = cls()
+        if context.empty:
+            return features
+
+        amounts = context.amounts[~np.isnan(context.amounts)]
+        if len(amounts):
+            features._set_amounts(len(amounts), amounts.mean(), ((amounts - amounts.mean()) ** 2).sum(), amounts.min(), amounts.max())
+
+        hours = context.hours[~np.isnan(context.hours)].astype(int)
+        features.hour_counts = np.bincount(hours, minlength=24).tolist()
+        features.hour_total = len(hours)
+
+        # Missing devices are None/NaN in frames, "" in the binary store
+        features.devices = {device for device in context.device_ids.tolist() if device != "" and not pd.isna(device)}
+
+        located = ~(np.isnan(context.latitudes) | np.isnan(context.longitudes))
+        features.lat_sum = float(context.latitudes[located].sum())
+        features.lon_sum = float(context.longitudes[located].sum())
+        features.located = int(located.sum())
+
+        return features
+
+    @classmethod
+    def from_frame(cls, history: pd.DataFrame) -> "CustomerFeatures":
+        """Aggregates for an arbitrary history frame."""
+        if history is None:
+            return cls()
+        return cls.from_context(CustomerContext.from_frame(None, history))
+
+    def _set_amounts(self, count, mean, m2, low, high):
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.min = float(low)
+        self.max = float(high)
+
+    # ---------- Reads ----------
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def typical_hours(self) -> list:
+        """Most frequent hour(s), ascending (same as Series.mode())."""
+        if not self.hour_total:
+            return []
+        peak = max(self.hour_counts)
+        return [hour for hour, count in enumerate(self.hour_counts) if count == peak]
+
+    @property
+    def average_hour(self):
+        if not self.hour_total:
+            return None
+        return sum(hour * count for hour, count in enumerate(self.hour_counts)) / self.hour_total
+
+    @property
+    def active_hours(self) -> set:
+        return {hour for hour, count in enumerate(self.hour_counts) if count}
+
+    @property
+    def centroid(self):
+        if not self.located:
+            return None
+        return self.lat_sum / self.located, self.lon_sum / self.located
+
+
+def _is_nan(value) -> bool:
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _hour(timestamp):
+    if timestamp is None or timestamp == "":
+        return None
+    try:
+        return pd.Timestamp(timestamp).hour
+    except (TypeError, ValueError):
+        return None
+
+
+class FeatureStore:
+    """
+    Per-customer running aggregates, served from history columns by
+    attach(): a customer is aggregated on first access (O(k)), so startup
+    stays O(1). record() folds each newly scored transaction in, in O(1).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._features = {}
+        self._columns = None
+        self._ranges = {}
+
+    def attach(self, columns: dict, customer_index):
+        """Lazily aggregate customers from CustomerContext-style columns."""
+        with self._lock:
+            self._features = {}
+            self._columns = columns
+            self._ranges = customer_index
+
+    def _materialize(self, customer_id):
+        # Caller holds the lock
+        features = self._features.get(customer_id)
+        if features is None and self._columns is not None:
+            bounds = self._ranges.get(customer_id)
+            if bounds is not None:
+                context = CustomerContext.from_columns(customer_id, self._columns, *bounds)
+                features = self._features[customer_id] = CustomerFeatures.from_context(context)
+        return features
+
+    def get(self, customer_id) -> CustomerFeatures:
+        """
+        Snapshot of the current features (an empty aggregate for unknown
+        customers), taken under the lock: record() may be updating the
+        shared aggregate while agents read it.
+        """
+        with self._lock:
+            features = self._materialize(customer_id)
+            return features.copy() if features is not None else CustomerFeatures()
+
+    def record(self, txn: dict):
+        """Fold one transaction into its customer's aggregates (O(1))."""
+        customer_id = txn.get("customerId") or txn.get("customer_id")
+        if customer_id is None:
+            return
+        with self._lock:
+            features = self._materialize(customer_id)
+            if features is None:
+                features = self._features[customer_id] = CustomerFeatures()
+            features.update(
+                amount=txn.get("amount"),
+                hour=_hour(txn.get("timestamp")),
+                device=txn.get("deviceId") or txn.get("device"),
+                lat=txn.get("latitude"),
+                lon=txn.get("longitude"),
+            )
+
+
+# Process-wide store, attached to the history by fraud_graph at load
+feature_store = FeatureStore()
+
+
+def features_from_state(state: dict) -> CustomerFeatures:
+    """
+    Features for an agent state: the precomputed ones when fraud_graph
+    supplied them, otherwise aggregated from the context or history the
+    state carries.
+    """
+    features = state.get("features")
+    if features is not None:
+        return features
+    if state.get("context") is not None:
+        return CustomerFeatures.from_context(state["context"])
+
+    history = (
+        state.get("customer_txns")
+        if state.get("customer_txns") is not None
+        else state.get("transaction_history", [])
+    )
+    if not isinstance(history, pd.DataFrame):
+        history = pd.DataFrame(history)
+    return CustomerFeatures.from_frame(history)
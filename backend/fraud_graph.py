@@ -1,55 +1,374 @@
 # fraud_graph.py
-import pandas as pd
-import math
-from pathlib import Path
+import asyncio
+import os
+import time
 
+from llm.registry import load_env
 
-from agents.decision_agent_llm import decision_agent_llm
+# Settings in the modules below are read at import time; load .env first
+load_env()
 
-# Load CSV once at startup
-_csv_candidates = ["synthetic_transactions.csv", "transactions.csv"]
-_csv_path = next((p for p in _csv_candidates if Path(p).exists()), _csv_candidates[-1])
-transaction_history = pd.read_csv(_csv_path)
+import scoring_pool
+from agents.decision_agent_llm import decision_agent_llm, adecision_agent_llm, fused_decision_agent, afused_decision_agent
+from customer_context import CustomerContext
+from feature_store import CustomerFeatures, feature_store
+from history_store import load_history_store
+from llm.scheduler import deadline_after
+from metrics import NODE_TIMINGS, stage
+from tools.device_index import device_indexes
+from tools.geo_index import GEO_TREE_MIN_POINTS, geo_indexes
+from tools.geo_tool import geo_risk_scores, with_travel_check
+from tools.velocity_index import velocity_indexes
 
-# Normalize columns so tools/agents can rely on consistent names
-transaction_history = transaction_history.rename(
-    columns={
-        "transaction_id": "transactionId",
-        "customer_id": "customerId",
-        "device": "deviceId",
-    }
-)
-if "timestamp" in transaction_history.columns:
-    transaction_history["timestamp"] = pd.to_datetime(transaction_history["timestamp"])
+# Memory-map the columnar history store (converted from the CSV on first
+# start or when the CSV changes); workers share its pages via the page cache
+history_store = load_history_store()
+customer_index = history_store.customer_index
+# Typed, read-only NumPy columns shared by every CustomerContext
+context_columns = history_store.context_columns
+
+geo_indexes.attach(context_columns, customer_index)
+feature_store.attach(context_columns, customer_index)
+velocity_indexes.attach(context_columns, customer_index)
+device_indexes.attach(context_columns, customer_index)
+
+# Orchestrator per evaluation mode: (sync, async). "agents" runs one LLM
+# call per agent plus the decision; "fused" a single combined call.
+# Selectable per request; FINSHIELD_EVALUATION_MODE sets the default.
+ORCHESTRATORS = {
+    "agents": (decision_agent_llm, adecision_agent_llm),
+    "fused": (fused_decision_agent, afused_decision_agent),
+}
+EVALUATION_MODE = os.getenv("FINSHIELD_EVALUATION_MODE", "agents")
+
+
+def orchestrator(mode: str = None, asynchronous: bool = False):
+    mode = EVALUATION_MODE if mode is None else mode
+    if mode not in ORCHESTRATORS:
+        raise ValueError(f"Unknown evaluation mode {mode!r} (known: {', '.join(ORCHESTRATORS)})")
+    return ORCHESTRATORS[mode][1 if asynchronous else 0]
 
-def sigmoid(x):
-    """Sigmoid function to normalize risk between 0 and 1 smoothly."""
-    return 1 / (1 + math.exp(-x))
+# FINSHIELD_SCORING_WORKERS > 0: async scoring runs the deterministic stage
+# in worker processes mapping the same store (no-op inside those workers)
+scoring_pool.start()
 
-def evaluate(txn: dict):
+
+def customer_context(customer_id, txn_id=None) -> CustomerContext:
     """
-    Dynamic evaluation of a transaction based on historical data.
-    Returns LangGraph-style nodes with realistic risk scoring.
+    Read-only context over a customer's history (loaded plus ingested),
+    excluding the transaction being evaluated (if it is already part of the
+    history). Fields are views into context_columns unless an exclusion
+    applies or transactions were ingested for the customer.
     """
+    return history_store.context(customer_id, txn_id)
+
+
+def _transaction_keys(txn: dict):
     customer_id = txn.get("customerId") or txn.get("customer_id")
     txn_id = txn.get("transactionId") or txn.get("transaction_id")
-    customer_txns = transaction_history[transaction_history["customerId"] == customer_id]
-    if txn_id is not None and "transactionId" in customer_txns.columns:
-        customer_txns = customer_txns[customer_txns["transactionId"] != txn_id]
-
-    nodes = []
-    state = {
-    "txn": txn,
-    "customer_txns": customer_txns,
-    
-    "nodes": nodes
+    return customer_id, txn_id
+
+
+def _customer_features(customer_id, context: CustomerContext):
+    """
+    Running aggregates for the customer. A transaction replayed from the
+    history must not count itself, so its features are rebuilt from the
+    filtered context instead (O(k), replays only).
+    Returns (features, replayed).
+    """
+    replayed = context.excluded > 0
+    if replayed:
+        return CustomerFeatures.from_context(context), True
+    return feature_store.get(customer_id), False
+
+
+def _initial_state(txn: dict, timings: dict = None) -> dict:
+    """
+    Deterministic stage: the customer's shared context, running features,
+    windowed velocity, the device index lookup (device_tool), and the geo
+    nearest-neighbour query on the customer's spatial index checked for
+    impossible travel (reused by the geo agent as geo_tool). Stage timings go to `timings` (a dict, reported on the
+    decision node) when given.
+    """
+    customer_id, txn_id = _transaction_keys(txn)
+    with stage("history", timings):
+        context = customer_context(customer_id, txn_id)
+    with stage("features", timings):
+        features, replayed = _customer_features(customer_id, context)
+    with stage("velocity", timings):
+        velocity = velocity_indexes.velocity(txn)
+    with stage("device_tool", timings):
+        device_tool = device_indexes.risk_score(txn, context.excluded_devices)
+    with stage("geo_tool", timings):
+        geo_tool = with_travel_check(geo_indexes.risk_score(txn), velocity)
+    return {
+        "txn": txn,
+        "context": context,
+        "features": features,
+        "replayed": replayed,
+        "velocity": velocity,
+        "device_tool": device_tool,
+        "geo_tool": geo_tool,
+        "nodes": [],
+        "timings": timings,
     }
 
-    # ---------- Orchestrator (LLM Decision Agent) ----------
-    # Decision agent orchestrates: behavioral -> temporal -> geo -> device -> decision
-    state = decision_agent_llm(state)
+
+def ingest(txn: dict, check_loaded: bool = True) -> bool:
+    """
+    Append a transaction to the live history and fold it into the
+    incremental structures (feature store, geo, velocity and device indexes). Returns False, and
+    changes nothing, if its transaction id is already in the history.
+    """
+    if not history_store.append(txn, check_loaded=check_loaded):
+        return False
+    customer_id, txn_id = _transaction_keys(txn)
+    feature_store.record(txn)
+    velocity_indexes.add(txn)
+    device_indexes.add(txn)
+    # Rows without coordinates count as geo history too, as in the loaded one
+    geo_indexes.add(customer_id, txn.get("latitude"), txn.get("longitude"), txn_id)
+    pool = scoring_pool.active()
+    if pool is not None:
+        pool.forward(txn)
+    return True
+
+
+def ingest_many(txns) -> int:
+    """ingest() each transaction; returns how many were new."""
+    return sum(ingest(txn) for txn in txns)
+
+
+def record_scored(state: dict):
+    """
+    Ingest a freshly scored transaction if the LLM or the fast-path rules
+    ALLOWed it. REVIEWed and BLOCKed transactions, and decisions from the
+    failure fallback, stay out of the history so they never become the
+    customer's baseline. Replays are already part of the history; the
+    context lookup already showed anything else is not in the loaded
+    history, so only the append log is checked for duplicates.
+    """
+    if state.get("replayed") or state.get("action") != "ALLOW" or state.get("fallback"):
+        return
+    ingest(state["txn"], check_loaded=False)
+
+
+def evaluate(txn: dict, timings: bool = None, mode: str = None, deadline_ms: float = None):
+    """
+    Dynamic evaluation of a transaction based on historical data.
+    Returns LangGraph-style nodes with realistic risk scoring; with
+    `timings` (default FINSHIELD_NODE_TIMINGS) each node carries its stage
+    timings in milliseconds as "timings_ms". `mode` picks the orchestrator
+    ("agents" or "fused", default FINSHIELD_EVALUATION_MODE); both return
+    the same nodes. LLM calls still pending `deadline_ms` (default
+    FINSHIELD_LLM_DEADLINE_MS, 0: none) after the call started give way to
+    the deterministic fallbacks.
+    """
+    decide = orchestrator(mode)
+    timings = {} if (NODE_TIMINGS if timings is None else timings) else None
+    deadline = deadline_after(deadline_ms, time.monotonic())
+    # The decision node references `timings`, so "total" lands there too
+    with stage("total", timings):
+        state = _initial_state(txn, timings)
+        state["deadline"] = deadline
+
+        # ---------- Orchestrator (LLM Decision Agent) ----------
+        # Decision agent orchestrates: behavioral | temporal | geo | device -> decision
+        state = decide(state)
+        record_scored(state)
 
     return {
     "transaction": txn,
-    "nodes": nodes
-    }
\ No newline at end of file
+    "nodes": state["nodes"]
+    }
+
+
+async def aevaluate(txn: dict, timings: bool = None, mode: str = None, deadline_ms: float = None):
+    """
+    Async evaluation: same response as evaluate(), but the deterministic
+    stage runs in the default executor (or the scoring pool, timed as one
+    "pool" stage) and all LLM calls are awaited, so one event loop can keep
+    many transactions in flight.
+    """
+    decide = orchestrator(mode, asynchronous=True)
+    timings = {} if (NODE_TIMINGS if timings is None else timings) else None
+    deadline = deadline_after(deadline_ms, time.monotonic())
+    loop = asyncio.get_running_loop()
+    pool = scoring_pool.active()
+    with stage("total", timings):
+        if pool is not None:
+            with stage("pool", timings):
+                state = (await pool.prepare_batch_states([txn]))[0]
+            state["timings"] = timings
+        else:
+            state = await loop.run_in_executor(None, _initial_state, txn, timings)
+        state["deadline"] = deadline
+
+        state = await decide(state)
+        record_scored(state)
+
+    return {
+        "transaction": txn,
+        "nodes": state["nodes"],
+    }
+
+
+# ---------- Batch scoring ----------
+
+def batch_customer_contexts(txns: list) -> list:
+    """
+    Customer contexts for a whole batch. Each distinct customer's context is
+    built once and shared by all of the customer's transactions; only a
+    transaction that is itself part of the history gets a filtered context.
+    """
+    contexts = {}
+    results = []
+
+    for txn in txns:
+        customer_id, txn_id = _transaction_keys(txn)
+        if customer_id not in contexts:
+            context = customer_context(customer_id)
+            contexts[customer_id] = (context, set(context.transaction_ids.tolist()))
+
+        context, known_ids = contexts[customer_id]
+        if txn_id is not None and txn_id in known_ids:
+            context = customer_context(customer_id, txn_id)
+        results.append(context)
+
+    return results
+
+
+def batch_geo_risk_scores(txns: list, contexts: list) -> list:
+    """
+    Geo tool for a batch. Customers with short histories (fewer rows than
+    it takes to get a KD-tree) are scored together by the packed bulk
+    kernel over their contexts; the rest query their geo index.
+    """
+    results = [None] * len(txns)
+    short = [i for i, context in enumerate(contexts) if len(context) < GEO_TREE_MIN_POINTS]
+    for i, result in zip(short, geo_risk_scores([txns[i] for i in short], [contexts[i] for i in short])):
+        results[i] = result
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = geo_indexes.risk_score(txns[i])
+    return results
+
+
+def prepare_batch_states(txns: list, timings: bool = False) -> list:
+    """
+    Deterministic stage for a batch: customer contexts plus the geo and
+    device index lookups run in bulk, and per-transaction velocity, stored
+    on each state for the agents to reuse.
+    Bulk stages are timed per batch ("batch.*" histograms).
+    """
+    with stage("batch.history"):
+        contexts = batch_customer_contexts(txns)
+    with stage("batch.device_tool"):
+        device_results = device_indexes.risk_scores(txns, [context.excluded_devices for context in contexts])
+    with stage("batch.velocity"):
+        velocities = [velocity_indexes.velocity(txn) for txn in txns]
+    with stage("batch.geo_tool"):
+        geo_results = batch_geo_risk_scores(txns, contexts)
+
+    states = []
+    for txn, context, device_result, geo_result, velocity in zip(txns, contexts, device_results, geo_results, velocities):
+        features, replayed = _customer_features(_transaction_keys(txn)[0], context)
+        states.append(
+            {
+                "txn": txn,
+                "context": context,
+                "features": features,
+                "replayed": replayed,
+                "velocity": velocity,
+                "device_tool": device_result,
+                "geo_tool": with_travel_check(geo_result, velocity),
+                "nodes": [],
+                "timings": {} if timings else None,
+            }
+        )
+    return states
+
+
+async def _ascore_state(index: int, state: dict, decide, deadline_ms: float = None) -> dict:
+    state["deadline"] = deadline_after(deadline_ms)
+    with stage("total", state["timings"]):
+        try:
+            state = await decide(state)
+        except Exception as e:
+            return {"index": index, "transaction": state["txn"], "error": str(e)}
+        record_scored(state)
+    return {"index": index, "transaction": state["txn"], "nodes": state["nodes"]}
+
+
+async def abatch_evaluate(txns, concurrency: int = 16, chunk_size: int = 256, validate=None, timings: bool = None, mode: str = None, deadline_ms: float = None):
+    """
+    Score an (async) iterable of transactions and yield results as they
+    complete, tagged with their input position as "index".
+
+    Input is consumed in chunks of `chunk_size`: each chunk gets its customer
+    contexts and deterministic tools computed in bulk (in the executor, or
+    split across the scoring pool's workers by customer), then
+    its transactions go through the agent pipeline with at most `concurrency`
+    in flight. Memory stays bounded by chunk_size + concurrency regardless
+    of batch size. `validate` may normalize or reject (raise on) each item;
+    rejected items are reported as error results. `timings`, `mode` and
+    `deadline_ms` as in evaluate(); batch "total" timings and deadlines
+    start when a transaction's agents start.
+    """
+    decide = orchestrator(mode, asynchronous=True)
+    timings = NODE_TIMINGS if timings is None else timings
+    loop = asyncio.get_running_loop()
+    pool = scoring_pool.active()
+    pending = set()
+
+    async def drain(until: int):
+        nonlocal pending
+        while len(pending) > until:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+    async def flush(chunk):
+        if pool is not None:
+            with stage("batch.pool"):
+                states = await pool.prepare_batch_states([txn for _, txn in chunk], timings)
+        else:
+            states = await loop.run_in_executor(None, prepare_batch_states, [txn for _, txn in chunk], timings)
+        for (index, _), state in zip(chunk, states):
+            async for result in drain(concurrency - 1):
+                yield result
+            pending.add(asyncio.create_task(_ascore_state(index, state, decide, deadline_ms)))
+
+    chunk = []
+    index = 0
+    async for txn in _aiter(txns):
+        if validate is not None:
+            try:
+                txn = validate(txn)
+            except Exception as e:
+                yield {"index": index, "transaction": txn, "error": str(e)}
+                index += 1
+                continue
+
+        chunk.append((index, txn))
+        index += 1
+        if len(chunk) >= chunk_size:
+            async for result in flush(chunk):
+                yield result
+            chunk = []
+
+    if chunk:
+        async for result in flush(chunk):
+            yield result
+
+    async for result in drain(0):
+        yield result
+
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,664 @@
+# history_store.py
+"""
+Columnar binary history store.
+
+The transaction CSV is converted once into one `.npy` file per column,
+rows sorted by customer, plus the sorted customer ids and their row
+offsets. Workers memory-map the columns at startup instead of parsing the
+CSV, so cold start is O(1) in the history size and every worker shares the
+same pages through the OS page cache. Columns are stored compactly:
+repetitive text (customers, devices, merchants) as int32 codes into a
+shared dictionary, transaction ids as ASCII bytes, whole-number columns
+as the narrowest integer type and coordinates as float32.
+
+Usage (from backend/):
+    python -m history_store --csv transactions.csv --out history_store
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from customer_context import CONTEXT_COLUMNS, CustomerContext
+
+
+HISTORY_CSV_CANDIDATES = ["synthetic_transactions.csv", "transactions.csv"]
+HISTORY_CSV = os.getenv("FINSHIELD_HISTORY_CSV")
+HISTORY_STORE_DIR = os.getenv("FINSHIELD_HISTORY_STORE", "history_store")
+
+# Appended transactions: rows per column-buffer chunk, and pending rows
+# before the chunks are compacted into the customer-sorted run
+HISTORY_CHUNK_ROWS = int(os.getenv("FINSHIELD_HISTORY_CHUNK_ROWS", "4096"))
+HISTORY_COMPACT_ROWS = int(os.getenv("FINSHIELD_HISTORY_COMPACT_ROWS", "32768"))
+
+FORMAT_VERSION = 2
+MANIFEST = "manifest.json"
+
+# Identifier columns are always stored as text
+TEXT_COLUMNS = {"transactionId", "customerId", "deviceId"}
+
+# Text columns unique per row, kept as text (ASCII bytes when they fit);
+# every other text column is interned
+UNIQUE_TEXT_COLUMNS = {"transactionId"}
+
+# Numeric columns always stored as float32 (~1 m for coordinates)
+FLOAT32_COLUMNS = {"latitude", "longitude"}
+
+# Raw CSV column -> canonical name used by tools/agents
+COLUMN_RENAMES = {
+    "transaction_id": "transactionId",
+    "customer_id": "customerId",
+    "device": "deviceId",
+}
+
+
+def normalize_history(history: pd.DataFrame) -> pd.DataFrame:
+    """Canonical column names, parsed timestamps and the derived hour."""
+    history = history.rename(columns=COLUMN_RENAMES)
+    if "timestamp" in history.columns:
+        history["timestamp"] = pd.to_datetime(history["timestamp"])
+        history["hour"] = history["timestamp"].dt.hour
+    return history
+
+
+def build_customer_index(history: pd.DataFrame):
+    """
+    Sort history so each customer's rows are contiguous and map
+    customerId -> (start, stop) row offsets into the sorted frame.
+    The stable sort keeps each customer's rows in their original order.
+    """
+    if history.empty or "customerId" not in history.columns:
+        return history.reset_index(drop=True), {}
+
+    history = history.sort_values("customerId", kind="stable").reset_index(drop=True)
+    return history, _customer_ranges(history["customerId"].to_numpy())
+
+
+def _customer_ranges(ids: np.ndarray) -> dict:
+    # ids must be grouped by customer
+    if not len(ids):
+        return {}
+    boundaries = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    stops = np.concatenate((boundaries, [len(ids)]))
+    return {ids[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+
+class CustomerIndex(Mapping):
+    """
+    customerId -> (start, stop), answered by binary search over the sorted
+    customer ids, so loading does not build a per-customer dict.
+    """
+
+    def __init__(self, customers: np.ndarray, offsets: np.ndarray):
+        self._customers = customers
+        self._offsets = offsets
+
+    def __getitem__(self, customer_id):
+        if customer_id is None:
+            raise KeyError(customer_id)
+        key = str(customer_id)
+        position = int(np.searchsorted(self._customers, key))
+        if position == len(self._customers) or self._customers[position] != key:
+            raise KeyError(customer_id)
+        return int(self._offsets[position]), int(self._offsets[position + 1])
+
+    def __iter__(self):
+        return iter(self._customers.tolist())
+
+    def __len__(self):
+        return len(self._customers)
+
+
+# ---------- Compact columns ----------
+
+class InternedColumn:
+    """
+    Text column as int32 codes into a sorted dictionary of its distinct
+    values (-1: missing). Indexing decodes, missing values to "", so slices
+    read like the plain text column; equality filters compare codes
+    instead (code()). The customerId column's dictionary is the store's
+    sorted customer ids, shared with the customer index.
+    """
+
+    def __init__(self, codes: np.ndarray, dictionary: np.ndarray):
+        self.codes = codes
+        self.dictionary = dictionary
+        # Trailing "" so that code -1 decodes without a mask
+        self._values = np.append(dictionary, "")
+        self.codes.flags.writeable = False
+
+    @classmethod
+    def encode(cls, values: np.ndarray, dictionary: np.ndarray) -> "InternedColumn":
+        """Codes of `values` (str, "" for missing) in a sorted dictionary holding all of them."""
+        codes = np.searchsorted(dictionary, values).astype(np.int32)
+        codes[values == ""] = -1
+        return cls(codes, dictionary)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, key):
+        return self._values[self.codes[key]]
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+    @property
+    def dtype(self):
+        return self._values.dtype
+
+    def code(self, value) -> int:
+        """Code of `value`, or -1 when it does not occur in the column."""
+        position = int(np.searchsorted(self.dictionary, str(value)))
+        if position < len(self.dictionary) and self.dictionary[position] == str(value):
+            return position
+        return -1
+
+    def value(self, code: int) -> str:
+        return str(self._values[code])
+
+
+class BytesColumn:
+    """
+    ASCII text column stored as fixed-width bytes, a quarter of the size of
+    NumPy's UCS-4 str arrays. Indexing decodes to str.
+    """
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+        self.data.flags.writeable = False
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        values = self.data[key]
+        return values.decode() if isinstance(values, bytes) else values.astype(str)
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+    @property
+    def dtype(self):
+        return np.dtype(f"<U{self.data.dtype.itemsize}")
+
+
+def _text_column(values: np.ndarray, column):
+    if column in UNIQUE_TEXT_COLUMNS:
+        try:
+            return BytesColumn(values.astype("S"))
+        except UnicodeEncodeError:
+            return values
+    uniques = pd.unique(values)
+    return InternedColumn.encode(values, np.sort(np.asarray(uniques[uniques != ""], dtype=str)))
+
+
+def _numeric_array(values: np.ndarray, column) -> np.ndarray:
+    if column in FLOAT32_COLUMNS:
+        return values.astype(np.float32)
+    # Whole numbers without gaps (amounts in whole units, hours, flags)
+    # take the narrowest integer type that holds them; the rest stay
+    # float64 so amounts in cents remain exact
+    if len(values) and not np.isnan(values).any() and (values == np.round(values)).all():
+        for dtype in (np.int8, np.int16, np.int32, np.int64):
+            if np.iinfo(dtype).min <= values.min() and values.max() <= np.iinfo(dtype).max:
+                return values.astype(dtype)
+    return values
+
+
+def _column_array(series: pd.Series):
+    # Fixed-width types only, so every column can be memory-mapped
+    if series.name in TEXT_COLUMNS:
+        return _text_column(series.fillna("").astype(str).to_numpy(dtype=str), series.name)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]")
+    if pd.api.types.is_numeric_dtype(series):
+        return _numeric_array(series.to_numpy(dtype=float), series.name)
+    return _text_column(series.fillna("").astype(str).to_numpy(dtype=str), series.name)
+
+
+# ---------- Live appends ----------
+
+# Append-log columns: the CustomerContext fields plus the owning customer
+LOG_FIELDS = {
+    "customer_ids": object,
+    "transaction_ids": object,
+    "amounts": float,
+    "timestamps": "datetime64[ns]",
+    "hours": float,
+    "latitudes": float,
+    "longitudes": float,
+    "device_ids": object,
+}
+
+
+def _log_fields(length: int = 0) -> dict:
+    return {field: np.empty(length, dtype=dtype) for field, dtype in LOG_FIELDS.items()}
+
+
+def _optional_float(value) -> float:
+    try:
+        return np.nan if value is None or value == "" else float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def log_row(txn: dict):
+    """Append-log row (LOG_FIELDS) for a raw or canonical transaction dict."""
+    customer_id = txn.get("customerId") or txn.get("customer_id")
+    if customer_id is None:
+        return None
+
+    try:
+        timestamp = pd.Timestamp(txn.get("timestamp")) if txn.get("timestamp") else pd.NaT
+    except (TypeError, ValueError):
+        timestamp = pd.NaT
+    if timestamp is not pd.NaT and timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+
+    transaction_id = txn.get("transactionId") or txn.get("transaction_id")
+    return {
+        "customer_ids": str(customer_id),
+        "transaction_ids": None if transaction_id is None else str(transaction_id),
+        "amounts": _optional_float(txn.get("amount")),
+        "timestamps": np.datetime64("NaT") if timestamp is pd.NaT else timestamp.to_datetime64(),
+        "hours": np.nan if timestamp is pd.NaT else float(timestamp.hour),
+        "latitudes": _optional_float(txn.get("latitude")),
+        "longitudes": _optional_float(txn.get("longitude")),
+        "device_ids": txn.get("deviceId") or txn.get("device"),
+    }
+
+
+class AppendLog:
+    """
+    Transactions appended after load, in two tiers: chunked column buffers
+    (O(1) appends into preallocated chunks) and a customer-sorted run the
+    chunks are compacted into every `compact_rows` appends. A customer's
+    appended rows are one slice of the run plus the few rows still pending,
+    so lookups stay cheap while ingesting and nothing is rebuilt per append.
+    """
+
+    def __init__(self, chunk_rows: int = 4096, compact_rows: int = 32768):
+        self.chunk_rows = chunk_rows
+        self.compact_rows = compact_rows
+        self.compactions = 0
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._pending = 0
+        self._pending_rows = {}  # customer -> pending positions, ascending
+        self._run = _log_fields()
+        self._run_index = {}  # customer -> (start, stop) in the run
+        self._ids = set()
+
+    def __len__(self):
+        return len(self._run["customer_ids"]) + self._pending
+
+    def __contains__(self, transaction_id):
+        return transaction_id in self._ids
+
+    def append(self, row: dict) -> bool:
+        """Append one log_row(); False if its transaction id was already appended."""
+        with self._lock:
+            transaction_id = row["transaction_ids"]
+            if transaction_id is not None:
+                if transaction_id in self._ids:
+                    return False
+                self._ids.add(transaction_id)
+
+            chunk, offset = divmod(self._pending, self.chunk_rows)
+            if chunk == len(self._chunks):
+                self._chunks.append(_log_fields(self.chunk_rows))
+            for field, value in row.items():
+                self._chunks[chunk][field][offset] = value
+            self._pending_rows.setdefault(row["customer_ids"], []).append(self._pending)
+            self._pending += 1
+
+            if self._pending >= self.compact_rows:
+                self._compact()
+        return True
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        # Caller holds the lock. The run is replaced, never mutated, so
+        # views handed out by rows() stay valid.
+        if not self._pending:
+            return
+        merged = {
+            field: np.concatenate([self._run[field]] + [chunk[field] for chunk in self._chunks])[: len(self)]
+            for field in LOG_FIELDS
+        }
+        order = np.argsort(merged["customer_ids"], kind="stable")
+        self._run = {field: array[order] for field, array in merged.items()}
+        self._run_index = _customer_ranges(self._run["customer_ids"])
+        self._chunks, self._pending, self._pending_rows = [], 0, {}
+        self.compactions += 1
+
+    def count(self, customer_id) -> int:
+        with self._lock:
+            start, stop = self._run_index.get(customer_id, (0, 0))
+            return stop - start + len(self._pending_rows.get(customer_id, ()))
+
+    def rows(self, customer_id):
+        """A customer's appended rows as {field: array} (LOG_FIELDS), or None."""
+        with self._lock:
+            bounds = self._run_index.get(customer_id)
+            positions = self._pending_rows.get(customer_id)
+            if bounds is None and not positions:
+                return None
+
+            parts = []
+            if bounds is not None:
+                parts.append({field: array[bounds[0]:bounds[1]] for field, array in self._run.items()})
+            if positions:
+                chunk_ids, offsets = np.divmod(np.asarray(positions), self.chunk_rows)
+                parts.append({
+                    field: np.concatenate([
+                        self._chunks[chunk][field][offsets[chunk_ids == chunk]]
+                        for chunk in np.unique(chunk_ids)
+                    ])
+                    for field in LOG_FIELDS
+                })
+
+        if len(parts) == 1:
+            return parts[0]
+        return {field: np.concatenate([part[field] for part in parts]) for field in LOG_FIELDS}
+
+
+class HistoryStore:
+    """
+    Customer-sorted history as typed NumPy columns (memory-mapped when
+    loaded from disk; text columns interned or as bytes, see
+    InternedColumn/BytesColumn) plus the customer index over them, and an
+    AppendLog of transactions ingested since load.
+    """
+
+    def __init__(self, columns: dict, customers: np.ndarray, offsets: np.ndarray):
+        self.columns = columns
+        self.customers = customers
+        self.offsets = offsets
+        self.customer_index = CustomerIndex(customers, offsets)
+        self.context_columns = self._context_columns()
+        self.log = AppendLog(HISTORY_CHUNK_ROWS, HISTORY_COMPACT_ROWS)
+
+    def __len__(self):
+        return int(self.offsets[-1]) if len(self.offsets) else 0
+
+    # ---------- Lookups ----------
+
+    def context(self, customer_id, exclude_txn_id=None) -> CustomerContext:
+        """
+        The customer's loaded history plus everything appended since, minus
+        exclude_txn_id. Views into the mapped columns when nothing was
+        appended for the customer.
+        """
+        bounds = self.customer_index.get(customer_id)
+        appended = self.log.rows(None if customer_id is None else str(customer_id))
+        if appended is None:
+            if bounds is None:
+                return CustomerContext.empty_for(customer_id)
+            return CustomerContext.from_columns(customer_id, self.context_columns, bounds[0], bounds[1], exclude_txn_id)
+
+        fields = {field: appended[field] for field in CONTEXT_COLUMNS.values()}
+        if bounds is not None:
+            start, stop = bounds
+            fields = {field: np.concatenate((self.context_columns[field][start:stop], array)) for field, array in fields.items()}
+        return CustomerContext.from_columns(customer_id, fields, 0, len(fields["amounts"]), exclude_txn_id)
+
+    def row_count(self, customer_id) -> int:
+        """Loaded plus appended rows for the customer."""
+        bounds = self.customer_index.get(customer_id)
+        appended = self.log.count(None if customer_id is None else str(customer_id))
+        return (bounds[1] - bounds[0] if bounds is not None else 0) + appended
+
+    def contains(self, customer_id, transaction_id) -> bool:
+        if transaction_id is None:
+            return False
+        if str(transaction_id) in self.log:
+            return True
+        bounds = self.customer_index.get(customer_id)
+        if bounds is None:
+            return False
+        return bool((self.context_columns["transaction_ids"][bounds[0]:bounds[1]] == str(transaction_id)).any())
+
+    def code(self, column: str, value) -> int:
+        """Code of `value` in an interned column (-1: not in the loaded history)."""
+        return self.columns[column].code(value)
+
+    def dictionary(self, column: str) -> np.ndarray:
+        """Sorted distinct values of an interned column; its codes index into this."""
+        return self.columns[column].dictionary
+
+    # ---------- Appends ----------
+
+    def append(self, txn: dict, check_loaded: bool = True) -> bool:
+        """
+        Append one transaction. Returns False (and appends nothing) when it
+        has no customer or its id is already in the history; pass
+        check_loaded=False when the caller already knows the id is new to
+        the loaded history (appended ids are always deduplicated).
+        """
+        row = log_row(txn)
+        if row is None:
+            return False
+        if check_loaded and self.contains(row["customer_ids"], row["transaction_ids"]):
+            return False
+        return self.log.append(row)
+
+    def _context_columns(self) -> dict:
+        # CustomerContext fields; missing columns become empty ("" / NaN)
+        length = len(self)
+        context = {}
+        for column, field in CONTEXT_COLUMNS.items():
+            if column in self.columns:
+                context[field] = self.columns[column]
+            elif field in ("transaction_ids", "device_ids"):
+                context[field] = np.full(length, "")
+            elif field == "timestamps":
+                context[field] = np.full(length, np.datetime64("NaT"), dtype="datetime64[ns]")
+            else:
+                context[field] = np.full(length, np.nan)
+        for array in context.values():
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+        return context
+
+    @classmethod
+    def from_frame(cls, history: pd.DataFrame) -> "HistoryStore":
+        """Store for a normalized history frame (sorted here)."""
+        if "customerId" in history.columns:
+            # Sort on the stored (text) ids so the index can binary search them
+            history = history.assign(customerId=history["customerId"].fillna("").astype(str))
+        history, _ = build_customer_index(history)
+        columns = {column: _column_array(history[column]) for column in history.columns if column != "customerId"}
+
+        if "customerId" in history.columns and len(history):
+            ids = history["customerId"].to_numpy(dtype=str)
+            starts = np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+            customers = ids[starts]
+            offsets = np.append(starts, len(ids)).astype(np.int64)
+        else:
+            customers = np.array([], dtype=str)
+            offsets = np.zeros(1, dtype=np.int64)
+        if "customerId" in history.columns:
+            # Rows are grouped by customer: codes are the customer positions
+            codes = np.repeat(np.arange(len(customers), dtype=np.int32), np.diff(offsets))
+            columns = {"customerId": InternedColumn(codes, customers), **columns}
+
+        return cls(columns, customers, offsets)
+
+    @classmethod
+    def from_csv(cls, csv_path) -> "HistoryStore":
+        return cls.from_frame(normalize_history(pd.read_csv(csv_path)))
+
+    # ---------- Persistence ----------
+
+    def save(self, store_dir, source: dict = None):
+        """
+        Write the store atomically: columns go to a temporary sibling
+        directory that is renamed into place, so concurrent workers never
+        see a partial store. An existing store is renamed aside first and
+        only deleted once the new one is in place; workers that already
+        mapped it keep their pages.
+        """
+        store_dir = Path(store_dir)
+        store_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{store_dir.name}-", dir=store_dir.parent))
+        os.chmod(tmp_dir, 0o755)  # mkdtemp is owner-only; workers may run as other users
+
+        files, dictionaries = {}, {}
+        for i, (column, array) in enumerate(self.columns.items()):
+            files[column] = f"col{i}.npy"
+            if isinstance(array, InternedColumn):
+                np.save(tmp_dir / files[column], array.codes)
+                if array.dictionary is self.customers:
+                    dictionaries[column] = "customers.npy"
+                else:
+                    dictionaries[column] = f"col{i}.dict.npy"
+                    np.save(tmp_dir / dictionaries[column], array.dictionary)
+            elif isinstance(array, BytesColumn):
+                np.save(tmp_dir / files[column], array.data)
+            else:
+                np.save(tmp_dir / files[column], array)
+        np.save(tmp_dir / "customers.npy", self.customers)
+        np.save(tmp_dir / "offsets.npy", self.offsets)
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "rows": len(self),
+            "columns": files,
+            "dictionaries": dictionaries,
+            "source": source or {},
+        }
+        (tmp_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+        old_dir = None
+        if store_dir.exists():
+            old_dir = Path(tempfile.mkdtemp(prefix=f".{store_dir.name}-old-", dir=store_dir.parent))
+            try:
+                os.replace(store_dir, old_dir)
+            except OSError:
+                # Another worker moved it aside first
+                pass
+        try:
+            os.rename(tmp_dir, store_dir)
+        except OSError:
+            # Another worker published the same conversion first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, store_dir, mmap: bool = True) -> "HistoryStore":
+        store_dir = Path(store_dir)
+        manifest = json.loads((store_dir / MANIFEST).read_text())
+        mode = "r" if mmap else None
+        arrays = {}  # file -> array, so a shared dictionary is mapped once
+
+        def array(name):
+            if name not in arrays:
+                arrays[name] = np.load(store_dir / name, mmap_mode=mode)
+            return arrays[name]
+
+        columns = {}
+        dictionaries = manifest.get("dictionaries", {})
+        for column, name in manifest["columns"].items():
+            if column in dictionaries:
+                columns[column] = InternedColumn(array(name), array(dictionaries[column]))
+            elif array(name).dtype.kind == "S":
+                columns[column] = BytesColumn(array(name))
+            else:
+                columns[column] = array(name)
+        return cls(columns, array("customers.npy"), array("offsets.npy"))
+
+
+def _source_signature(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {"path": str(csv_path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_current(store_dir: Path, source: dict) -> bool:
+    try:
+        manifest = json.loads((store_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return False
+    return manifest.get("version") == FORMAT_VERSION and manifest.get("source") == source
+
+
+@contextlib.contextmanager
+def _conversion_lock(store_dir: Path):
+    try:
+        import fcntl
+    except ImportError:  # non-POSIX: conversions may race, save() stays atomic
+        yield
+        return
+
+    store_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(store_dir.parent / f".{store_dir.name}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def default_csv_path() -> Path:
+    if HISTORY_CSV:
+        return Path(HISTORY_CSV)
+    return Path(next((p for p in HISTORY_CSV_CANDIDATES if Path(p).exists()), HISTORY_CSV_CANDIDATES[-1]))
+
+
+def convert_csv(csv_path, store_dir) -> Path:
+    """Convert the CSV into a store directory (always rewrites)."""
+    csv_path, store_dir = Path(csv_path), Path(store_dir)
+    HistoryStore.from_csv(csv_path).save(store_dir, _source_signature(csv_path))
+    return store_dir
+
+
+def load_history_store(csv_path=None, store_dir=None) -> HistoryStore:
+    """
+    Memory-map the converted history, converting the CSV first when the
+    store is missing or was built from a different version of the file.
+    """
+    csv_path = Path(csv_path) if csv_path is not None else default_csv_path()
+    store_dir = Path(store_dir if store_dir is not None else HISTORY_STORE_DIR)
+
+    if not csv_path.exists():
+        if (store_dir / MANIFEST).exists():
+            return HistoryStore.load(store_dir)
+        raise FileNotFoundError(f"No transaction history at {csv_path} and no store at {store_dir}")
+
+    source = _source_signature(csv_path)
+    if not _is_current(store_dir, source):
+        with _conversion_lock(store_dir):
+            # Workers starting together: only the first one converts
+            if not _is_current(store_dir, source):
+                convert_csv(csv_path, store_dir)
+    return HistoryStore.load(store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=None, help="transaction CSV (default: FINSHIELD_HISTORY_CSV or the first existing candidate)")
+    parser.add_argument("--out", default=HISTORY_STORE_DIR)
+    args = parser.parse_args()
+
+    store_dir = convert_csv(args.csv or default_csv_path(), args.out)
+    store = HistoryStore.load(store_dir)
+    print(f"{len(store):,} rows, {len(store.customers):,} customers -> {store_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# llm/cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _normalize(text: str) -> str:
+    # Indentation and line wrapping in the prompt templates carry no meaning
+    return " ".join(str(text).split())
+
+
+def prompt_fingerprint(namespace: str, prompt) -> str:
+    """
+    Stable key for a prompt: whitespace-normalized text (or role + text per
+    message) plus a namespace naming the agent and model it was sent to.
+    """
+    if isinstance(prompt, (list, tuple)):
+        parts = [
+            # LangChain messages (duck-typed, so langchain_core is not imported here)
+            [message.type, _normalize(message.content)] if hasattr(message, "content") else ["text", _normalize(message)]
+            for message in prompt
+        ]
+    else:
+        parts = [["text", _normalize(prompt)]]
+
+    payload = json.dumps([namespace, parts], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryTier:
+    """In-process LRU with per-entry TTL."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """On-disk tier shared across restarts (and workers on the same host)."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_seconds: float = 86400):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM llm_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl_seconds),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMCache:
+    """
+    Tiered response cache checked before every agent LLM call.
+    Tiers are consulted in order; a hit in a lower tier is promoted into the
+    tiers above it. Any object with get(key) / set(key, value) can be a tier.
+    """
+
+    def __init__(self, tiers=(), enabled: bool = True):
+        self.tiers = list(tiers)
+        self.enabled = enabled and bool(self.tiers)
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, **{f"{tier.name}_hits": 0 for tier in self.tiers}}
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+        for depth, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for upper in self.tiers[:depth]:
+                    upper.set(key, value)
+                self._count("hits", f"{tier.name}_hits")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str):
+        if self.enabled:
+            for tier in self.tiers:
+                tier.set(key, value)
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self._counts[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counts)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = {tier.name: len(tier) for tier in self.tiers}
+        return stats
+
+
+def cache_from_env() -> LLMCache:
+    """
+    FINSHIELD_LLM_CACHE=0 disables caching; FINSHIELD_LLM_CACHE_SIZE and
+    FINSHIELD_LLM_CACHE_TTL size the in-process tier; FINSHIELD_LLM_CACHE_SQLITE
+    (a file path) adds the on-disk tier.
+    """
+    ttl = float(os.getenv("FINSHIELD_LLM_CACHE_TTL", "3600"))
+    tiers = [MemoryTier(int(os.getenv("FINSHIELD_LLM_CACHE_SIZE", "4096")), ttl)]
+    sqlite_path = os.getenv("FINSHIELD_LLM_CACHE_SQLITE")
+    if sqlite_path:
+        tiers.append(SQLiteTier(sqlite_path, ttl))
+    return LLMCache(tiers, enabled=os.getenv("FINSHIELD_LLM_CACHE", "1") != "0")
+
+
+llm_cache = cache_from_env()
+
+
+def encode_response(response) -> str:
+    """Cacheable text of a structured (pydantic) or chat-model response."""
+    # Chat messages are pydantic models too: check for a message first
+    if hasattr(response, "content") and hasattr(response, "type"):
+        return response.content
+    return response.model_dump_json()
+
+
+def decode_response(value: str, schema=None):
+    """Inverse of encode_response: a schema instance, or an AIMessage."""
+    if schema is not None:
+        return schema.model_validate_json(value)
+    from langchain_core.messages import AIMessage
+
+    return AIMessage(content=value)
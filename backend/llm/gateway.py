@@ -0,0 +1,239 @@
+# llm/gateway.py
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+import metrics
+from llm import registry, scheduler
+from llm.cache import decode_response, encode_response, llm_cache, prompt_fingerprint
+from llm.prompts import estimate_tokens, reported_tokens
+
+
+# At most this many LLM requests in flight per process (per event loop for
+# the async path); callers beyond it queue. FINSHIELD_LLM_TIMEOUT bounds the
+# whole call, queueing included, so overload degrades to the deterministic
+# fallbacks instead of growing tail latency. Queued async calls are served
+# by priority class and deadline (llm.scheduler); sync calls (invoke) queue
+# on a plain semaphore in arrival order. On both paths a call never
+# outlives its transaction's deadline.
+LLM_MAX_CONCURRENCY = int(os.getenv("FINSHIELD_LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("FINSHIELD_LLM_TIMEOUT", "30"))
+LLM_KEEPALIVE = float(os.getenv("FINSHIELD_LLM_KEEPALIVE", "60"))
+
+
+class LLMGateway:
+    """
+    Single entry point for every agent LLM call:
+    response cache -> single-flight coalescing of identical in-flight
+    prompts -> global concurrency limit (a priority queue on the async
+    path) -> timeout, capped by the current transaction's deadline.
+
+    Clients built through client_kwargs() share one keep-alive HTTP
+    connection pool (one transport for sync calls, one for async).
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 30.0, keepalive: float = 60.0, coalesce: bool = True):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self.coalesce = coalesce
+        self._lock = threading.Lock()
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = weakref.WeakKeyDictionary()  # event loop -> scheduler.PrioritySlots
+        self._inflight = {}  # prompt key -> Future (concurrent or asyncio)
+        self._transports = None
+        self._counts = {"calls": 0, "coalesced": 0, "cache_hits": 0, "timeouts": 0, "errors": 0}
+
+    # ---------- Transport ----------
+
+    def client_kwargs(self) -> dict:
+        """ChatOllama keyword arguments routing it through the shared pool."""
+        import httpx
+
+        with self._lock:
+            if self._transports is None:
+                limits = httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=self.keepalive,
+                )
+                self._transports = (httpx.HTTPTransport(limits=limits), httpx.AsyncHTTPTransport(limits=limits))
+            sync_transport, async_transport = self._transports
+
+        return {
+            "client_kwargs": {"timeout": httpx.Timeout(self.timeout)},
+            "sync_client_kwargs": {"transport": sync_transport},
+            "async_client_kwargs": {"transport": async_transport},
+        }
+
+    # ---------- Calls ----------
+
+    def invoke(self, runnable, prompt, namespace: str, schema=None):
+        """
+        runnable.invoke(prompt) through the gateway. Pass the pydantic schema
+        for structured-output runnables; plain chat models return an AIMessage.
+        Raises TimeoutError when no slot frees up within the timeout or the
+        transaction's deadline.
+        """
+        key = prompt_fingerprint(registry.cache_namespace(namespace), prompt)
+        value = llm_cache.get(key)
+        if value is not None:
+            self._count("cache_hits")
+            return decode_response(value, schema)
+        request = scheduler.current()
+        timeout = self._timeout(request)
+
+        with self._lock:
+            leader = self._inflight.get(key)
+            if not self.coalesce or not isinstance(leader, Future):
+                leader = self._inflight[key] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            self._count("coalesced")
+            return decode_response(leader.result(timeout=timeout), schema)
+
+        try:
+            queued = time.perf_counter()
+            if not self._sync_slots.acquire(timeout=timeout):
+                raise TimeoutError(f"No LLM slot free within {timeout:.3f}s")
+            self._record_wait(request, queued)
+            try:
+                self._count("calls")
+                response = runnable.invoke(prompt)
+            finally:
+                self._sync_slots.release()
+            self._record_tokens(namespace, prompt, response)
+            value = encode_response(response)
+            llm_cache.set(key, value)
+            leader.set_result(value)
+            return response
+        except Exception as e:
+            self._count_failure(e)
+            leader.set_exception(e)
+            raise
+        finally:
+            self._release(key, leader)
+
+    async def ainvoke(self, runnable, prompt, namespace: str, schema=None):
+        """Async counterpart of invoke(); raises TimeoutError past the timeout or deadline."""
+        key = prompt_fingerprint(registry.cache_namespace(namespace), prompt)
+        value = llm_cache.get(key)
+        if value is not None:
+            self._count("cache_hits")
+            return decode_response(value, schema)
+        request = scheduler.current()
+        timeout = self._timeout(request)
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            leader = self._inflight.get(key)
+            if self.coalesce and isinstance(leader, asyncio.Future) and leader.get_loop() is loop:
+                owner = False
+            else:
+                leader = self._inflight[key] = loop.create_future()
+                owner = True
+
+        if not owner:
+            self._count("coalesced")
+            self._promote(loop, key, request)
+            try:
+                # shield: a waiter giving up must not cancel the shared call
+                value = await asyncio.wait_for(asyncio.shield(leader), timeout)
+            except asyncio.CancelledError:
+                if not leader.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The leader's transaction dropped the call (early exit): make it
+                return await self.ainvoke(runnable, prompt, namespace, schema)
+            return decode_response(value, schema)
+
+        try:
+            response = await asyncio.wait_for(self._acall(loop, key, runnable, prompt, request), timeout)
+            self._record_tokens(namespace, prompt, response)
+            value = encode_response(response)
+            llm_cache.set(key, value)
+            leader.set_result(value)
+            return response
+        except asyncio.CancelledError:
+            leader.cancel()
+            raise
+        except Exception as e:
+            self._count_failure(e)
+            leader.set_exception(e)
+            leader.exception()  # retrieved: waiters re-raise it, no "never retrieved" warning
+            raise
+        finally:
+            self._release(key, leader)
+
+    async def _acall(self, loop, key, runnable, prompt, request):
+        with self._lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = scheduler.PrioritySlots(self.max_concurrency)
+        queued = time.perf_counter()
+        await slots.acquire(request.key(), key)
+        self._record_wait(request, queued)
+        try:
+            self._count("calls")
+            return await runnable.ainvoke(prompt)
+        finally:
+            slots.release()
+
+    # ---------- Bookkeeping ----------
+
+    def _timeout(self, request) -> float:
+        # The gateway timeout, cut short by the transaction's deadline
+        remaining = request.remaining()
+        if remaining is None:
+            return self.timeout
+        if remaining <= 0:
+            self._count("timeouts")
+            raise TimeoutError("Transaction LLM deadline passed")
+        return min(self.timeout, remaining)
+
+    def _promote(self, loop, key, request):
+        # A queued shared call is served at its most urgent waiter's priority
+        slots = self._async_slots.get(loop)
+        if slots is not None:
+            slots.promote(key, request.key())
+
+    def _record_wait(self, request, queued: float):
+        if metrics.METRICS_ENABLED:
+            metrics.llm_queue_wait.observe(request.priority, time.perf_counter() - queued)
+
+    def _release(self, key, leader):
+        with self._lock:
+            if self._inflight.get(key) is leader:
+                del self._inflight[key]
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _record_tokens(self, namespace: str, prompt, response):
+        # Structured-output runnables drop the provider's usage, so most
+        # calls are estimated from the prompt text
+        if metrics.METRICS_ENABLED:
+            tokens = reported_tokens(response) or estimate_tokens(prompt)
+            metrics.llm_prompt_tokens.observe(namespace.partition("/")[0], tokens)
+
+    def _count_failure(self, error):
+        self._count("timeouts" if isinstance(error, TimeoutError) else "errors")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counts)
+            stats["in_flight"] = len(self._inflight)
+            stats["queued"] = sum(slots.waiting() for slots in list(self._async_slots.values()))
+        stats["max_concurrency"] = self.max_concurrency
+        stats["timeout_s"] = self.timeout
+        return stats
+
+
+gateway = LLMGateway(LLM_MAX_CONCURRENCY, LLM_TIMEOUT, LLM_KEEPALIVE)
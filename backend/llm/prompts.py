@@ -0,0 +1,63 @@
+# llm/prompts.py
+
+import math
+
+
+# Every agent's system message starts with this, byte for byte, and carries
+# nothing per-request: consecutive calls share the longest possible prefix,
+# so Ollama can reuse the cached prefill (KV) for it.
+SYSTEM_PREFIX = (
+    "You are a bank fraud analyst. Input is one `key: value` line per field. "
+    "Reply with JSON only, in the requested schema."
+)
+
+# Rough characters per token for English/JSON-ish text; only used when the
+# provider does not report prompt token counts
+CHARS_PER_TOKEN = 4
+
+
+def system_prompt(task: str) -> str:
+    """Static system message for one agent: the shared prefix plus its task."""
+    return f"{SYSTEM_PREFIX}\n{task}"
+
+
+def value(v) -> str:
+    """Canonical, compact text for one prompt value."""
+    if isinstance(v, float):
+        if math.isnan(v):
+            return "-"
+        # Two decimals are plenty for amounts and scores; no trailing zeros
+        return f"{v:.2f}".rstrip("0").rstrip(".")
+    if isinstance(v, (list, tuple)):
+        return "[" + ",".join(value(item) for item in v) + "]"
+    return "-" if v is None else str(v)
+
+
+def fields(items: dict) -> str:
+    """`key: value` lines, in the given (fixed) key order, skipping None."""
+    return "\n".join(f"{key}: {value(v)}" for key, v in items.items() if v is not None)
+
+
+def select(txn: dict, keys) -> dict:
+    """The listed transaction fields that are present, in the listed order."""
+    return {key: txn[key] for key in keys if txn.get(key) not in (None, "")}
+
+
+def prompt_text(prompt) -> str:
+    """Text sent to the model for a string or a list of messages."""
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(prompt)
+
+
+def estimate_tokens(prompt) -> int:
+    """Approximate prompt tokens (~4 characters per token)."""
+    return math.ceil(len(prompt_text(prompt)) / CHARS_PER_TOKEN)
+
+
+def reported_tokens(response):
+    """Prompt tokens reported by the provider (AIMessage usage), or None."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage and usage.get("input_tokens"):
+        return int(usage["input_tokens"])
+    return None
@@ -0,0 +1,103 @@
+# llm/registry.py
+
+import os
+import threading
+
+
+# Shared LLM clients, built on first use. langchain_ollama is imported only
+# when the first client is requested, so importing the agents (or serving
+# routes that never call an LLM) does not pay for it.
+_lock = threading.RLock()
+_clients = {}
+_env_loaded = False
+
+
+def load_env():
+    """Load backend/.env into the environment, once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
+
+
+def _client(key, build):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = build()
+    return client
+
+
+# ---------- Providers ----------
+
+def _ollama(model: str, **options):
+    from langchain_ollama import ChatOllama
+
+    from llm.gateway import gateway
+
+    # Timeout and the shared keep-alive connection pool come from the gateway
+    return ChatOllama(model=model, **gateway.client_kwargs(), **options)
+
+
+def _stub(model: str, **options):
+    from llm.stub import StubChatModel
+
+    return StubChatModel(model, **options)
+
+
+# name -> factory(model, **options) returning a chat model (invoke/ainvoke,
+# with_structured_output). FINSHIELD_LLM_PROVIDER picks one, read when the
+# first client is built so .env can set it.
+PROVIDERS = {"ollama": _ollama, "stub": _stub}
+
+
+def register_provider(name: str, factory):
+    with _lock:
+        PROVIDERS[name] = factory
+
+
+def provider_name() -> str:
+    load_env()
+    return os.getenv("FINSHIELD_LLM_PROVIDER", "ollama")
+
+
+def cache_namespace(namespace: str) -> str:
+    """
+    Response-cache namespace for the configured provider, so stub answers
+    never land in (or come from) the cache entries of the real model.
+    """
+    name = provider_name()
+    return namespace if name == "ollama" else f"{name}:{namespace}"
+
+
+def chat_model(model: str, **options):
+    """Shared chat model for (model, options) from the configured provider."""
+
+    def build():
+        name = provider_name()
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown FINSHIELD_LLM_PROVIDER {name!r} (known: {', '.join(sorted(PROVIDERS))})")
+        return PROVIDERS[name](model, **options)
+
+    return _client(("chat", provider_name(), model, tuple(sorted(options.items()))), build)
+
+
+def structured_model(model: str, schema, **options):
+    """Shared structured-output runnable for (model, schema, options)."""
+    return _client(
+        ("structured", provider_name(), model, schema, tuple(sorted(options.items()))),
+        lambda: chat_model(model, **options).with_structured_output(schema),
+    )
+
+
+def reset():
+    """Drop every client (rebuilt on next use)."""
+    with _lock:
+        _clients.clear()
@@ -0,0 +1,167 @@
+# llm/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+# Priority classes, most urgent first. An escalated transaction is "high"
+# when its amount or deterministic pre-score (mean signal risk) is at or
+# above the thresholds, "low" below FINSHIELD_PRIORITY_LOW_SCORE, else
+# "normal". FINSHIELD_LLM_PRIORITY=0 keeps the classes (for the queue-wait
+# metrics) but serves queued calls by deadline, then arrival, only.
+PRIORITY_CLASSES = ("high", "normal", "low")
+PRIORITY_ENABLED = os.getenv("FINSHIELD_LLM_PRIORITY", "1") != "0"
+PRIORITY_AMOUNT = float(os.getenv("FINSHIELD_PRIORITY_AMOUNT", "50000"))
+PRIORITY_HIGH_SCORE = float(os.getenv("FINSHIELD_PRIORITY_HIGH_SCORE", "0.4"))
+PRIORITY_LOW_SCORE = float(os.getenv("FINSHIELD_PRIORITY_LOW_SCORE", "0.2"))
+
+# Per-transaction budget for its LLM calls, from the start of scoring
+# (0: none, only the gateway timeout). Past it, calls fail fast and the
+# agents/decision fall back to their deterministic results.
+LLM_DEADLINE_MS = float(os.getenv("FINSHIELD_LLM_DEADLINE_MS", "0"))
+
+# Opt-in: an upstream agent reporting at least this risk makes the
+# transaction a BLOCK; its remaining agent calls and the decision call are
+# skipped (0 or unset: off, every escalated transaction gets its decision call)
+EARLY_BLOCK_RISK = float(os.getenv("FINSHIELD_EARLY_BLOCK_RISK", "0") or "0")
+
+
+@dataclass(frozen=True)
+class LLMRequest:
+    """Scheduling attributes shared by every LLM call of one transaction."""
+
+    priority: str = "normal"
+    deadline: float = None  # time.monotonic() value, None: no deadline
+
+    def key(self) -> tuple:
+        # Queue order: priority class, then earliest deadline
+        deadline = math.inf if self.deadline is None else self.deadline
+        return (PRIORITY_CLASSES.index(self.priority) if PRIORITY_ENABLED else 0), deadline
+
+    def remaining(self):
+        """Seconds left before the deadline (<= 0 once past), or None."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+
+DEFAULT_REQUEST = LLMRequest()
+
+# Request of the transaction being scored; asyncio tasks and the agent
+# thread pool inherit it, so each gateway call sees its transaction's request
+_current = ContextVar("finshield_llm_request", default=DEFAULT_REQUEST)
+
+
+def priority_class(amount, score) -> str:
+    if (amount is not None and amount >= PRIORITY_AMOUNT) or (score is not None and score >= PRIORITY_HIGH_SCORE):
+        return "high"
+    if score is not None and score < PRIORITY_LOW_SCORE:
+        return "low"
+    return "normal"
+
+
+def deadline_after(deadline_ms: float = None, start: float = None):
+    """Monotonic deadline `deadline_ms` (default FINSHIELD_LLM_DEADLINE_MS) after `start`, or None."""
+    deadline_ms = LLM_DEADLINE_MS if deadline_ms is None else deadline_ms
+    if not deadline_ms or deadline_ms <= 0:
+        return None
+    return (time.monotonic() if start is None else start) + deadline_ms / 1000
+
+
+def current() -> LLMRequest:
+    return _current.get()
+
+
+def bind(request: LLMRequest):
+    """Make `request` current for this context; returns the reset token."""
+    return _current.set(request)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+class PrioritySlots:
+    """
+    asyncio counterpart of a semaphore that hands a freed slot to the most
+    urgent waiter (lowest key: priority class, then deadline) instead of
+    the longest-waiting one; arrival order breaks ties. One per event loop.
+    """
+
+    def __init__(self, slots: int):
+        self._free = slots
+        self._waiters = []  # heap of (key, arrival, future); a future may appear twice
+        self._arrivals = itertools.count()
+        self._named = {}  # name -> (key, future) of a named waiter
+
+    def waiting(self) -> int:
+        return len({id(future) for _, _, future in self._waiters if not future.done()})
+
+    async def acquire(self, key: tuple, name=None):
+        """
+        Wait for a slot. A `name` (the gateway's prompt key) lets promote()
+        raise this waiter's priority while it is queued.
+        """
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (key, next(self._arrivals), future))
+        if name is not None:
+            self._named[name] = (key, future)
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Granted just as the waiter gave up (deadline, cancellation)
+                self.release()
+            else:
+                # Left in the heap; release() skips finished futures
+                future.cancel()
+            raise
+        finally:
+            if name is not None and self._named.get(name, (None, None))[1] is future:
+                del self._named[name]
+
+    def promote(self, name, key: tuple):
+        """
+        Priority inheritance: a more urgent caller coalesced onto the queued
+        call `name` moves it up to its own key.
+        """
+        queued = self._named.get(name)
+        if queued is None or key >= queued[0] or queued[1].done():
+            return
+        self._named[name] = (key, queued[1])
+        heapq.heappush(self._waiters, (key, next(self._arrivals), queued[1]))
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+
+class SchedulerStats:
+    """Counts early exits and deadline fallbacks of the LLM stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"early_blocks": 0, "cancelled_calls": 0, "deadline_fallbacks": 0}
+
+    def record(self, name: str, count: int = 1):
+        with self._lock:
+            self._counts[name] += count
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+scheduler_stats = SchedulerStats()
@@ -0,0 +1,169 @@
+# llm/stub.py
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+
+from llm.prompts import prompt_text
+
+
+# Deterministic stand-in for Ollama (FINSHIELD_LLM_PROVIDER=stub): answers
+# are derived from the scores and history figures already in the prompt,
+# so the same prompt always gets the same answer, with injected latency and
+# a reproducible error rate.
+STUB_LATENCY_MS = float(os.getenv("FINSHIELD_STUB_LATENCY_MS", "0"))
+STUB_JITTER_MS = float(os.getenv("FINSHIELD_STUB_JITTER_MS", "0"))
+STUB_ERROR_RATE = float(os.getenv("FINSHIELD_STUB_ERROR_RATE", "0"))
+
+
+class StubLLMError(RuntimeError):
+    """Injected failure (FINSHIELD_STUB_ERROR_RATE)."""
+
+
+def _unit(text: str, salt: str) -> float:
+    # Uniform in [0, 1), stable for a given prompt
+    digest = hashlib.sha256(f"{salt}\0{text}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def _number(pattern: str, text: str):
+    match = re.search(pattern, text)
+    return float(match.group(1)) if match else None
+
+
+def _label(risk: float) -> str:
+    return "Low" if risk < 0.33 else "Medium" if risk < 0.66 else "High"
+
+
+# ---------- Per-agent rules ----------
+
+def behavioral_risk(text: str):
+    amount = _number(r"(?m)^amount:\s*([\d.]+)", text)
+    high = _number(r"(?m)^hist_max:\s*([\d.]+)", text)
+    low = _number(r"(?m)^hist_min:\s*([\d.]+)", text)
+    if amount is None or high is None or low is None:
+        return 0.5, "Stub: no amount history to compare against."
+    if low <= amount <= high:
+        return 0.1, f"Stub: amount {amount:.2f} within historical range."
+    if amount <= 1.5 * high:
+        return 0.4, f"Stub: amount {amount:.2f} slightly outside historical range."
+    return (0.7 if amount <= 3 * high else 0.9), f"Stub: amount {amount:.2f} above historical maximum {high:.2f}."
+
+
+def _burst_risk(text: str):
+    # Mirrors tools.velocity_index.VELOCITY_BURSTS
+    for label, threshold, risk in (("10m", 3, 0.9), ("1h", 6, 0.7)):
+        count = _number(rf"(?m)^txn_{label}:\s*(\d+)", text)
+        if count is not None and count >= threshold:
+            return risk, f"Stub: {count:.0f} transactions in the last {label}."
+    return None
+
+
+def temporal_risk(text: str):
+    burst = _burst_risk(text)
+    if burst is not None:
+        return burst
+    hour = _number(r"\d{4}-\d{2}-\d{2}[T ](\d{2}):", text)
+    hours = re.search(r"(?m)^typical_hours:\s*\[([^\]]*)\]", text)
+    if hour is None or not hours or not hours.group(1).strip():
+        return 0.5, "Stub: no timestamp history to compare against."
+    active = [float(h) for h in re.findall(r"[\d.]+", hours.group(1))]
+    gap = min(min(abs(hour - h), 24 - abs(hour - h)) for h in active)
+    if gap <= 1:
+        return 0.1, f"Stub: hour {hour:.0f} matches typical activity."
+    return (0.4 if gap <= 3 else 0.7), f"Stub: hour {hour:.0f} is {gap:.0f}h from typical activity."
+
+
+def geo_risk(text: str):
+    risk = _number(r"(?m)^tool_risk:\s*([\d.]+)", text)
+    if risk is None:
+        return 0.5, "Stub: no geo tool score in the prompt."
+    return min(max(risk, 0.0), 1.0), f"Stub: geo tool scored {risk:.2f}."
+
+
+RULES = {"behavioral": behavioral_risk, "temporal": temporal_risk, "geo": geo_risk}
+
+
+def decision(text: str) -> dict:
+    """Decision JSON from the per-agent risks listed in the decision prompt."""
+    risks = [float(r) for r in re.findall(r"risk=([\d.]+)", text)] or [0.5]
+    worst, mean = max(risks), sum(risks) / len(risks)
+    if worst >= 0.66 or mean >= 0.6:
+        return {"decision": "HIGH_RISK", "action": "BLOCK", "reasoning": f"Stub: max agent risk {worst:.2f}."}
+    if worst >= 0.33:
+        return {"decision": "MID_RISK", "action": "REVIEW", "reasoning": f"Stub: max agent risk {worst:.2f}."}
+    return {"decision": "LOW_RISK", "action": "ALLOW", "reasoning": f"Stub: all agent risks low (max {worst:.2f})."}
+
+
+def structured_values(schema, text: str) -> dict:
+    """
+    Values for every <agent>_risk/_label/_reason triple in the schema, and
+    the decision when the schema has one (fused schema: decided from the
+    computed risks plus any risk= lines in the prompt).
+    """
+    values = {}
+    for field in schema.model_fields:
+        if field.endswith("_risk"):
+            prefix = field[: -len("_risk")]
+            risk, reason = RULES.get(prefix, lambda _: (0.5, "Stub: no rule for this agent."))(text)
+            values.update({field: risk, f"{prefix}_label": _label(risk), f"{prefix}_reason": reason})
+    if "decision" in schema.model_fields:
+        risks = " ".join(f"risk={value}" for field, value in values.items() if field.endswith("_risk"))
+        values.update(decision(f"{text}\n{risks}"))
+    return {field: value for field, value in values.items() if field in schema.model_fields}
+
+
+# ---------- Models ----------
+
+class StubChatModel:
+    """
+    Duck-typed stand-in for a LangChain chat model: invoke/ainvoke return an
+    AIMessage whose content is decision JSON; with_structured_output(schema)
+    returns a runnable producing schema instances.
+    """
+
+    def __init__(self, model: str, latency_ms: float = None, jitter_ms: float = None, error_rate: float = None, **options):
+        self.model = model
+        self.latency_ms = STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.jitter_ms = STUB_JITTER_MS if jitter_ms is None else jitter_ms
+        self.error_rate = STUB_ERROR_RATE if error_rate is None else error_rate
+        self.options = options
+
+    def _delay(self, text: str) -> float:
+        return (self.latency_ms + self.jitter_ms * _unit(text, "jitter")) / 1000
+
+    def _check_error(self, text: str):
+        if self.error_rate and _unit(text, "error") < self.error_rate:
+            raise StubLLMError(f"Injected stub failure ({self.model})")
+
+    def _respond(self, text: str):
+        from langchain_core.messages import AIMessage
+
+        return AIMessage(content=json.dumps(decision(text)))
+
+    def invoke(self, prompt):
+        text = prompt_text(prompt)
+        time.sleep(self._delay(text))
+        self._check_error(text)
+        return self._respond(text)
+
+    async def ainvoke(self, prompt):
+        text = prompt_text(prompt)
+        await asyncio.sleep(self._delay(text))
+        self._check_error(text)
+        return self._respond(text)
+
+    def with_structured_output(self, schema):
+        return StubStructuredModel(self, schema)
+
+
+class StubStructuredModel(StubChatModel):
+    def __init__(self, chat: StubChatModel, schema):
+        super().__init__(chat.model, chat.latency_ms, chat.jitter_ms, chat.error_rate, **chat.options)
+        self.schema = schema
+
+    def _respond(self, text: str):
+        return self.schema(**structured_values(self.schema, text))
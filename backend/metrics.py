@@ -0,0 +1,130 @@
+# metrics.py
+
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+
+# Per-stage latency histograms, exposed in Prometheus text format at
+# /metrics. FINSHIELD_METRICS=0 turns every stage timer into a no-op.
+# FINSHIELD_NODE_TIMINGS=1 attaches per-node timings to every response
+# (otherwise per request, with ?timings=true).
+METRICS_ENABLED = os.getenv("FINSHIELD_METRICS", "1") != "0"
+NODE_TIMINGS = os.getenv("FINSHIELD_NODE_TIMINGS", "0") == "1"
+
+# Seconds; spans in-process lookups (sub-millisecond) to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label value (one label)."""
+
+    def __init__(self, name: str, documentation: str, label: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: str, seconds: float):
+        # `seconds` is the observed quantity (token counts for llm_prompt_tokens)
+        position = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(value)
+            if series is None:
+                series = self._series[value] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[position] += 1
+            series[-1] += seconds
+
+    def snapshot(self) -> dict:
+        """{label value: (per-bucket counts incl. +Inf, sum)}, non-cumulative."""
+        with self._lock:
+            return {value: (series[:-1], series[-1]) for value, series in self._series.items()}
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for value, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {total}')
+            lines.append(f'{self.name}_count{{{self.label}="{value}"}} {cumulative}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+stage_seconds = Histogram("finshield_stage_seconds", "Latency of each scoring pipeline stage.", "stage")
+
+# Prompt tokens per upstream LLM call (provider-reported, else estimated)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+llm_prompt_tokens = Histogram(
+    "finshield_llm_prompt_tokens", "Prompt tokens per LLM call, by agent.", "agent", TOKEN_BUCKETS
+)
+
+# Time LLM calls wait for a gateway slot, by scheduler priority class
+llm_queue_wait = Histogram(
+    "finshield_llm_queue_wait_seconds", "Time LLM calls wait for a gateway slot, by priority class.", "priority"
+)
+
+HISTOGRAMS = (stage_seconds, llm_prompt_tokens, llm_queue_wait)
+
+
+class _StageTimer:
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str, timings):
+        self.name = name
+        self.timings = timings
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if METRICS_ENABLED:
+            stage_seconds.observe(self.name, elapsed)
+        if self.timings is not None:
+            # Node timings drop the "agent." prefix: the node already names it
+            self.timings[self.name.rpartition(".")[2]] = round(elapsed * 1e3, 3)
+        return False
+
+
+_NOOP = nullcontext()
+
+
+def stage(name: str, timings: dict = None):
+    """
+    Time a block as pipeline stage `name` (histogram) and, when `timings`
+    is a dict, record it there in milliseconds. A shared no-op when both
+    are off.
+    """
+    if not METRICS_ENABLED and timings is None:
+        return _NOOP
+    return _StageTimer(name, timings)
+
+
+def node_timings(state: dict):
+    """Fresh timings dict for an agent node, or None when not requested."""
+    return {} if state.get("timings") is not None else None
+
+
+def render(counters: dict = None) -> str:
+    """
+    Prometheus text exposition: the histograms plus `counters`
+    ({metric name: value}, exported as untyped samples).
+    """
+    lines = [line for histogram in HISTOGRAMS for line in histogram.render()]
+    for name, value in (counters or {}).items():
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,165 @@
+# scoring_pool.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+
+# FINSHIELD_SCORING_WORKERS=N (N > 0) moves the deterministic stage of
+# async scoring (history, features, velocity, geo/device tools) into N
+# worker processes; the LLM stage stays on the event loop of the main
+# process. 0 keeps everything in-process (the default thread executor).
+SCORING_WORKERS = int(os.getenv("FINSHIELD_SCORING_WORKERS", "0"))
+
+# Ingested transactions are forwarded to their shard with its next task, or
+# on their own once this many are waiting
+FORWARD_FLUSH_ROWS = 1024
+
+_pool = None
+_in_worker = False
+
+
+# ---------- Worker side ----------
+
+def _init_worker():
+    # Runs in each spawned worker before any task: importing fraud_graph
+    # memory-maps the same on-disk history store as the main process, so
+    # workers share its pages and no DataFrame is ever pickled.
+    global _in_worker
+    _in_worker = True
+    import fraud_graph  # noqa: F401
+
+
+def _prepare(ingests: list, txns: list, timings: bool) -> list:
+    import fraud_graph
+
+    for txn in ingests:
+        # Already appended by the main process, hence new to the loaded history
+        fraud_graph.ingest(txn, check_loaded=False)
+    if not txns:
+        return []
+
+    states = fraud_graph.prepare_batch_states(txns, timings)
+    for state in states:
+        # Every tool result is on the state, so the agents never need the
+        # context; the caller still holds the transaction
+        state["context"] = None
+        del state["txn"]
+    return states
+
+
+# ---------- Main process ----------
+
+class ScoringPool:
+    """
+    Deterministic scoring in worker processes, sharded by customer: each
+    worker is a single-process executor owning a fixed subset of customers,
+    so its incremental structures (append log, feature store, geo and
+    velocity indexes) only need that subset's ingests, forwarded in order
+    ahead of its next task.
+    """
+
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context("spawn")
+        self._shards = [
+            ProcessPoolExecutor(1, mp_context=context, initializer=_init_worker)
+            for _ in range(workers)
+        ]
+        self._lock = threading.Lock()
+        self._forward = [[] for _ in range(workers)]
+        self.tasks = 0
+        self.forwarded = 0
+
+    def __len__(self):
+        return len(self._shards)
+
+    def shard(self, customer_id) -> int:
+        # Stable across processes and restarts (unlike hash())
+        return zlib.crc32(str(customer_id).encode()) % len(self._shards)
+
+    def warm(self):
+        """Start every worker and wait until each has loaded the history."""
+        with self._lock:
+            futures = [self._submit(shard, [], False) for shard in range(len(self._shards))]
+        for future in futures:
+            # Re-raises a worker that failed to start (e.g. history load error)
+            future.result()
+
+    def _submit(self, shard: int, txns: list, timings: bool):
+        # Caller holds the lock: forwarded ingests and tasks reach each
+        # worker in the order they were submitted
+        ingests, self._forward[shard] = self._forward[shard], []
+        self.tasks += 1
+        return self._shards[shard].submit(_prepare, ingests, txns, timings)
+
+    def forward(self, txn: dict):
+        """Queue an ingested transaction for the worker owning its customer."""
+        customer_id = txn.get("customerId") or txn.get("customer_id")
+        shard = self.shard(customer_id)
+        with self._lock:
+            self._forward[shard].append(txn)
+            self.forwarded += 1
+            if len(self._forward[shard]) >= FORWARD_FLUSH_ROWS:
+                self._submit(shard, [], False)
+
+    async def prepare_batch_states(self, txns: list, timings: bool = False) -> list:
+        """fraud_graph.prepare_batch_states(), split across the workers by customer."""
+        groups = {}
+        for position, txn in enumerate(txns):
+            groups.setdefault(self.shard(txn.get("customerId") or txn.get("customer_id")), []).append(position)
+
+        with self._lock:
+            futures = [
+                self._submit(shard, [txns[position] for position in positions], timings)
+                for shard, positions in groups.items()
+            ]
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+        states = [None] * len(txns)
+        for positions, shard_states in zip(groups.values(), results):
+            for position, state in zip(positions, shard_states):
+                state["txn"] = txns[position]
+                states[position] = state
+        return states
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": len(self._shards),
+                "tasks": self.tasks,
+                "forwarded": self.forwarded,
+                "forward_pending": sum(len(pending) for pending in self._forward),
+            }
+
+    def close(self):
+        for executor in self._shards:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def start(workers: int = None):
+    """
+    Start the process-wide pool (FINSHIELD_SCORING_WORKERS workers by
+    default) and wait for it to load. A no-op inside a worker.
+    """
+    global _pool
+    workers = SCORING_WORKERS if workers is None else workers
+    if _in_worker or workers <= 0 or _pool is not None:
+        return _pool
+    _pool = ScoringPool(workers)
+    _pool.warm()
+    return _pool
+
+
+def active():
+    """The running pool, or None (not configured, or inside a worker)."""
+    return _pool
+
+
+def stop():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -0,0 +1,76 @@
+# simulation.py
+
+from datetime import datetime
+
+
+# Deterministic demo scoring behind /api/transaction: risk points per
+# signal, summed and capped, then a status tier. The single and the bulk
+# endpoint (simulation_batch) both score from these tables. No NumPy
+# here: the app imports this module eagerly.
+AMOUNT_TIERS = ((45000, 32), (25000, 22))  # (minimum amount, points), highest first
+AMOUNT_BASE_RISK = 12
+NEW_DEVICE_RISK = 30
+KNOWN_DEVICE_RISK = 14
+HOT_LOCATIONS = frozenset({"mumbai", "delhi", "dubai", "singapore"})
+HOT_LOCATION_RISK = 20
+OTHER_LOCATION_RISK = 8
+MAX_RISK = 97
+CONFIDENCE_MARGIN = 5
+MAX_CONFIDENCE = 96
+
+# (minimum risk score, status, verdict, explanation), highest first
+STATUS_TIERS = (
+    (75, "FLAGGED", "Fraud Detected",
+     "Large-value transfer from a new device with elevated geographic risk markers."),
+    (45, "REVIEW", "Manual Review Recommended",
+     "Multiple signals deviated from the expected customer profile and require review."),
+    (0, "CLEAR", "Transaction Cleared",
+     "Agent checks stayed within safe thresholds across device, amount, and location."),
+)
+
+REASONING = [
+    "Cross-checking behavioral pattern",
+    "Comparing device fingerprint",
+    "Checking geo-velocity anomaly",
+]
+
+
+def is_new_device(device: str) -> bool:
+    return "new" in device.lower()
+
+
+def is_hot_location(location: str) -> bool:
+    return location.lower() in HOT_LOCATIONS
+
+
+def risk_score(amount: float, location: str, device: str) -> int:
+    amount_risk = next((points for minimum, points in AMOUNT_TIERS if amount >= minimum), AMOUNT_BASE_RISK)
+    device_risk = NEW_DEVICE_RISK if is_new_device(device) else KNOWN_DEVICE_RISK
+    location_risk = HOT_LOCATION_RISK if is_hot_location(location) else OTHER_LOCATION_RISK
+    return min(MAX_RISK, amount_risk + device_risk + location_risk)
+
+
+def tier(score: int) -> tuple:
+    """The STATUS_TIERS row for a risk score."""
+    return next(row for row in STATUS_TIERS if score >= row[0])
+
+
+def response_fields(score: int) -> dict:
+    """Everything in a response but processedAt, which follows from the score."""
+    _, status, verdict, explanation = tier(score)
+    return {
+        "riskScore": score,
+        "status": status,
+        "reasoning": REASONING,
+        "verdict": verdict,
+        "confidence": min(MAX_CONFIDENCE, score + CONFIDENCE_MARGIN),
+        "explanation": explanation,
+    }
+
+
+def simulate(amount: float, location: str, device: str, timestamp: str = None) -> dict:
+    """One /api/transaction response."""
+    return {
+        **response_fields(risk_score(amount, location, device)),
+        "processedAt": timestamp or datetime.utcnow().isoformat(),
+    }
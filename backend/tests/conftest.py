@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import tempfile
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+# Settings are read at import: score with the stub provider over the
+# bundled sample history, converted into a throwaway store
+os.environ.setdefault("FINSHIELD_LLM_PROVIDER", "stub")
+os.environ.setdefault("FINSHIELD_STUB_LATENCY_MS", "0")
+os.environ.setdefault("FINSHIELD_LLM_CACHE", "0")
+os.environ.setdefault("FINSHIELD_HISTORY_CSV", str(BACKEND / "transactions.csv"))
+os.environ.setdefault("FINSHIELD_HISTORY_STORE", str(Path(tempfile.mkdtemp(prefix="finshield-tests-")) / "history_store"))
@@ -0,0 +1,47 @@
+# tests/test_auto_ingest.py
+import fraud_graph
+
+
+def _txn(txn_id, **fields):
+    return {
+        "transactionId": txn_id,
+        "customerId": "CUST02",
+        "amount": 900000.0,
+        "merchant": "Amazon",
+        "location": "Sydney_AU",
+        "latitude": -33.87,
+        "longitude": 151.21,
+        "deviceId": "EvilPhone",
+        "timestamp": "2026-03-05T03:00:00",
+        **fields,
+    }
+
+
+def _scores(result) -> list:
+    return [(node["id"], node.get("risk"), node.get("action")) for node in result["nodes"]]
+
+
+def test_blocked_transaction_does_not_change_the_next_score():
+    first = fraud_graph.evaluate(_txn("INGEST-BLOCK-1"))
+    assert first["nodes"][-1]["action"] == "BLOCK"
+
+    # Resubmitted under a new id it is judged against the same baseline
+    second = fraud_graph.evaluate(_txn("INGEST-BLOCK-2"))
+    assert _scores(second) == _scores(first)
+    assert "EvilPhone" not in fraud_graph.history_store.context("CUST02").device_ids.tolist()
+
+
+def test_allowed_transaction_is_ingested():
+    txn = _txn(
+        "INGEST-ALLOW-1", amount=320.0, merchant="Swiggy", location="Delhi_IN",
+        latitude=28.6139, longitude=77.2090, deviceId="Android", timestamp="2026-03-03T14:00:00",
+    )
+    result = fraud_graph.evaluate(txn)
+    assert result["nodes"][-1]["action"] == "ALLOW"
+    assert "INGEST-ALLOW-1" in fraud_graph.history_store.context("CUST02").transaction_ids.tolist()
+
+
+def test_ingest_keeps_zero_coordinates():
+    txn = _txn("INGEST-ZERO-1", customerId="CUST-ZERO", latitude=0.0, longitude=5.0)
+    assert fraud_graph.ingest(txn)
+    assert len(fraud_graph.geo_indexes.get("CUST-ZERO")) == 1
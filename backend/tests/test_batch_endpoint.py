@@ -0,0 +1,118 @@
+# tests/test_batch_endpoint.py
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+
+
+def _txn(index, **fields):
+    return {
+        "transactionId": f"TEST{index}",
+        "customerId": "CUST01",
+        "amount": 950.0,
+        "merchant": "Amazon",
+        "location": "Mumbai_IN",
+        "deviceId": "Android",
+        "timestamp": "2026-03-05T10:00:00",
+        **fields,
+    }
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def _records(response) -> dict:
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    return {record["index"]: record for record in records}
+
+
+def test_invalid_transactions_become_error_records(client):
+    incomplete = {key: value for key, value in _txn(0).items() if key != "amount"}
+    response = client.post("/fraud/check/batch", json=[incomplete, _txn(1, amount="lots"), 5])
+    records = _records(response)
+
+    assert sorted(records) == [0, 1, 2]
+    for record in records.values():
+        assert "error" in record
+        assert "nodes" not in record
+    assert records[0]["transaction"] == incomplete
+    assert records[2]["transaction"] == 5
+
+
+def test_ndjson_batch_reports_invalid_lines(client):
+    lines = [json.dumps({"transactionId": "TEST0"}), json.dumps(_txn(1, customerId=None))]
+    response = client.post(
+        "/fraud/check/batch",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    records = _records(response)
+    assert sorted(records) == [0, 1]
+    assert all("error" in record for record in records.values())
+
+
+def test_ndjson_batch_reports_malformed_lines(client):
+    lines = [
+        json.dumps(_txn(0)),
+        "{not json",
+        json.dumps(_txn(2, timestamp="yesterday")),
+        "[1]",
+        json.dumps(_txn(4)),
+        "x" * 1000,
+    ]
+    response = client.post(
+        "/fraud/check/batch",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    records = _records(response)
+
+    assert sorted(records) == [0, 1, 2, 3, 4, 5]
+    for index in (1, 2, 3, 5):
+        assert "error" in records[index]
+        assert "nodes" not in records[index]
+    assert "Invalid JSON line" in records[1]["error"]
+    assert records[1]["transaction"] == "{not json"
+    assert records[5]["transaction"] == "x" * 200
+    assert records[2]["transaction"]["transactionId"] == "TEST2"
+    # The valid lines around them are still scored
+    for index in (0, 4):
+        assert "error" not in records[index]
+        assert records[index]["nodes"][-1]["action"] in ("ALLOW", "REVIEW", "BLOCK")
+
+
+def test_batch_rejects_bodies_that_are_not_arrays(client):
+    bad_json = client.post("/fraud/check/batch", content="[{", headers={"Content-Type": "application/json"})
+    assert bad_json.status_code == 400
+    assert client.post("/fraud/check/batch", json={"transactions": []}).status_code == 422
+
+
+def test_check_rejects_bad_timestamp(client):
+    assert client.post("/fraud/check", json=_txn(0, timestamp="yesterday")).status_code == 422
+
+
+def test_append_counts_duplicates_and_errors(client):
+    txns = [_txn(10), _txn(10), _txn(11, amount="lots"), _txn(12)]
+    response = client.post("/history/append", json=txns)
+    assert response.status_code == 200
+    assert response.json() == {"received": 4, "appended": 2, "duplicates": 1, "errors": 1}
+
+
+def test_append_counts_malformed_lines_as_errors(client):
+    lines = [json.dumps(_txn(20)), "{not json", json.dumps(_txn(20)), json.dumps(_txn(21, amount="lots"))]
+    response = client.post(
+        "/history/append",
+        content="\n".join(lines),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"received": 4, "appended": 1, "duplicates": 1, "errors": 2}
+    bad_json = client.post("/history/append", content="[{", headers={"Content-Type": "application/json"})
+    assert bad_json.status_code == 400
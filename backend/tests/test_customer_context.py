@@ -0,0 +1,87 @@
+# tests/test_customer_context.py
+import numpy as np
+import pandas as pd
+
+from customer_context import CustomerContext, history_columns
+from history_store import HistoryStore, normalize_history
+from tools.geo_tool import geo_risk_score, geo_risk_scores
+
+
+def _history():
+    history = pd.DataFrame({
+        "transactionId": ["T1", "T2", "T3"],
+        "amount": [100.0, 200.0, 300.0],
+        "timestamp": pd.to_datetime(["2026-03-01T09:00:00", "2026-03-01T10:00:00", "2026-03-01T11:00:00"]),
+        "latitude": [19.07, 19.08, 28.61],
+        "longitude": [72.87, 72.88, 77.20],
+        "deviceId": ["A", "A", "B"],
+    })
+    return history.assign(hour=history["timestamp"].dt.hour)
+
+
+def test_slice_without_exclusion_is_a_view():
+    columns = history_columns(_history())
+    context = CustomerContext.from_columns("C1", columns, 0, 3, "T9")
+    assert len(context) == 3
+    assert context.excluded == 0
+    assert context.excluded_devices == ()
+    assert np.shares_memory(context.amounts, columns["amounts"])
+    assert not context.amounts.flags.writeable
+
+
+def test_replay_excludes_the_stored_row():
+    context = CustomerContext.from_columns("C1", history_columns(_history()), 0, 3, "T3")
+    assert context.transaction_ids.tolist() == ["T1", "T2"]
+    assert context.amounts.tolist() == [100.0, 200.0]
+    assert context.device_ids.tolist() == ["A", "A"]
+    assert context.excluded == 1
+    # The device of the excluded row, not the incoming transaction's
+    assert context.excluded_devices == ("B",)
+
+
+def test_replay_of_appended_transaction():
+    store = HistoryStore.from_frame(normalize_history(pd.DataFrame({
+        "transaction_id": ["T1", "T2"],
+        "customer_id": ["C1", "C1"],
+        "amount": [100.0, 200.0],
+        "device": ["A", "B"],
+    })))
+    store.append({"transactionId": "T3", "customerId": "C1", "amount": 50, "deviceId": "C"})
+    context = store.context("C1", "T3")
+    assert context.transaction_ids.tolist() == ["T1", "T2"]
+    assert context.excluded_devices == ("C",)
+    assert store.context("C1", "T1").excluded_devices == ("A",)
+
+
+def test_from_frame_derives_hours():
+    context = CustomerContext.from_frame("C1", pd.DataFrame({
+        "transactionId": ["T1"], "amount": [10.0], "timestamp": ["2026-03-01T22:15:00"],
+    }))
+    assert context.hours.tolist() == [22]
+    assert CustomerContext.empty_for("C1").empty
+
+
+def test_geo_bulk_scoring_accepts_contexts():
+    history = _history()
+    histories = [
+        CustomerContext.from_frame("C1", history),
+        history,
+        CustomerContext.empty_for("C2"),
+        None,
+    ]
+    txns = [{"latitude": 19.07, "longitude": 72.87}, {"latitude": 51.5, "longitude": -0.12}, {"latitude": 1.0, "longitude": 2.0}, {"latitude": 1.0, "longitude": 2.0}]
+    expected = [geo_risk_score(txn, h if h is not None else pd.DataFrame()) for txn, h in zip(txns, histories)]
+    assert geo_risk_scores(txns, histories) == expected
+
+
+def test_batch_geo_scores_match_the_geo_index():
+    import fraud_graph
+
+    customers = list(fraud_graph.customer_index)
+    txns = [
+        {"transactionId": f"GEO{i}", "customerId": customers[i % len(customers)], "latitude": 10.0 + i, "longitude": 70.0 + i}
+        for i in range(2 * len(customers))
+    ]
+    txns.append({"transactionId": "GEO-NEW", "customerId": "CUST-GEO-NONE", "latitude": 1.0, "longitude": 2.0})
+    contexts = fraud_graph.batch_customer_contexts(txns)
+    assert fraud_graph.batch_geo_risk_scores(txns, contexts) == fraud_graph.geo_indexes.risk_scores(txns)
@@ -0,0 +1,21 @@
+# tests/test_early_block.py
+from agents import decision_agent_llm
+
+
+def _state(*risks):
+    return {"nodes": [{"id": f"agent{i}", "name": f"Agent {i}", "risk": risk} for i, risk in enumerate(risks)]}
+
+
+def test_early_block_is_off_by_default():
+    assert decision_agent_llm.EARLY_BLOCK_RISK == 0
+    assert decision_agent_llm.early_block_decision(_state(1.0, 1.0)) is None
+
+
+def test_early_block_at_threshold(monkeypatch):
+    monkeypatch.setattr(decision_agent_llm, "EARLY_BLOCK_RISK", 0.9)
+    decision = decision_agent_llm.early_block_decision(_state(0.2, 0.9))
+    assert decision["action"] == "BLOCK"
+    assert "Agent 1" in decision["reasoning"]
+    assert decision_agent_llm.early_block_decision(_state(0.2, 0.89)) is None
+    # Nodes without a risk (the decision node) never trigger it
+    assert decision_agent_llm.early_block_decision({"nodes": [{"id": "llm_agent", "name": "LLM"}]}) is None
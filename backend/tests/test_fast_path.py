@@ -0,0 +1,39 @@
+# tests/test_fast_path.py
+import pytest
+
+from agents.fast_path import _partial, fast_path_decision, hour_signal
+from feature_store import CustomerFeatures
+
+
+def _signals(*risks):
+    return [_partial(f"agent{i}", f"Agent {i}", f"agent{i}", risk, "test") for i, risk in enumerate(risks)]
+
+
+@pytest.mark.parametrize("risks", [(0.0, 0.05, 0.1, 0.1), (0.1,)])
+def test_fast_path_allows_when_every_signal_is_low(risks):
+    decision = fast_path_decision(_signals(*risks), low=0.1, high=0.75)
+    assert decision["action"] == "ALLOW"
+    assert decision["decision"] == "LOW_RISK"
+
+
+@pytest.mark.parametrize("risks", [(0.75, 0.75, 0.75, 0.75), (0.9, 0.9, 0.6, 0.6)])
+def test_fast_path_blocks_when_the_mean_reaches_high(risks):
+    decision = fast_path_decision(_signals(*risks), low=0.1, high=0.75)
+    assert decision["action"] == "BLOCK"
+    assert decision["decision"] == "HIGH_RISK"
+
+
+@pytest.mark.parametrize("risks", [(0.0, 0.0, 0.0, 0.11), (0.9, 0.9, 0.9, 0.2), (0.5, 0.5, 0.5, 0.5)])
+def test_fast_path_defers_in_between(risks):
+    assert fast_path_decision(_signals(*risks), low=0.1, high=0.75) is None
+
+
+def test_hour_signal():
+    features = CustomerFeatures()
+    features.update(hour=10)
+    features.update(hour=11)
+    assert hour_signal({"timestamp": "2026-03-05T10:30:00"}, features)[0] == 0.1
+    assert hour_signal({"timestamp": "2026-03-05T23:30:00"}, features)[0] == 0.7
+    # Unparseable, like missing: neutral, so never a fast-path ALLOW
+    assert hour_signal({"timestamp": "yesterday"}, features)[0] == 0.5
+    assert hour_signal({}, features)[0] == 0.5
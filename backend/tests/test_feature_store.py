@@ -0,0 +1,22 @@
+# tests/test_feature_store.py
+from feature_store import FeatureStore
+
+
+def test_get_returns_a_snapshot():
+    store = FeatureStore()
+    store.record({"customerId": "C1", "amount": 100, "timestamp": "2026-03-01T10:00:00", "deviceId": "A"})
+    features = store.get("C1")
+
+    store.record({"customerId": "C1", "amount": 300, "timestamp": "2026-03-01T22:00:00", "deviceId": "B"})
+    assert (features.count, features.mean, features.devices) == (1, 100.0, {"A"})
+    assert features.hour_counts[22] == 0
+
+    current = store.get("C1")
+    assert (current.count, current.mean, current.devices) == (2, 200.0, {"A", "B"})
+    # Mutating a snapshot does not reach the store
+    current.devices.add("C")
+    assert store.get("C1").devices == {"A", "B"}
+
+
+def test_unknown_customer_has_empty_features():
+    assert FeatureStore().get("nobody").count == 0
@@ -0,0 +1,202 @@
+# tests/test_history_store.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_store import (
+    FORMAT_VERSION,
+    AppendLog,
+    BytesColumn,
+    HistoryStore,
+    InternedColumn,
+    build_customer_index,
+    load_history_store,
+    log_row,
+    normalize_history,
+)
+
+
+def _raw_history():
+    return pd.DataFrame({
+        "transaction_id": ["T1", "T2", "T3", "T4", "T5"],
+        "customer_id": ["C2", "C1", "C2", "C1", "C3"],
+        "amount": [120.0, 80.5, 300.0, 42.0, 15.0],
+        "timestamp": ["2026-03-01T09:00:00", "2026-03-01T10:00:00", "2026-03-02T23:30:00", "2026-03-03T08:15:00", "2026-03-04T12:00:00"],
+        "latitude": [19.07, 28.61, 19.08, 28.62, 12.97],
+        "longitude": [72.87, 77.20, 72.88, 77.21, 77.59],
+        "merchant": ["Amazon", "Flipkart", "Amazon", "Swiggy", "Zomato"],
+        "device": ["Android", "iPhone", "Android", None, "Web"],
+    })
+
+
+@pytest.fixture
+def history():
+    return normalize_history(_raw_history())
+
+
+@pytest.fixture
+def store(history):
+    return HistoryStore.from_frame(history)
+
+
+def test_build_customer_index_groups_rows_by_customer(history):
+    sorted_history, index = build_customer_index(history)
+    assert index == {"C1": (0, 2), "C2": (2, 4), "C3": (4, 5)}
+    # Stable sort: each customer's rows keep their original order
+    assert sorted_history["transactionId"].tolist() == ["T2", "T4", "T1", "T3", "T5"]
+    assert build_customer_index(pd.DataFrame())[1] == {}
+
+
+def test_customer_index_matches_a_full_scan(history, store):
+    assert len(store) == 5
+    assert list(store.customer_index) == ["C1", "C2", "C3"]
+    for customer_id in history["customerId"].unique():
+        start, stop = store.customer_index[customer_id]
+        scan = history.loc[history["customerId"] == customer_id, "transactionId"]
+        assert np.asarray(store.columns["transactionId"][start:stop]).tolist() == scan.tolist()
+    assert store.customer_index.get("nobody") is None
+    assert store.customer_index.get(None) is None
+
+
+def test_text_columns_are_interned_or_bytes(store):
+    assert isinstance(store.columns["transactionId"], BytesColumn)
+    assert store.columns["transactionId"].data.dtype.kind == "S"
+    for column in ("customerId", "deviceId", "merchant"):
+        assert isinstance(store.columns[column], InternedColumn)
+    # customerId codes index the store's customer ids
+    assert store.dictionary("customerId") is store.customers
+    assert store.columns["customerId"].codes.tolist() == [0, 0, 1, 1, 2]
+
+
+def test_interned_codes_and_missing_values(store):
+    devices = store.columns["deviceId"]
+    assert store.dictionary("deviceId").tolist() == ["Android", "Web", "iPhone"]
+    assert store.code("deviceId", "iPhone") == 2
+    assert store.code("deviceId", "Nokia") == -1
+    # The missing device decodes to "" (code -1)
+    assert devices.codes[1] == -1
+    assert devices[1] == ""
+    assert devices.value(devices.code("Web")) == "Web"
+
+
+def test_numeric_columns_are_narrowed(store):
+    assert store.columns["hour"].dtype == np.int8
+    assert store.columns["amount"].dtype == np.float64
+    assert store.columns["latitude"].dtype == np.float32
+
+
+def test_context_excludes_the_evaluated_transaction(store):
+    assert store.context("C2").transaction_ids.tolist() == ["T1", "T3"]
+    context = store.context("C2", "T3")
+    assert context.transaction_ids.tolist() == ["T1"]
+    assert context.amounts.tolist() == [120.0]
+    assert context.excluded == 1
+    assert store.context("C2", "T9").excluded == 0
+    assert store.context("nobody").empty
+
+
+def test_save_load_round_trip(store, tmp_path):
+    store.save(tmp_path / "store", {"path": "test"})
+    loaded = HistoryStore.load(tmp_path / "store")
+
+    manifest = (tmp_path / "store" / "manifest.json").read_text()
+    assert f'"version": {FORMAT_VERSION}' in manifest
+    assert loaded.customers.tolist() == store.customers.tolist()
+    assert loaded.offsets.tolist() == store.offsets.tolist()
+    assert set(loaded.columns) == set(store.columns)
+    for column, array in store.columns.items():
+        assert isinstance(loaded.columns[column], type(array))
+        assert loaded.columns[column].dtype == array.dtype
+        assert np.asarray(loaded.columns[column]).tolist() == np.asarray(array).tolist()
+    # The customerId dictionary is the mapped customer ids, not a copy
+    assert loaded.dictionary("customerId") is loaded.customers
+    assert loaded.code("merchant", "Swiggy") == store.code("merchant", "Swiggy")
+    assert loaded.context("C1").amounts.tolist() == [80.5, 42.0]
+
+
+def test_store_is_reconverted_when_the_csv_changes(tmp_path):
+    csv_path, store_dir = tmp_path / "history.csv", tmp_path / "store"
+    _raw_history().to_csv(csv_path, index=False)
+    assert len(load_history_store(csv_path, store_dir)) == 5
+    # Unchanged CSV: the existing store is mapped as is
+    assert len(load_history_store(csv_path, store_dir)) == 5
+
+    _raw_history().iloc[:3].to_csv(csv_path, index=False)
+    assert len(load_history_store(csv_path, store_dir)) == 3
+
+
+def test_save_replaces_an_existing_store(history, tmp_path):
+    store_dir = tmp_path / "store"
+    HistoryStore.from_frame(history).save(store_dir)
+    mapped = HistoryStore.load(store_dir)
+
+    HistoryStore.from_frame(history.iloc[:2]).save(store_dir)
+    assert len(HistoryStore.load(store_dir)) == 2
+    # The store it replaced was moved aside and removed, its pages stay mapped
+    assert [path.name for path in tmp_path.iterdir()] == ["store"]
+    assert len(mapped) == 5
+    assert mapped.context("C1").amounts.tolist() == [80.5, 42.0]
+
+def test_contains(store):
+    assert store.contains("C1", "T4")
+    assert not store.contains("C2", "T4")
+    assert not store.contains("C1", None)
+
+
+def test_append_extends_context_and_deduplicates(store):
+    txn = {"transactionId": "T9", "customerId": "C1", "amount": 55, "timestamp": "2026-03-05T07:00:00", "deviceId": "iPhone"}
+    assert store.append(txn)
+    assert not store.append(txn)  # appended ids are deduplicated
+    assert not store.append({**txn, "transactionId": "T2"})  # already loaded
+    assert not store.append({"transactionId": "T10"})  # no customer
+
+    context = store.context("C1")
+    assert context.transaction_ids.tolist() == ["T2", "T4", "T9"]
+    assert context.hours.tolist()[-1] == 7
+    assert store.row_count("C1") == 3
+    assert store.contains("C1", "T9")
+
+    # A replay of an appended transaction excludes it like a loaded one
+    replay = store.context("C1", "T9")
+    assert replay.transaction_ids.tolist() == ["T2", "T4"]
+    assert replay.excluded == 1
+
+    # A customer first seen through an append
+    store.append({"transactionId": "T11", "customerId": "C9", "amount": 10})
+    assert store.context("C9").transaction_ids.tolist() == ["T11"]
+
+
+def _row(customer_id, transaction_id, amount=1.0):
+    return log_row({"customerId": customer_id, "transactionId": transaction_id, "amount": amount})
+
+
+def test_append_log_compacts_into_a_sorted_run():
+    log = AppendLog(chunk_rows=2, compact_rows=4)
+    for i, customer_id in enumerate(["B", "A", "B", "C"]):
+        assert log.append(_row(customer_id, f"X{i}", amount=i))
+    # The fourth append reached compact_rows
+    assert log.compactions == 1
+    assert log.rows("B")["transaction_ids"].tolist() == ["X0", "X2"]
+
+    # Rows appended after the compaction are pending until the next one
+    log.append(_row("B", "X4", amount=4))
+    assert log.compactions == 1
+    assert log.count("B") == 3
+    assert log.rows("B")["amounts"].tolist() == [0.0, 2.0, 4.0]
+
+    log.compact()
+    assert log.compactions == 2
+    assert len(log) == 5
+    assert log.rows("B")["transaction_ids"].tolist() == ["X0", "X2", "X4"]
+    assert log.rows("A")["transaction_ids"].tolist() == ["X1"]
+    assert log.rows("Z") is None
+    assert not log.append(_row("A", "X1"))
+
+
+def test_log_row_tolerates_bad_fields():
+    row = log_row({"customerId": "C1", "amount": "n/a", "timestamp": "not a time", "latitude": ""})
+    assert np.isnan(row["amounts"])
+    assert np.isnat(row["timestamps"])
+    assert np.isnan(row["hours"])
+    assert np.isnan(row["latitudes"])
+    assert log_row({"amount": 5}) is None
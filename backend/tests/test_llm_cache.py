@@ -0,0 +1,54 @@
+# tests/test_llm_cache.py
+import time
+
+from llm.cache import LLMCache, MemoryTier, SQLiteTier, prompt_fingerprint
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2)
+    tier.set("a", "1")
+    tier.set("b", "2")
+    assert tier.get("a") == "1"
+    tier.set("c", "3")
+    assert tier.get("b") is None
+    assert (tier.get("a"), tier.get("c")) == ("1", "3")
+
+
+def test_memory_tier_expires_entries():
+    tier = MemoryTier(ttl_seconds=0)
+    tier.set("a", "1")
+    time.sleep(0.001)
+    assert tier.get("a") is None
+    assert len(tier) == 0
+
+
+def test_sqlite_hit_is_promoted_to_memory(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteTier(path).set("key", "value")  # left by an earlier process
+
+    memory = MemoryTier()
+    cache = LLMCache([memory, SQLiteTier(path)])
+    assert cache.get("key") == "value"
+    assert memory.get("key") == "value"
+    assert cache.get("key") == "value"
+    assert cache.get("other") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert (stats["sqlite_hits"], stats["memory_hits"]) == (1, 1)
+    assert stats["hit_rate"] == 2 / 3
+    assert stats["entries"] == {"memory": 1, "sqlite": 1}
+
+
+def test_disabled_cache_stores_nothing():
+    memory = MemoryTier()
+    cache = LLMCache([memory], enabled=False)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+    assert len(memory) == 0
+    assert cache.stats()["hit_rate"] == 0.0
+
+
+def test_fingerprint_ignores_whitespace_only():
+    assert prompt_fingerprint("geo", "risk  of\nthis") == prompt_fingerprint("geo", "risk of this")
+    assert prompt_fingerprint("geo", "a") != prompt_fingerprint("device", "a")
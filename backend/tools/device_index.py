@@ -0,0 +1,244 @@
+# tools/device_index.py
+
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tools.velocity_index import timestamp_ns
+
+
+# Escalate a device used by at least this many other customers (0: off).
+# The bundled histories record device types ("Android", "iPhone") rather
+# than device ids, so sharing is only meaningful with real device ids.
+DEVICE_SHARED_CUSTOMERS = int(os.getenv("FINSHIELD_DEVICE_SHARED_CUSTOMERS", "0"))
+
+_NAT = np.iinfo(np.int64).min
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """What the history says about one (customer, device) pair."""
+
+    rows: int  # customer's history rows, the scored transaction excluded
+    known: bool  # the customer used the device before
+    first_seen_ns: int = None  # customer's first use (None: unknown or undated)
+    customers: int = 0  # other customers that used the device
+
+
+class _CustomerDevices:
+    # device code -> [first use (ns, _NAT if undated), uses]
+    __slots__ = ("rows", "devices")
+
+    def __init__(self, rows: int = 0, devices: dict = None):
+        self.rows = rows
+        self.devices = devices if devices is not None else {}
+
+
+class DeviceIndex:
+    """
+    Device history with device ids interned to integer codes: per customer,
+    a hash map code -> (first use, uses); globally, per code, the number of
+    distinct customers and the first use by anyone. Known-device,
+    first-seen and customers-per-device lookups are O(1).
+
+    attach() runs the global pass (interning every row, distinct
+    customer/device pairs), so it is paid while the pipeline preloads
+    rather than by the first query; a customer's map is built from their
+    rows on first use. Both are then kept current by add().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+        self._ranges = {}
+        self._reset()
+
+    def _reset(self):
+        self._codes = {}  # device id -> code
+        self._row_codes = None  # code per history row, -1 for missing ids
+        self._customers = []  # code -> distinct customers
+        self._first_seen = []  # code -> first use by any customer (ns)
+        self._by_customer = {}
+
+    def attach(self, columns: dict, customer_index):
+        with self._lock:
+            self._reset()
+            self._columns = (columns["device_ids"], columns["timestamps"])
+            self._ranges = customer_index
+            self._build()
+
+    # ---------- Global pass ----------
+
+    def _build(self):
+        # Caller holds the lock
+        if self._columns is None or not len(self._columns[0]):
+            return
+        device_ids, timestamps = self._columns
+        if hasattr(device_ids, "codes"):
+            # Interned by the history store: its codes (-1: missing) as is
+            row_codes, uniques = device_ids.codes, device_ids.dictionary.tolist()
+        else:
+            row_codes, uniques = pd.factorize(device_ids)
+            uniques = list(uniques)
+        if "" in uniques:
+            # Plain text columns hold missing ids as ""
+            missing = uniques.index("")
+            row_codes = np.where(row_codes == missing, -1, row_codes - (row_codes > missing))
+            uniques.pop(missing)
+        self._codes = {device: code for code, device in enumerate(uniques)}
+        self._row_codes = row_codes
+
+        # Distinct (customer, device) pairs, customers numbered by the
+        # contiguous range each row falls in
+        starts = np.sort(np.fromiter((start for start, _ in self._ranges.values()), dtype=np.int64))
+        groups = np.searchsorted(starts, np.arange(len(row_codes)), side="right")
+        times = np.asarray(timestamps, dtype="datetime64[ns]").view(np.int64)
+        present = row_codes >= 0
+        pairs = np.unique(groups[present] * len(uniques) + row_codes[present])
+        self._customers = np.bincount(pairs % len(uniques), minlength=len(uniques)).tolist()
+
+        dated = present & (times != _NAT)
+        first_seen = np.full(len(uniques), np.iinfo(np.int64).max)
+        np.minimum.at(first_seen, row_codes[dated], times[dated])
+        first_seen[first_seen == np.iinfo(np.int64).max] = _NAT
+        self._first_seen = first_seen.tolist()
+
+    def _intern(self, device, create: bool = False):
+        # Caller holds the lock
+        code = self._codes.get(device)
+        if code is None and create:
+            code = self._codes[device] = len(self._customers)
+            self._customers.append(0)
+            self._first_seen.append(_NAT)
+        return code
+
+    def _customer(self, customer_id, create: bool = False):
+        # Caller holds the lock
+        entry = self._by_customer.get(customer_id)
+        if entry is not None:
+            return entry
+
+        bounds = self._ranges.get(customer_id) if customer_id is not None else None
+        if bounds is not None and self._row_codes is not None:
+            start, stop = bounds
+            codes = self._row_codes[start:stop]
+            times = np.asarray(self._columns[1][start:stop], dtype="datetime64[ns]").view(np.int64)
+            devices = {}
+            for code, time in zip(codes.tolist(), times.tolist()):
+                if code < 0:
+                    continue
+                usage = devices.get(code)
+                if usage is None:
+                    devices[code] = [time, 1]
+                else:
+                    if time != _NAT and (usage[0] == _NAT or time < usage[0]):
+                        usage[0] = time
+                    usage[1] += 1
+            entry = _CustomerDevices(stop - start, devices)
+        elif create:
+            entry = _CustomerDevices()
+        if entry is not None:
+            self._by_customer[customer_id] = entry
+        return entry
+
+    # ---------- Updates ----------
+
+    def add(self, txn: dict):
+        """Record one new transaction."""
+        customer_id = txn.get("customerId") or txn.get("customer_id")
+        if customer_id is None:
+            return
+        device = txn.get("deviceId") or txn.get("device")
+        time = timestamp_ns(txn.get("timestamp"))
+        time = _NAT if time is None else time
+
+        with self._lock:
+            entry = self._customer(customer_id, create=True)
+            entry.rows += 1
+            if not device:
+                return
+            code = self._intern(device, create=True)
+            usage = entry.devices.get(code)
+            if usage is None:
+                entry.devices[code] = [time, 1]
+                self._customers[code] += 1
+            else:
+                if time != _NAT and (usage[0] == _NAT or time < usage[0]):
+                    usage[0] = time
+                usage[1] += 1
+            if time != _NAT and (self._first_seen[code] == _NAT or time < self._first_seen[code]):
+                self._first_seen[code] = time
+
+    # ---------- Lookups ----------
+
+    def _lookup(self, customer_id, device, excluded=()) -> DeviceInfo:
+        # Caller holds the lock. `excluded` are the devices of the
+        # customer's rows left out of its history (a replayed transaction's
+        # stored row): they must not count, whatever device the replay carries.
+        entry = self._customer(customer_id)
+        rows = entry.rows - len(excluded) if entry is not None else 0
+        code = self._intern(device) if device else None
+        if code is None:
+            return DeviceInfo(rows, False)
+
+        usage = entry.devices.get(code) if entry is not None else None
+        own = sum(1 for other in excluded if other and self._intern(other) == code)
+        uses = usage[1] - own if usage is not None else 0
+        customers = self._customers[code] - (1 if usage is not None else 0)
+        if uses <= 0:
+            # Other customers' uses are the device's global history
+            return DeviceInfo(rows, False, None, customers)
+        first_seen = usage[0] if usage[0] != _NAT else None
+        return DeviceInfo(rows, True, first_seen, customers)
+
+    def lookup(self, customer_id, device, excluded=()) -> DeviceInfo:
+        with self._lock:
+            return self._lookup(customer_id, device, excluded)
+
+    def first_seen_ns(self, device):
+        """First use of the device by any customer (ns), or None."""
+        with self._lock:
+            code = self._intern(device)
+            if code is None or self._first_seen[code] == _NAT:
+                return None
+            return self._first_seen[code]
+
+    def risk_score(self, txn: dict, excluded=()):
+        """
+        Same contract and base tiers as device_risk_score, answered from the
+        index, with the first-use date in the reason and an escalation for
+        devices shared across customers (FINSHIELD_DEVICE_SHARED_CUSTOMERS).
+        `excluded`: devices of the history rows a replay excludes
+        (CustomerContext.excluded_devices).
+        """
+        return self.risk_scores([txn], [excluded])[0]
+
+    def risk_scores(self, txns: list, excluded: list = None):
+        """Bulk variant of risk_score: one lock acquisition for the batch."""
+        excluded = excluded if excluded is not None else [()] * len(txns)
+        with self._lock:
+            infos = [
+                self._lookup(txn.get("customerId") or txn.get("customer_id"), txn.get("deviceId"), devices)
+                for txn, devices in zip(txns, excluded)
+            ]
+        return [device_risk_from_info(info) for info in infos]
+
+
+def device_risk_from_info(info: DeviceInfo):
+    if info.rows <= 0:
+        return 0.4, "No device history available"
+    if DEVICE_SHARED_CUSTOMERS and info.customers >= DEVICE_SHARED_CUSTOMERS:
+        return 0.8, f"Device also used by {info.customers} other customers"
+    if not info.known:
+        return 0.6, "Transaction from new device for this customer"
+    if info.first_seen_ns is None:
+        return 0.1, "Transaction from known device"
+    first_seen = np.datetime64(info.first_seen_ns, "ns").astype("datetime64[D]")
+    return 0.1, f"Transaction from known device (first used {first_seen})"
+
+
+# Process-wide index, attached to the history by fraud_graph at load
+device_indexes = DeviceIndex()
@@ -1,3 +1,10 @@
+def _device_ids(customer_txns):
+    # CustomerContext exposes typed columns; DataFrames a deviceId column
+    if hasattr(customer_txns, "device_ids"):
+        return customer_txns.device_ids.tolist()
+    return customer_txns["deviceId"].unique().tolist()
+
+
 def device_risk_score(txn: dict, customer_txns):
     device_id = txn.get("deviceId")
 
@@ -7,9 +14,8 @@ def device_risk_score(txn: dict, customer_txns):
     if customer_txns.empty:
         return 0.4, "No device history available"
 
-    known_devices = customer_txns["deviceId"].unique().tolist()
-
-    if device_id not in known_devices:
+    if device_id not in set(_device_ids(customer_txns)):
         return 0.6, "Transaction from new device for this customer"
 
     return 0.1, "Transaction from known device"
+
@@ -0,0 +1,193 @@
+# tools/geo_index.py
+
+import os
+import threading
+
+import numpy as np
+
+from tools.geo_tool import geo_risk_from_distance, min_distance_km
+
+
+# Customers with at least this many located points get a KD-tree;
+# smaller histories are scanned with the vectorized haversine kernel.
+GEO_TREE_MIN_POINTS = int(os.getenv("FINSHIELD_GEO_TREE_MIN_POINTS", "512"))
+
+# Points added since the last build are scanned brute force until they
+# exceed this fraction of the tree (or 64 points), then folded in.
+GEO_REBUILD_FRACTION = 0.1
+
+
+def unit_vectors(lats, lons):
+    """
+    Map lat/lon (degrees) to 3D unit vectors. Chord length between unit
+    vectors is monotonic in great-circle distance, so the nearest point by
+    Euclidean distance in 3D is also the nearest by haversine.
+    """
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+class CustomerGeoIndex:
+    """
+    Nearest-neighbour index over one customer's historical locations.
+
+    Located points live in a KD-tree on 3D unit vectors (built only once the
+    customer has GEO_TREE_MIN_POINTS points) plus a pending buffer of points
+    added since the last build. The nearest candidate's distance is always
+    recomputed with the same haversine kernel as geo_risk_score, so risk
+    tiers match the brute-force tool exactly.
+    """
+
+    def __init__(self, lats, lons, ids):
+        self._lock = threading.Lock()
+        self._pending = ([], [], [])
+        self._snapshot = self._build(np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), np.asarray(ids, dtype=object))
+
+    @staticmethod
+    def _build(lats, lons, ids):
+        # Rows without coordinates still count as history (they decide
+        # between "no history" and "insufficient coordinates").
+        located = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        tree = None
+        if len(located) >= GEO_TREE_MIN_POINTS:
+            from scipy.spatial import cKDTree
+
+            tree = cKDTree(unit_vectors(lats[located], lons[located]))
+        return lats, lons, ids, located, tree
+
+    def __len__(self):
+        return len(self._snapshot[0]) + len(self._pending[0])
+
+    def add(self, lat, lon, txn_id=None):
+        """Record a new transaction location; O(1) amortized."""
+        with self._lock:
+            pending_lats, pending_lons, pending_ids = self._pending
+            pending_lats.append(np.nan if lat is None else float(lat))
+            pending_lons.append(np.nan if lon is None else float(lon))
+            pending_ids.append(txn_id)
+
+            if len(pending_lats) > max(64, GEO_REBUILD_FRACTION * len(self._snapshot[0])):
+                lats, lons, ids, _, _ = self._snapshot
+                self._snapshot = self._build(
+                    np.concatenate((lats, pending_lats)),
+                    np.concatenate((lons, pending_lons)),
+                    np.concatenate((ids, np.array(pending_ids, dtype=object))),
+                )
+                self._pending = ([], [], [])
+
+    def nearest_km(self, lat, lon, exclude_id=None):
+        """
+        Distance (km) to the closest historical location, skipping rows whose
+        transaction id equals exclude_id.
+
+        Returns (has_rows, distance): has_rows is False when no history row is
+        left after the exclusion; distance is None if none has coordinates.
+        """
+        with self._lock:
+            lats, lons, ids, located, tree = self._snapshot
+            pending_lats, pending_lons, pending_ids = (list(part) for part in self._pending)
+
+        pending_lats = np.array(pending_lats, dtype=float)
+        pending_lons = np.array(pending_lons, dtype=float)
+        pending_kept = np.array([txn_id != exclude_id for txn_id in pending_ids], dtype=bool)
+        pending_min = min_distance_km(lat, lon, pending_lats[pending_kept], pending_lons[pending_kept])
+
+        if tree is None:
+            kept = ids != exclude_id if exclude_id is not None else np.ones(len(ids), dtype=bool)
+            if not kept.any() and not pending_kept.any():
+                return False, None
+            base_min = min_distance_km(lat, lon, lats[kept], lons[kept])
+        else:
+            # Neighbours come back nearest first; take the first one that is
+            # not the excluded transaction.
+            _, nearest = tree.query(unit_vectors([lat], [lon])[0], k=min(tree.n, 4))
+            positions = located[np.atleast_1d(nearest)]
+            if exclude_id is not None:
+                positions = positions[ids[positions] != exclude_id]
+            if len(positions):
+                positions = positions[:1]
+            else:
+                # Every neighbour returned was excluded (duplicate ids): scan
+                positions = located[ids[located] != exclude_id]
+            base_min = min_distance_km(lat, lon, lats[positions], lons[positions])
+
+        distances = [d for d in (base_min, pending_min) if d is not None]
+        return True, (min(distances) if distances else None)
+
+
+class GeoIndexRegistry:
+    """
+    Per-customer spatial indexes. attach() only records the sorted
+    history arrays and each customer's row range, so loading is O(1); a customer's
+    index (and KD-tree) is materialized on first query and then updated
+    incrementally through add().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._columns = None
+        self._ranges = {}
+
+    def attach(self, columns: dict, customer_index):
+        """
+        Serve the history from CustomerContext-style columns (e.g. the
+        memory-mapped history store); nothing is copied.
+        """
+        with self._lock:
+            self._indexes = {}
+            self._columns = (columns["latitudes"], columns["longitudes"], columns["transaction_ids"])
+            self._ranges = customer_index
+
+    def get(self, customer_id, create: bool = False):
+        index = self._indexes.get(customer_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(customer_id)
+            if index is None:
+                bounds = self._ranges.get(customer_id)
+                if bounds is not None and self._columns is not None:
+                    start, stop = bounds
+                    lats, lons, ids = (column[start:stop] for column in self._columns)
+                    index = CustomerGeoIndex(lats, lons, ids)
+                elif create:
+                    index = CustomerGeoIndex([], [], [])
+                if index is not None:
+                    self._indexes[customer_id] = index
+        return index
+
+    def add(self, customer_id, lat, lon, txn_id=None):
+        self.get(customer_id, create=True).add(lat, lon, txn_id)
+
+    def risk_score(self, txn: dict):
+        """
+        Same contract and risk tiers as geo_risk_score, answered with a
+        nearest-neighbour query on the customer's index.
+        """
+        if not txn.get("latitude") or not txn.get("longitude"):
+            return 0.5, "Transaction location data missing."
+
+        customer_id = txn.get("customerId") or txn.get("customer_id")
+        txn_id = txn.get("transactionId") or txn.get("transaction_id")
+        index = self.get(customer_id)
+        if index is None or len(index) == 0:
+            return 0.5, "No historical geo data available."
+
+        has_rows, min_distance = index.nearest_km(float(txn["latitude"]), float(txn["longitude"]), txn_id)
+        if not has_rows:
+            return 0.5, "No historical geo data available."
+        if min_distance is None:
+            return 0.5, "Insufficient historical geo coordinates."
+
+        return geo_risk_from_distance(min_distance)
+
+    def risk_scores(self, txns: list):
+        """Bulk variant of risk_score."""
+        return [self.risk_score(txn) for txn in txns]
+
+
+# Process-wide registry, attached to the history by fraud_graph at load
+geo_indexes = GeoIndexRegistry()
@@ -1,8 +1,16 @@
 # tools/geo_tool.py
 
+import os
+
+import numpy as np
 import pandas as pd
 from math import radians, sin, cos, sqrt, atan2
 
+EARTH_RADIUS_KM = 6371
+
+# Faster than a commercial flight between consecutive located transactions
+IMPOSSIBLE_TRAVEL_KMH = float(os.getenv("FINSHIELD_IMPOSSIBLE_TRAVEL_KMH", "900"))
+
 
 # ----------------------------------------
 # Optional: Haversine distance calculator
@@ -12,7 +20,7 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate distance between two lat/lon points in kilometers.
     """
-    R = 6371  # Earth radius in km
+    R = EARTH_RADIUS_KM
 
     dlat = radians(lat2 - lat1)
     dlon = radians(lon2 - lon1)
@@ -23,6 +31,48 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_distances(lat, lon, lats, lons):
+    """
+    Vectorized haversine: distances in km between (lat, lon) and arrays of
+    points, in one NumPy pass. Scalars broadcast against arrays; NaN
+    coordinates yield NaN distances.
+    """
+    lat1 = np.radians(lat)
+    lon1 = np.radians(lon)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lon2 = np.radians(np.asarray(lons, dtype=float))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def min_distance_km(lat, lon, lats, lons):
+    """
+    Minimum haversine distance from (lat, lon) to the given points,
+    ignoring NaN coordinates. Returns None when no valid point remains.
+    """
+    distances = haversine_distances(lat, lon, lats, lons)
+    valid = ~np.isnan(distances)
+    if not valid.any():
+        return None
+    return float(distances[valid].min())
+
+
+def _coordinates(history):
+    """
+    (lats, lons) of a history frame or CustomerContext, or None when it has
+    no rows or no coordinate columns.
+    """
+    if history is None or history.empty:
+        return None
+    if hasattr(history, "latitudes"):
+        # CustomerContext: typed coordinate columns, no frame access
+        return history.latitudes, history.longitudes
+    if "latitude" not in history.columns or "longitude" not in history.columns:
+        return None
+    return history["latitude"].to_numpy(dtype=float), history["longitude"].to_numpy(dtype=float)
+
+
 # ----------------------------------------
 # Main Geo Risk Tool
 # ----------------------------------------
@@ -41,6 +91,7 @@ def geo_risk_score(txn: dict, history_df: pd.DataFrame):
     history_df must contain:
         latitude
         longitude
+    (or be a CustomerContext)
     """
 
     # Validate transaction location
@@ -50,28 +101,24 @@ def geo_risk_score(txn: dict, history_df: pd.DataFrame):
     current_lat = txn["latitude"]
     current_lon = txn["longitude"]
 
-    if history_df.empty or \
-       "latitude" not in history_df.columns or \
-       "longitude" not in history_df.columns:
+    coordinates = _coordinates(history_df)
+    if coordinates is None:
         return 0.5, "No historical geo data available."
+    lats, lons = coordinates
 
-    # Compute distances from historical locations
-    distances = []
+    # Distance to the closest historical location (vectorized, NaN-masked)
+    min_distance = min_distance_km(current_lat, current_lon, lats, lons)
 
-    for _, row in history_df.iterrows():
-        if pd.notna(row["latitude"]) and pd.notna(row["longitude"]):
-            distance = haversine_distance(
-                current_lat,
-                current_lon,
-                row["latitude"],
-                row["longitude"]
-            )
-            distances.append(distance)
-
-    if not distances:
+    if min_distance is None:
         return 0.5, "Insufficient historical geo coordinates."
 
-    min_distance = min(distances)
+    return geo_risk_from_distance(min_distance)
+
+
+def geo_risk_from_distance(min_distance: float):
+    """
+    Map the distance (km) to the closest historical location onto a risk tier.
+    """
 
     # ------------------------------
     # Risk Logic
@@ -88,3 +135,95 @@ def geo_risk_score(txn: dict, history_df: pd.DataFrame):
 
     else:
         return 0.9, "Transaction extremely distant from historical pattern."
+
+
+def with_travel_check(result, velocity):
+    """
+    Escalate a geo (risk, reason) when the hop from the customer's last
+    located transaction (tools.velocity_index.Velocity) is faster than
+    IMPOSSIBLE_TRAVEL_KMH.
+    """
+    speed = velocity.speed_kmh if velocity is not None else None
+    if speed is None or speed <= IMPOSSIBLE_TRAVEL_KMH:
+        return result
+    risk, reason = result
+    return max(risk, 0.9), (
+        f"{reason} Impossible travel: {velocity.last_km:.0f} km in {velocity.last_minutes:.0f} min "
+        f"({speed:.0f} km/h) since the last located transaction."
+    )
+
+
+# Pairs per vectorized block in geo_risk_scores; keeps temporaries cache-sized.
+# Histories at least GEO_BATCH_PACK_LIMIT long gain nothing from packing and
+# are scored on their own.
+GEO_BATCH_BLOCK = 1 << 16
+GEO_BATCH_PACK_LIMIT = 1024
+
+
+def geo_risk_scores(txns: list, histories: list):
+    """
+    Bulk variant of geo_risk_score: one (risk, reason) tuple per transaction,
+    scored against the matching customer history (frame or CustomerContext).
+
+    Short histories are packed: their (transaction, history point) pairs are
+    concatenated into blocks of about GEO_BATCH_BLOCK pairs, each block's
+    distances are computed in one vectorized pass and per-transaction minima
+    come from np.minimum.reduceat over each segment. Coordinate arrays are
+    extracted once per distinct history slice.
+    """
+    results = [None] * len(txns)
+    coords = {}
+    block = []
+    block_pairs = 0
+
+    for i, (txn, history_df) in enumerate(zip(txns, histories)):
+        if not txn.get("latitude") or not txn.get("longitude"):
+            results[i] = (0.5, "Transaction location data missing.")
+            continue
+        key = id(history_df)
+        if key not in coords:
+            coords[key] = _coordinates(history_df)
+        if coords[key] is None:
+            results[i] = (0.5, "No historical geo data available.")
+            continue
+        lats, lons = coords[key]
+
+        if len(lats) >= GEO_BATCH_PACK_LIMIT:
+            min_distance = min_distance_km(float(txn["latitude"]), float(txn["longitude"]), lats, lons)
+            results[i] = (
+                (0.5, "Insufficient historical geo coordinates.")
+                if min_distance is None
+                else geo_risk_from_distance(min_distance)
+            )
+            continue
+
+        block.append((i, float(txn["latitude"]), float(txn["longitude"]), lats, lons))
+        block_pairs += len(lats)
+        if block_pairs >= GEO_BATCH_BLOCK:
+            _score_geo_block(block, results)
+            block, block_pairs = [], 0
+
+    if block:
+        _score_geo_block(block, results)
+
+    return results
+
+
+def _score_geo_block(block: list, results: list):
+    lengths = np.array([len(lats) for _, _, _, lats, _ in block])
+    distances = haversine_distances(
+        np.repeat([lat for _, lat, _, _, _ in block], lengths),
+        np.repeat([lon for _, _, lon, _, _ in block], lengths),
+        np.concatenate([lats for _, _, _, lats, _ in block]),
+        np.concatenate([lons for _, _, _, _, lons in block]),
+    )
+    distances[np.isnan(distances)] = np.inf
+
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    minima = np.minimum.reduceat(distances, starts)
+
+    for (i, _, _, _, _), min_distance in zip(block, minima):
+        if np.isinf(min_distance):
+            results[i] = (0.5, "Insufficient historical geo coordinates.")
+        else:
+            results[i] = geo_risk_from_distance(float(min_distance))
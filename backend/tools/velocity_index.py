@@ -0,0 +1,250 @@
+# tools/velocity_index.py
+
+import bisect
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tools.geo_tool import haversine_distance
+
+
+# Sliding windows reported for every transaction: (label, seconds)
+VELOCITY_WINDOWS = (("10m", 600), ("1h", 3600), ("24h", 86400))
+
+# Bursts: this many earlier transactions inside the window raise the
+# temporal signal to the given risk
+VELOCITY_BURSTS = (("10m", 3, 0.9), ("1h", 6, 0.7))
+
+# Points added since the last build are kept in sorted buffers until they
+# exceed this fraction of the base arrays (or 64 points), then merged in.
+VELOCITY_REBUILD_FRACTION = 0.1
+
+_NAT = np.iinfo(np.int64).min
+_NS = 1_000_000_000
+
+
+def timestamp_ns(value):
+    """Nanoseconds since the epoch for a timestamp string/datetime, or None."""
+    if value is None or value == "":
+        return None
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None
+    if timestamp is pd.NaT:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.value
+
+
+@dataclass(frozen=True)
+class Velocity:
+    """
+    Windowed activity before one transaction, plus the hop from the last
+    located transaction (None when either side has no coordinates).
+    """
+
+    counts: dict  # window label -> earlier transactions inside the window
+    sums: dict  # window label -> their amount sum
+    last_km: float = None
+    last_minutes: float = None
+
+    @property
+    def speed_kmh(self):
+        if self.last_km is None:
+            return None
+        # Timestamps have minute granularity in practice; clamp so two
+        # transactions a few km apart in the same minute are not "infinite"
+        return self.last_km / max(self.last_minutes, 1.0) * 60
+
+    def burst_risk(self):
+        """(risk, reason) for the first burst threshold reached, or None."""
+        for label, threshold, risk in VELOCITY_BURSTS:
+            if self.counts.get(label, 0) >= threshold:
+                return risk, f"{self.counts[label]} earlier transactions in the last {label}."
+        return None
+
+    def fields(self) -> dict:
+        """Prompt fields: earlier transactions per window (txn_10m, ...)."""
+        return {f"txn_{label}": self.counts[label] for label, _ in VELOCITY_WINDOWS}
+
+
+def _sorted_arrays(times, amounts, located_times, lats, lons):
+    # (times, amounts, amount prefix sums, located times, lats, lons), time-sorted
+    order = np.argsort(times, kind="stable")
+    times, amounts = times[order], amounts[order]
+    prefix = np.concatenate(([0.0], np.cumsum(np.nan_to_num(amounts))))
+    located_order = np.argsort(located_times, kind="stable")
+    return times, amounts, prefix, located_times[located_order], lats[located_order], lons[located_order]
+
+
+class CustomerVelocityIndex:
+    """
+    Time-indexed view of one customer's history: timestamps sorted once,
+    with amount prefix sums, so a windowed count/sum is two binary searches
+    and a subtraction, and the last location before a time is one more
+    binary search over the located rows. O(log n) per query.
+
+    Transactions added later go to small sorted buffers (bisect.insort) and
+    are merged into the base arrays once they outgrow
+    VELOCITY_REBUILD_FRACTION of them.
+    """
+
+    def __init__(self, timestamps, amounts, lats, lons):
+        self._lock = threading.Lock()
+        self._pending = ([], [], [])  # times, amounts, located (time, lat, lon)
+        self._base = self._build(
+            np.asarray(timestamps, dtype="datetime64[ns]").view(np.int64),
+            np.asarray(amounts, dtype=float),
+            np.asarray(lats, dtype=float),
+            np.asarray(lons, dtype=float),
+        )
+
+    @staticmethod
+    def _build(times, amounts, lats, lons):
+        dated = times != _NAT
+        times, amounts, lats, lons = times[dated], amounts[dated], lats[dated], lons[dated]
+        located = ~(np.isnan(lats) | np.isnan(lons))
+        return _sorted_arrays(times, amounts, times[located], lats[located], lons[located])
+
+    def __len__(self):
+        return len(self._base[0]) + len(self._pending[0])
+
+    def add(self, time_ns, amount=None, lat=None, lon=None):
+        """Record a new transaction; O(log p) plus an amortized merge."""
+        if time_ns is None:
+            return
+        amount = np.nan if amount is None else float(amount)
+        with self._lock:
+            pending_times, pending_amounts, pending_located = self._pending
+            position = bisect.bisect_right(pending_times, time_ns)
+            pending_times.insert(position, time_ns)
+            pending_amounts.insert(position, amount)
+            if lat is not None and lon is not None:
+                bisect.insort(pending_located, (time_ns, float(lat), float(lon)))
+
+            if len(pending_times) > max(64, VELOCITY_REBUILD_FRACTION * len(self._base[0])):
+                self._merge()
+
+    def _merge(self):
+        # Caller holds the lock. The base arrays are replaced, never mutated.
+        times, amounts, _, located_times, lats, lons = self._base
+        pending_times, pending_amounts, pending_located = self._pending
+        located = np.array(pending_located, dtype=float).reshape(-1, 3)
+        self._base = _sorted_arrays(
+            np.concatenate((times, np.array(pending_times, dtype=np.int64))),
+            np.concatenate((amounts, pending_amounts)),
+            np.concatenate((located_times, np.array([entry[0] for entry in pending_located], dtype=np.int64))),
+            np.concatenate((lats, located[:, 1])),
+            np.concatenate((lons, located[:, 2])),
+        )
+        self._pending = ([], [], [])
+
+    def window(self, time_ns: int, seconds: float):
+        """(count, amount sum) of transactions in [time - seconds, time)."""
+        start = time_ns - int(seconds * _NS)
+        with self._lock:
+            times, _, prefix, _, _, _ = self._base
+            pending_times, pending_amounts, _ = self._pending
+            low, high = np.searchsorted(times, (start, time_ns), side="left")
+            count = int(high - low)
+            total = float(prefix[high] - prefix[low])
+            if pending_times:
+                low = bisect.bisect_left(pending_times, start)
+                high = bisect.bisect_left(pending_times, time_ns)
+                count += high - low
+                total += float(np.nansum(pending_amounts[low:high]))
+        return count, total
+
+    def last_location(self, time_ns: int):
+        """(time_ns, lat, lon) of the latest located transaction before time_ns, or None."""
+        with self._lock:
+            _, _, _, located_times, lats, lons = self._base
+            pending_located = self._pending[2]
+            best = None
+            position = int(np.searchsorted(located_times, time_ns, side="left")) - 1
+            if position >= 0:
+                best = (int(located_times[position]), float(lats[position]), float(lons[position]))
+            position = bisect.bisect_left(pending_located, (time_ns,)) - 1
+            if position >= 0 and (best is None or pending_located[position][0] > best[0]):
+                best = pending_located[position]
+        return best
+
+    def velocity(self, time_ns: int, lat=None, lon=None) -> Velocity:
+        counts, sums = {}, {}
+        for label, seconds in VELOCITY_WINDOWS:
+            counts[label], sums[label] = self.window(time_ns, seconds)
+
+        last_km = last_minutes = None
+        if lat is not None and lon is not None:
+            last = self.last_location(time_ns)
+            if last is not None:
+                last_km = haversine_distance(last[1], last[2], float(lat), float(lon))
+                last_minutes = (time_ns - last[0]) / (60 * _NS)
+        return Velocity(counts, sums, last_km, last_minutes)
+
+
+class VelocityIndexRegistry:
+    """
+    Per-customer velocity indexes over the shared history columns. attach()
+    only records the columns and row ranges; a customer's index is built on
+    first query (one O(k log k) sort) and then updated through add().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._columns = None
+        self._ranges = {}
+
+    def attach(self, columns: dict, customer_index):
+        with self._lock:
+            self._indexes = {}
+            self._columns = (columns["timestamps"], columns["amounts"], columns["latitudes"], columns["longitudes"])
+            self._ranges = customer_index
+
+    def get(self, customer_id, create: bool = False):
+        index = self._indexes.get(customer_id)
+        if index is not None:
+            return index
+
+        with self._lock:
+            index = self._indexes.get(customer_id)
+            if index is None:
+                bounds = self._ranges.get(customer_id)
+                if bounds is not None and self._columns is not None:
+                    start, stop = bounds
+                    index = CustomerVelocityIndex(*(column[start:stop] for column in self._columns))
+                elif create:
+                    index = CustomerVelocityIndex([], [], [], [])
+                if index is not None:
+                    self._indexes[customer_id] = index
+        return index
+
+    def add(self, txn: dict):
+        customer_id = txn.get("customerId") or txn.get("customer_id")
+        time_ns = timestamp_ns(txn.get("timestamp"))
+        if customer_id is None or time_ns is None:
+            return
+        lat, lon = txn.get("latitude"), txn.get("longitude")
+        located = lat is not None and lon is not None
+        self.get(customer_id, create=True).add(time_ns, txn.get("amount"), lat if located else None, lon if located else None)
+
+    def velocity(self, txn: dict):
+        """Velocity before the transaction's timestamp, or None without one."""
+        time_ns = timestamp_ns(txn.get("timestamp"))
+        if time_ns is None:
+            return None
+        index = self.get(txn.get("customerId") or txn.get("customer_id"), create=False)
+        lat, lon = txn.get("latitude"), txn.get("longitude")
+        located = lat is not None and lon is not None
+        if index is None:
+            return Velocity({label: 0 for label, _ in VELOCITY_WINDOWS}, {label: 0.0 for label, _ in VELOCITY_WINDOWS})
+        return index.velocity(time_ns, lat if located else None, lon if located else None)
+
+
+# Process-wide registry, attached to the history by fraud_graph at load
+velocity_indexes = VelocityIndexRegistry()